@@ -0,0 +1,212 @@
+"""
+Construction du bundle front local de la page TEASER
+Tailwind compilé et limité aux classes utilisées, Swiper et Font Awesome copiés
+en local, police d'icônes réduite aux icônes affichées : le kiosque n'a besoin
+ni du réseau ni du compilateur Tailwind du CDN pour son premier affichage.
+
+Lancement (après chaque modification des templates, avant le démarrage) :
+    python build_assets.py
+
+Prérequis :
+    - CLI Tailwind autonome (TAILWIND_BIN ou `tailwindcss` dans le PATH),
+      à défaut `npx tailwindcss` (Node.js)
+    - fontTools et brotli, optionnels, pour réduire la police d'icônes ;
+      sans eux la police complète est copiée
+
+Les fichiers téléchargés sont conservés dans data/vendor/ : les constructions
+suivantes se font hors ligne. Le résultat est écrit dans static/dist/ ; tant
+que static/dist/tailwind.css n'existe pas, la page continue d'utiliser les CDN.
+"""
+
+import ast
+import hashlib
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import urllib.request
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+from services.media_catalog import FINGERPRINT_LENGTH
+
+logger = logging.getLogger("build_assets")
+
+ROOT = Path(__file__).resolve().parent
+DIST_DIR = ROOT / "static" / "dist"
+VENDOR_CACHE = ROOT / "data" / "vendor"
+
+TAILWIND_VERSION = "3.4.1"
+SWIPER_VERSION = "9.4.1"
+FONTAWESOME_VERSION = "6.5.0"
+
+NPM_CDN = "https://cdn.jsdelivr.net/npm"
+SWIPER_FILES = {
+    "swiper-bundle.min.js": f"{NPM_CDN}/swiper@{SWIPER_VERSION}/swiper-bundle.min.js",
+    "swiper-bundle.min.css": f"{NPM_CDN}/swiper@{SWIPER_VERSION}/swiper-bundle.min.css",
+}
+FONTAWESOME_CSS = f"{NPM_CDN}/@fortawesome/fontawesome-free@{FONTAWESOME_VERSION}/css/all.min.css"
+FONTAWESOME_SOLID = f"{NPM_CDN}/@fortawesome/fontawesome-free@{FONTAWESOME_VERSION}/webfonts/fa-solid-900.woff2"
+
+# Fichiers dont les icônes (fa-*) sont conservées dans la police
+ICON_SOURCES = ("templates/teaser.html", "templates/fragments", "static/js/teaser.js", "static/js/carousel.js")
+ICON_PATTERN = re.compile(r"(?<![\w-])fa-[a-z0-9]+(?:-[a-z0-9]+)*")
+
+# Règles ".fa-xxx:before{content:"\fxxx"}" de la feuille Font Awesome
+CONTENT_RULE = re.compile(r'([^{}]+)\{content:\s*"\\([0-9a-fA-F]+)"')
+ICON_SELECTOR = re.compile(r"\s*\.(fa-[a-z0-9-]+):{1,2}before\s*")
+
+ICON_BASE_CSS = (
+    '@font-face{{font-family:"Font Awesome 6 Free";font-style:normal;font-weight:900;'
+    'font-display:block;src:url({font}) format("woff2")}}'
+    '.fa,.fas,.fa-solid{{font-family:"Font Awesome 6 Free";font-weight:900;display:inline-block;'
+    'font-style:normal;font-variant:normal;line-height:1;text-rendering:auto;'
+    '-webkit-font-smoothing:antialiased;-moz-osx-font-smoothing:grayscale}}'
+)
+
+
+def _write(target: Path, data: bytes):
+    """Écriture atomique (la page ne voit jamais un fichier à moitié écrit)"""
+    tmp_path = target.with_name(target.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, target)
+
+
+def fetch(url: str) -> Path:
+    """Fichier d'un paquet npm, téléchargé une seule fois par version"""
+    cached = VENDOR_CACHE / url[len(NPM_CDN) + 1:]
+    if not cached.exists():
+        logger.info(f"Téléchargement de {url}")
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as response:
+            _write(cached, response.read())
+    return cached
+
+
+def _fingerprint(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+def weather_icons() -> Set[str]:
+    """Icônes météo choisies à l'exécution (WEATHER_ICONS de services/weather.py)"""
+    tree = ast.parse((ROOT / "services" / "weather.py").read_text(encoding="utf-8"))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == "WEATHER_ICONS" for target in node.targets):
+            return {f"fa-{name}" for name in ast.literal_eval(node.value).values()} | {"fa-cloud"}
+    logger.warning("WEATHER_ICONS introuvable dans services/weather.py")
+    return set()
+
+
+def collect_icons() -> Set[str]:
+    """Classes fa-* présentes dans les templates et scripts de la page"""
+    icons = weather_icons()
+    for source in ICON_SOURCES:
+        path = ROOT / source
+        files: Iterable[Path] = path.rglob("*.html") if path.is_dir() else [path]
+        for file in files:
+            if file.exists():
+                icons.update(ICON_PATTERN.findall(file.read_text(encoding="utf-8")))
+    return icons
+
+
+def icon_codepoints(css: str) -> Dict[str, int]:
+    """Nom d'icône (alias compris) -> point de code, d'après la feuille Font Awesome"""
+    codepoints = {}
+    for selectors, code in CONTENT_RULE.findall(css):
+        for selector in selectors.split(","):
+            match = ICON_SELECTOR.fullmatch(selector)
+            if match:
+                codepoints[match.group(1)] = int(code, 16)
+    return codepoints
+
+
+def subset_font(source: Path, target: Path, codepoints: Iterable[int]) -> bool:
+    """Police réduite aux glyphes utilisés ; copie complète si fontTools est absent"""
+    try:
+        from fontTools import subset
+    except ImportError:
+        logger.warning("fontTools absent : police d'icônes copiée en entier")
+        shutil.copyfile(source, target)
+        return False
+
+    try:
+        options = subset.Options()
+        options.flavor = "woff2"
+        font = subset.load_font(str(source), options)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=list(codepoints))
+        subsetter.subset(font)
+        tmp_path = target.with_name(target.name + ".tmp")
+        subset.save_font(font, str(tmp_path), options)
+        os.replace(tmp_path, target)
+        return True
+    except Exception as e:
+        # woff2 nécessite brotli : police complète plutôt qu'aucune
+        logger.warning(f"Réduction de la police impossible ({str(e)}) : police copiée en entier")
+        shutil.copyfile(source, target)
+        return False
+
+
+def build_icons():
+    icons = collect_icons()
+    codepoints = icon_codepoints(fetch(FONTAWESOME_CSS).read_text(encoding="utf-8"))
+    used = {name: codepoints[name] for name in sorted(icons) if name in codepoints}
+    unknown = sorted(icons - set(used))
+    if unknown:
+        # Classes utilitaires (fa-spin, fa-2x...) ou icônes absentes de la version vendue
+        logger.info(f"Classes fa-* sans glyphe ignorées: {', '.join(unknown)}")
+
+    font = DIST_DIR / "fa-solid-900.woff2"
+    subset_font(fetch(FONTAWESOME_SOLID), font, set(used.values()))
+
+    # Police référencée avec son empreinte : servie avec un cache immuable
+    css = ICON_BASE_CSS.format(font=f"{font.name}?v={_fingerprint(font)}")
+    css += "".join(f'.{name}:before{{content:"\\{code:x}"}}' for name, code in used.items())
+    _write(DIST_DIR / "icons.css", css.encode("utf-8"))
+    logger.info(f"{len(used)} icône(s) conservée(s), police {font.stat().st_size // 1024} Ko")
+
+
+def tailwind_command() -> List[str]:
+    binary = os.environ.get("TAILWIND_BIN") or shutil.which("tailwindcss")
+    if binary:
+        return [binary]
+    npx = shutil.which("npx")
+    if npx:
+        return [npx, "--yes", f"tailwindcss@{TAILWIND_VERSION}"]
+    raise RuntimeError("CLI Tailwind introuvable : définir TAILWIND_BIN ou installer Node.js (npx)")
+
+
+def build_tailwind():
+    """CSS Tailwind minifié, limité aux classes des fichiers de tailwind.config.js"""
+    target = DIST_DIR / "tailwind.css"
+    tmp_path = target.with_name(target.name + ".tmp")
+    subprocess.run(
+        tailwind_command() + ["-c", "tailwind.config.js", "-i", "assets/tailwind.css",
+                              "-o", str(tmp_path), "--minify"],
+        cwd=ROOT, check=True
+    )
+    # Écrit en dernier : sa présence bascule la page sur le bundle local
+    os.replace(tmp_path, target)
+    logger.info(f"Tailwind: {target.stat().st_size // 1024} Ko")
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    DIST_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        for name, url in SWIPER_FILES.items():
+            shutil.copyfile(fetch(url), DIST_DIR / name)
+        build_icons()
+        build_tailwind()
+    except (OSError, RuntimeError, subprocess.CalledProcessError) as e:
+        logger.error(f"Construction du bundle impossible: {str(e)}")
+        return 1
+    logger.info(f"Bundle écrit dans {DIST_DIR.relative_to(ROOT)} (redémarrer le TEASER pour l'utiliser)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,11 +17,28 @@ class Settings(BaseSettings):
     TIDE_LOCATION_LON: float = -1.5586  # Biarritz longitude
     TIDE_REFRESH_INTERVAL: int = 3600   # 1 heure
     
+    # Budget par source pour la page teaser tant que le cache est froid (ms)
+    WEATHER_DEADLINE_MS: int = 300
+    TIDE_DEADLINE_MS: int = 300
+    MUSIC_DEADLINE_MS: int = 300
+    
     # Chemins médias
     MEDIA_ROOT: str = "static/media"
     SELFIE_ROOT: str = "static/selfies"
     MUSIC_ROOT: str = "static/music"
     
+    # Cache mémoire des médias les plus servis
+    HOT_MEDIA_CACHE_MB: int = 64
+    HOT_MEDIA_MAX_FILE_MB: int = 8
+    
+    # Journalisation (logs/teaser.log en lignes JSON, rotation par taille et par jour)
+    LOG_LEVEL: str = "INFO"
+    LOG_MAX_MB: int = 50
+    LOG_BACKUP_COUNT: int = 14
+    
+    # Journal des activités admin (jours de conservation)
+    ACTIVITY_RETENTION_DAYS: int = 365
+    
     # Configuration carrousels
     DEFAULT_CAROUSEL_SPEED: int = 5  # secondes
     AUTO_PLAY_VIDEOS: bool = True
@@ -1,20 +1,89 @@
+# Journalisation configurée avant l'import des services : leurs messages de démarrage passent déjà par la file
+from services.logging_config import setup_logging, stop_logging
+setup_logging()
+
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
-from typing import List
-import uvicorn
-import requests
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
+import asyncio
+import logging
 from dotenv import load_dotenv
-from services.weather import get_weather
-from services.music import get_music
+from services.weather import check_coordinates, get_weather, get_weather_batch
 from services.tide import get_tide_data
+from services.config_service import config_service
+from services.widget_scheduler import widget_scheduler
+from services.circuit_breaker import last_good_store
+from services.cover_cache import cover_cache
+from services.static_files import ImmutableStaticFiles, FingerprintedStaticFiles
+from services.media_catalog import media_catalog
+from services.hot_media_cache import hot_media_cache
+from services.activity_log import activity_log
+from services.retention import retention_worker
+from services.file_manager import file_manager
+from services.compression import CompressionMiddleware, encoded_response, precompress_assets
+from services.page_cache import teaser_page_cache, template_bytecode_cache, precompile_templates
+from config import settings
 
 from routers.admin import router as admin_router
 
 from pathlib import Path
 
 load_dotenv()
-app = FastAPI()
+
+logger = logging.getLogger(__name__)
+
+async def prewarm_media():
+    """Précharger en mémoire les médias des playlists affichées par les écrans"""
+    playlists = await asyncio.gather(*(file_manager.get_zone_playlist(zone) for zone in TEASER_ZONES))
+    paths = [
+        media_catalog.relative(item["src"])
+        for playlist in playlists for item in playlist
+        if item["type"] in ("image", "video")
+    ]
+    await hot_media_cache.prewarm(paths)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Templates compilés une fois au démarrage (bytecode réutilisé entre redémarrages)
+    precompile_templates(templates.env)
+    teaser_page_cache.precompile()
+
+    # Rafraîchissement des widgets en tâche de fond, à partir des caches
+    # sauvegardés au dernier arrêt (démarrage à chaud)
+    widget_scheduler.configure(config_service.get_system_config())
+    widget_scheduler.load()
+    await widget_scheduler.start()
+
+    # Bundle front local (police référencée par icons.css) : empreintes connues avant la première requête
+    if Path("static/dist").is_dir():
+        await media_catalog.scan("dist")
+
+    # Empreintes des médias calculées en tâche de fond (index conservé entre redémarrages)
+    catalog_scan = asyncio.create_task(media_catalog.scan("media"))
+    media_prewarm = asyncio.create_task(prewarm_media())
+
+    # Nettoyage automatique des zones (auto_cleanup / cleanup_days)
+    retention_worker.configure(config_service.get_system_config())
+    retention_worker.start()
+
+    # Variantes .gz / .br des assets JS / CSS (et du bundle local), réécrites seulement si l'original a changé
+    for assets_dir in (Path("static/js"), Path("static/css"), Path("static/dist")):
+        await asyncio.to_thread(precompress_assets, assets_dir)
+    yield
+    catalog_scan.cancel()
+    media_prewarm.cancel()
+    await retention_worker.stop()
+    await widget_scheduler.stop()
+    last_good_store.flush()
+    media_catalog.save()
+    activity_log.close()
+    stop_logging()
+
+app = FastAPI(lifespan=lifespan)
+
+# Compression négociée (gzip / brotli) des réponses HTML et JSON
+app.add_middleware(CompressionMiddleware)
 
 # Path("static/media/left1").mkdir(parents=True, exist_ok=True)
 # Path("static/media/left2").mkdir(parents=True, exist_ok=True)
@@ -24,51 +93,117 @@ app = FastAPI()
 app.include_router(admin_router)
 
 # Configuration HTML
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Pochettes adressées par contenu : montées avant /static pour le cache long
+app.mount("/static/covers", ImmutableStaticFiles(directory=str(cover_cache.cache_dir)), name="covers")
+app.mount("/static", FingerprintedStaticFiles(directory="static", catalog=media_catalog, hot_cache=hot_media_cache), name="static")
 templates = Jinja2Templates(directory="templates")
+templates.env.bytecode_cache = template_bytecode_cache
+templates.env.globals["asset_url"] = media_catalog.url
+templates.env.globals["asset_exists"] = media_catalog.exists
+
+TEASER_ZONES = ("left1", "left2", "left3", "center")
 
 @app.get("/")
 async def afficher_teaser(request: Request):
-    # Récupération météo 
-    meteo = await get_weather()
-
-    # Récupération musique
-    musique = await get_music()
-
-    # Récupération marée
-    marees = await get_tide_data()
-
-    return templates.TemplateResponse("teaser.html", {
-        "request": request,
-        "data": {
-            "meteo": meteo,
-            "musique": musique,
-            "marees": marees,
-            "cocktail": {
-                "nom": "Mojito IA",
-                "description": "Rhum, menthe, citron vert",
-                "image": "cocktail.jpg"
-            }
-        }
-    })
+    # Données des widgets servies depuis la mémoire (rafraîchies en tâche de fond).
+    # La coquille de la page part immédiatement ; une source pas encore en cache
+    # est affichée avec sa valeur de repli puis remplacée plus loin dans le flux,
+    # dès qu'elle arrive (dans la limite de son budget).
+    deadlines = {
+        "meteo": settings.WEATHER_DEADLINE_MS / 1000,
+        "musique": settings.MUSIC_DEADLINE_MS / 1000,
+        "marees": settings.TIDE_DEADLINE_MS / 1000
+    }
+
+    async def resolve(name: str):
+        value = await widget_scheduler.get_within(name, deadlines[name])
+        return value, widget_scheduler.version_of(name, value)
+
+    data = {name: widget_scheduler.get(name) for name in deadlines}
+    data["cocktail"] = {
+        "nom": "Mojito IA",
+        "description": "Rhum, menthe, citron vert",
+        "image": "cocktail.jpg"
+    }
+    # Config et playlists embarquées dans la page : premier affichage sans requête
+    data["config"] = config_service.get_teaser_config()
+    playlists = await asyncio.gather(*(file_manager.get_zone_playlist(zone) for zone in TEASER_ZONES))
+    data["playlists"] = dict(zip(TEASER_ZONES, playlists))
+    versions = {name: widget_scheduler.version_of(name, data[name]) for name in deadlines}
+    pending = [name for name in deadlines if not widget_scheduler.is_ready(name)]
+
+    if not pending:
+        # Toutes les données en mémoire : page en cache, déjà compressée
+        page = teaser_page_cache.render_encoded(data, versions)
+        widget_scheduler.record_manifest()
+        return encoded_response(request, page, "text/html")
+
+    async def body():
+        async for chunk in teaser_page_cache.stream(data, versions, pending, resolve):
+            yield chunk
+        widget_scheduler.record_manifest()
+
+    return StreamingResponse(body(), media_type="text/html", headers={"X-Accel-Buffering": "no"})
 
 
 # Route pour l'API meteo
 @app.get("/api/meteo")
 async def api_meteo(ville: str = None, lat: float = None, lon: float = None):
-    print(f"API météo appelée avec: lat={lat}, lon={lon}, ville={ville}")
+    logger.debug(f"API météo appelée avec: lat={lat}, lon={lon}, ville={ville}")
+    if ville is None and lat is None and lon is None:
+        return widget_scheduler.get("meteo")
+    try:
+        check_coordinates(lat, lon)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     meteo = await get_weather(ville=ville, lat=lat, lon=lon)
     return meteo
 
+# Route pour la météo de plusieurs sites en un appel
+@app.post("/api/meteo/batch")
+async def api_meteo_batch(payload: dict):
+    locations = payload.get("locations", [])
+    if not isinstance(locations, list) or not locations:
+        raise HTTPException(status_code=400, detail="Liste 'locations' requise")
+    if len(locations) > 100:
+        raise HTTPException(status_code=400, detail="100 localisations maximum")
+
+    cleaned = []
+    for location in locations:
+        if not isinstance(location, dict):
+            raise HTTPException(status_code=400, detail="Localisation invalide")
+        try:
+            if location.get("lat") is not None and location.get("lon") is not None:
+                lat, lon = float(location["lat"]), float(location["lon"])
+                try:
+                    check_coordinates(lat, lon)
+                except ValueError as e:
+                    raise HTTPException(status_code=422, detail=str(e))
+                cleaned.append({"id": location.get("id"), "lat": lat, "lon": lon})
+            elif location.get("ville"):
+                cleaned.append({"id": location.get("id"), "ville": str(location["ville"])})
+            else:
+                raise ValueError
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Chaque localisation requiert 'ville' ou 'lat'/'lon'")
+
+    results = await get_weather_batch(cleaned)
+    return {
+        "success": True,
+        "count": len(results),
+        "results": results
+    }
+
 # Route pour l'API musique
 @app.get("/api/musique/now-playing")
 async def api_music():
-    music = await get_music()
-    return music
+    return widget_scheduler.get("musique")
 
 # Route pour l'API marée
 @app.get("/api/marees")
 async def api_marees(lat: float = None, lon: float = None):
+    if lat is None or lon is None:
+        return widget_scheduler.get("marees")
     marees = await get_tide_data(lat=lat, lon=lon)
     return marees
 
@@ -84,4 +219,5 @@ async def admin_teaser_page(request: Request):
 if __name__ == "__main__":
     import uvicorn
     import os
-    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 8000)))
\ No newline at end of file
+    # log_config=None : uvicorn garde la journalisation configurée par setup_logging
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 8000)), log_config=None)
\ No newline at end of file
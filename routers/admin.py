@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Request, HTTPException, File, UploadFile, Form
+from fastapi import APIRouter, Request, HTTPException, File, UploadFile, Form, Query
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import JSONResponse, FileResponse
-from typing import List, Dict, Any
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from typing import List, Dict, Any, Optional
 import json
+import logging
 import uuid
 import requests
 from pathlib import Path
@@ -18,9 +20,23 @@ import io
 import math
 
 # Import de vos services existants
-from services.config_service import ConfigService, config_service
+from services.config_service import ConfigService, config_service, flatten_admin_config
 from services.file_manager import file_manager
 from services.selfie_service import selfie_service
+from services.widget_scheduler import widget_scheduler
+from services.circuit_breaker import breakers, last_good_store
+from services.cover_cache import cover_cache
+from services.page_cache import teaser_page_cache
+from services.compression import EncodedBody, encoded_response
+from services.media_catalog import media_catalog
+from services.hot_media_cache import hot_media_cache
+from services.activity_log import activity_log
+from services.log_reader import log_reader, sse_data
+from services.logging_config import get_levels, set_level
+from services.backup import backup_service
+from services.retention import retention_worker
+
+logger = logging.getLogger(__name__)
 
 def count_files_for_date(target_date):
     """Fonction helper pour compter les fichiers d'une date donnée"""
@@ -46,106 +62,6 @@ def custom_roun_mb(size_mb):
     else:
         return math.floor(size_mb)
 
-# ACTIVITES RECENTES
-class SimpleActivityLog:
-    def __init__(self):
-        self.log_file = Path("logs/admin_activity.json")
-        self.log_file.parent.mkdir(exist_ok=True)
-        
-    def add(self, activity_type: str, message: str, details: str = None, size_mb: float = None):
-        """Ajouter une activité avec plus de détails"""
-        try:
-            activity = {
-                "id": str(uuid.uuid4())[:8],
-                "type": activity_type,
-                "message": message,
-                "details": details,
-                "size_mb": round(size_mb, 2) if size_mb else None,
-                "timestamp": datetime.now().isoformat(),
-                "time_ago": self._calculate_time_ago(datetime.now())
-            }
-            
-            # Lire activités existantes
-            activities = self._load_activities()
-            
-            # Ajouter nouvelle activité au début
-            activities.insert(0, activity)
-            
-            # Garder seulement les 100 dernières
-            activities = activities[:100]
-            
-            # Sauvegarder
-            self._save_activities(activities)
-                
-            print(f"📝 {message}")
-        except Exception as e:
-            print(f"Erreur log activité: {e}")
-    
-    def get_recent_activities(self, limit: int = 20):
-        """Récupérer les activités récentes avec formatage pour l'UI"""
-        try:
-            activities = self._load_activities()
-            
-            # Mettre à jour les temps relatifs
-            for activity in activities:
-                if 'timestamp' in activity:
-                    timestamp = datetime.fromisoformat(activity['timestamp'])
-                    activity['time_ago'] = self._calculate_time_ago(timestamp)
-                    activity['icon'], activity['bg'] = self._get_activity_style(activity['type'])
-                    activity['description'] = activity['message']
-            
-            return activities[:limit]
-        except Exception as e:
-            print(f"Erreur récupération activités: {e}")
-            return []
-    
-    def _load_activities(self):
-        """Charger les activités depuis le fichier"""
-        if self.log_file.exists():
-            try:
-                with open(self.log_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
-    
-    def _save_activities(self, activities):
-        """Sauvegarder les activités dans le fichier"""
-        with open(self.log_file, 'w', encoding='utf-8') as f:
-            json.dump(activities, f, indent=2, ensure_ascii=False)
-    
-    def _calculate_time_ago(self, timestamp):
-        """Calculer le temps écoulé en français"""
-        now = datetime.now()
-        diff = now - timestamp
-        
-        if diff.days > 0:
-            return f"Il y a {diff.days} jour{'s' if diff.days > 1 else ''}"
-        elif diff.seconds > 3600:
-            hours = diff.seconds // 3600
-            return f"Il y a {hours} heure{'s' if hours > 1 else ''}"
-        elif diff.seconds > 60:
-            minutes = diff.seconds // 60
-            return f"Il y a {minutes} minute{'s' if minutes > 1 else ''}"
-        else:
-            return "À l'instant"
-    
-    def _get_activity_style(self, activity_type):
-        """Retourner l'icône et le style pour chaque type d'activité"""
-        styles = {
-            "upload": ("fas fa-upload text-blue-600", "bg-blue-100 dark:bg-blue-900/30"),
-            "config": ("fas fa-cog text-gray-600", "bg-gray-100 dark:bg-gray-700"),
-            "api_test": ("fas fa-vial text-purple-600", "bg-purple-100 dark:bg-purple-900/30"),
-            "cleanup": ("fas fa-broom text-orange-600", "bg-orange-100 dark:bg-orange-900/30"),
-            "backup": ("fas fa-download text-green-600", "bg-green-100 dark:bg-green-900/30"),
-            "error": ("fas fa-exclamation-circle text-red-600", "bg-red-100 dark:bg-red-900/30"),
-            "system": ("fas fa-server text-indigo-600", "bg-indigo-100 dark:bg-indigo-900/30"),
-            "media": ("fas fa-images text-cyan-600", "bg-cyan-100 dark:bg-cyan-900/30"),
-            "selfie": ("fas fa-camera text-pink-600", "bg-pink-100 dark:bg-pink-900/30")
-        }
-        return styles.get(activity_type, ("fas fa-info-circle text-gray-600", "bg-gray-100 dark:bg-gray-700"))
-
-activity_log = SimpleActivityLog()
 
 def log_startup_activity():
     """Enregistrer l'activité de démarrage"""
@@ -164,7 +80,7 @@ def ensure_media_directories():
     for zone in media_zones:
         zone_dir = Path(f"static/media/{zone}")
         zone_dir.mkdir(parents=True, exist_ok=True)
-        print(f"Dossier créé/vérifié: {zone_dir}")
+        logger.debug(f"Dossier créé/vérifié: {zone_dir}")
 
 # Appeler cette fonction
 ensure_media_directories()
@@ -219,7 +135,13 @@ async def save_all_config(config_data: dict):
     """Sauvegarder toute la configuration via ConfigService"""
     try:
         # TODO: Utiliser config_service.save_full_config() quand DB sera prête
-        print("Configuration sauvegardée:", config_data)
+        logger.info(f"Configuration sauvegardée ({len(config_data)} clé(s))")
+
+        # Appliquer les intervalles de rafraîchissement des widgets à chaud
+        flat_config = flatten_admin_config(config_data)
+        widget_scheduler.update_intervals(flat_config)
+        retention_worker.configure(flat_config)
+        teaser_page_cache.invalidate()
 
         activity_log.add(
             "config", 
@@ -239,7 +161,7 @@ async def save_all_config(config_data: dict):
 async def save_draft_config(config_data: dict):
     """Sauvegarder un brouillon via ConfigService"""
     try:
-        print("Draft sauvegardé:", config_data)
+        logger.info(f"Draft sauvegardé ({len(config_data)} clé(s))")
         return JSONResponse(content={"success": True, "message": "Draft sauvegardé"})
     except Exception as e:
         return JSONResponse(content={"success": False, "message": str(e)})
@@ -294,7 +216,7 @@ async def save_zone_config(zone: str, config_data: dict):
         if zone not in ["left1", "left2", "left3", "center"]:
             raise HTTPException(status_code=400, detail="Zone invalide")
         
-        print(f"Configuration zone {zone} sauvegardée:", config_data)
+        logger.info(f"Configuration zone {zone} sauvegardée ({len(config_data)} clé(s))")
         return JSONResponse(content={"success": True, "message": f"Zone {zone} configurée"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur sauvegarde zone: {str(e)}")
@@ -312,18 +234,18 @@ async def upload_media_files(files: List[UploadFile] = File(...), zone: str = Fo
         if zone not in ["left1", "left2", "left3", "center"]:
             raise HTTPException(status_code=400, detail="Zone invalide")
         
-        print(f"Upload reçu: {len(files)} fichiers pour zone {zone}")
+        logger.info(f"Upload reçu: {len(files)} fichiers pour zone {zone}")
 
         # Créer le dossier de destination
         zone_dir = Path(f"static/media/{zone}")
         zone_dir.mkdir(parents=True, exist_ok=True)
-        print(f"Dossier créé/vérifié: {zone_dir}")
+        logger.debug(f"Dossier créé/vérifié: {zone_dir}")
 
         uploaded_files = []
         total_size_bytes = 0
 
         for file in files:
-            print(f"Traitement fichier: {file.filename}, Type: {file.content_type}")
+            logger.debug(f"Traitement fichier: {file.filename}, Type: {file.content_type}")
             # Validation du type de fichier
             allowed_types = [
                 'image/jpeg', 'image/jpg', 'image/png', 'image/gif', 'image/webp',
@@ -331,7 +253,7 @@ async def upload_media_files(files: List[UploadFile] = File(...), zone: str = Fo
             ]
 
             if file.content_type not in allowed_types:
-                print(f"Type de fichier non supporté: {file.content_type}")
+                logger.warning(f"Type de fichier non supporté: {file.content_type}")
                 continue
 
             # Validation de la taille (50MB max)
@@ -348,7 +270,7 @@ async def upload_media_files(files: List[UploadFile] = File(...), zone: str = Fo
             with open(file_path, "wb") as buffer:
                 content = await file.read()
                 buffer.write(content)
-            print(f"Fichier sauvé: {file_path}")
+            logger.debug(f"Fichier sauvé: {file_path}")
             uploaded_files.append({
                 "filename": filename,
                 "original_name": file.filename,
@@ -371,7 +293,8 @@ async def upload_media_files(files: List[UploadFile] = File(...), zone: str = Fo
             "upload", 
             f"Upload de {len(uploaded_files)} fichier(s) dans {zone.upper()}", 
             f"Types: {', '.join(file_types)}", 
-            total_size_mb
+            total_size_mb,
+            zone=zone
         )
         
         return JSONResponse(content={
@@ -382,61 +305,29 @@ async def upload_media_files(files: List[UploadFile] = File(...), zone: str = Fo
         })
         
     except Exception as e:
-        activity_log.add("error", f"Erreur upload dans {zone}", str(e))
-        print(f"ERREUR UPLOAD: {str(e)}")
+        activity_log.add("error", f"Erreur upload dans {zone}", str(e), zone=zone)
+        logger.exception(f"Erreur upload: {str(e)}")
         return JSONResponse(content={
             "success": False,
             "message": f"Erreur d'upload: {str(e)}"
         }, status_code=500)
     
 # Route pour lister les medias d'une zone
+# Corps JSON des playlists, compressés une fois par version de la playlist
+_zone_media_bodies: Dict[str, tuple] = {}
+
 @router.get("/media/{zone}")
-async def get_zone_media(zone: str):
+async def get_zone_media(zone: str, request: Request):
     """Récupérer les médias d'une zone pour l'admin"""
     try:
-        zone_path = Path(f"static/media/{zone}")
-        if not zone_path.exists():
-            return JSONResponse(content={"zone": zone, "content": []})
-        
-        files = []
-        for file_path in zone_path.iterdir():
-            if file_path.is_file():
-                # Médias classiques
-                if file_path.suffix.lower() in ['.jpg', '.jpeg', '.png', '.gif', '.mp4', '.webm', '.webp', '.mov']:
-                    file_type = "image" if file_path.suffix.lower() in ['.jpg', '.jpeg', '.png', '.gif', '.webp'] else "video"
-                    files.append({
-                        "id": hash(file_path.name),
-                        "filename": file_path.name,
-                        "src": f"/static/media/{zone}/{file_path.name}",
-                        "path": f"/static/media/{zone}/{file_path.name}",
-                        "size": file_path.stat().st_size,
-                        "type": file_type,
-                        "created_at": datetime.fromtimestamp(file_path.stat().st_ctime).isoformat()
-                    })
-                
-                # URLs distantes (fichiers .json)
-                elif file_path.suffix.lower() == '.json' and file_path.name.startswith('url_'):
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            url_data = json.load(f)
-                        
-                        files.append({
-                            "id": hash(file_path.name),
-                            "filename": url_data.get("title", "URL distante"),
-                            "src": url_data.get("url", ""),
-                            "path": url_data.get("url", ""),
-                            "size": file_path.stat().st_size,
-                            "type": "url",
-                            "url": url_data.get("url", ""),
-                            "created_at": url_data.get("created_at", datetime.fromtimestamp(file_path.stat().st_ctime).isoformat())
-                        })
-                    except:
-                        continue
-
-        # Trier par date de création : plus récent d'abord
-        files.sort(key=lambda x: x['created_at'], reverse=True)
-        
-        return JSONResponse(content={"zone": zone, "content": files})
+        files = await file_manager.get_zone_playlist(zone)
+        cached = _zone_media_bodies.get(zone)
+        if cached is None or cached[0] is not files:
+            body = json.dumps({"zone": zone, "content": files}, ensure_ascii=False, separators=(",", ":"))
+            cached = (files, EncodedBody(body.encode("utf-8")))
+            if files:
+                _zone_media_bodies[zone] = cached
+        return encoded_response(request, cached[1], "application/json")
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur: {str(e)}")
@@ -455,12 +346,14 @@ async def delete_media_item(zone: str, filename: str):
             
             # Supprimer le fichier
             file_path.unlink()
+            media_catalog.forget(f"media/{zone}/{filename}")
             
             activity_log.add(
                 "media",
                 f"Média supprimé de {zone.upper()}",
                 f"Fichier: {filename}",
-                file_size_mb
+                file_size_mb,
+                zone=zone
             )
             
             return JSONResponse(content={
@@ -471,7 +364,7 @@ async def delete_media_item(zone: str, filename: str):
             raise HTTPException(status_code=404, detail="Fichier non trouvé")
             
     except Exception as e:
-        activity_log.add("error", f"Erreur suppression média {zone}", str(e))
+        activity_log.add("error", f"Erreur suppression média {zone}", str(e), zone=zone)
         raise HTTPException(status_code=500, detail=f"Erreur suppression: {str(e)}")
 
 @router.post("/add-url-content")
@@ -527,7 +420,7 @@ async def add_url_content(content_data: dict):
                             # Sauvegarder optimisée
                             img.save(file_path, optimize=True, quality=85)
                     except Exception as e:
-                        print(f"Erreur optimisation image: {e}")
+                        logger.warning(f"Erreur optimisation image: {e}")
                 
                 file_size_mb = file_path.stat().st_size / (1024 * 1024)
                 
@@ -535,7 +428,8 @@ async def add_url_content(content_data: dict):
                     "upload", 
                     f"Image URL téléchargée dans {zone.upper()}", 
                     f"Fichier: {filename} ({file_size_mb:.2f} MB)",
-                    file_size_mb
+                    file_size_mb,
+                    zone=zone
                 )
                 
                 return JSONResponse(content={
@@ -575,7 +469,8 @@ async def add_url_content(content_data: dict):
                     "upload", 
                     f"Vidéo URL téléchargée dans {zone.upper()}", 
                     f"Fichier: {filename} ({file_size_mb:.2f} MB)",
-                    file_size_mb
+                    file_size_mb,
+                    zone=zone
                 )
                 return JSONResponse(content={
                     "success": True,
@@ -592,7 +487,7 @@ async def add_url_content(content_data: dict):
             raise ValueError(f"Impossible de télécharger l'URL: {str(e)}")
         
     except Exception as e:
-        activity_log.add("error", f"Erreur ajout URL dans {zone}", str(e))
+        activity_log.add("error", f"Erreur ajout URL dans {zone}", str(e), zone=zone)
         raise HTTPException(status_code=500, detail=f"Erreur ajout URL: {str(e)}")
 
 
@@ -633,7 +528,7 @@ async def test_weather_api_connection(api_data: dict):
         })
     except Exception as e:
         error_message = str(e)
-        print(f"Erreur de test météo: {error_message}")
+        logger.warning(f"Erreur de test météo: {error_message}")
 
         # N'enregistrer l'activité d'erreur QUE si ce n'est pas un test silencieux
         if not is_silent:
@@ -780,83 +675,62 @@ async def get_widget_status():
             "music": "offline"
         })
 
-# ===== UTILITAIRES SYSTÈME =====
+@router.get("/widgets/status")
+async def get_widgets_refresh_status():
+    """État du rafraîchissement en tâche de fond des widgets"""
+    return JSONResponse(content={
+        "success": True,
+        "widgets": widget_scheduler.get_status(),
+        "manifest_at": widget_scheduler.manifest_at,
+        "covers": cover_cache.get_stats(),
+        "page_cache": teaser_page_cache.get_stats(),
+        "timestamp": datetime.now().isoformat()
+    })
+
+@router.get("/media-cache/status")
+async def get_media_cache_status():
+    """Taux de succès et occupation du cache mémoire des médias"""
+    return JSONResponse(content={
+        "success": True,
+        "hot_media": hot_media_cache.get_stats(),
+        "catalog": media_catalog.get_stats(),
+        "timestamp": datetime.now().isoformat()
+    })
+
+@router.get("/upstreams/status")
+async def get_upstreams_status():
+    """État des disjoncteurs et âge des dernières valeurs connues (secondes)"""
+    return JSONResponse(content={
+        "success": True,
+        "breakers": {name: breaker.status() for name, breaker in breakers.items()},
+        "last_good": last_good_store.status(),
+        "timestamp": datetime.now().isoformat()
+    })
 
-# CORRECTION dans admin.py
+# ===== UTILITAIRES SYSTÈME =====
 
 @router.post("/cleanup")
 async def run_system_cleanup(request: Request):
-    """Nettoyage via FileManager - AVEC CALCUL RÉEL DE L'ESPACE"""
+    """
+    Nettoyage manuel des zones : médias de plus de `cleanup_days` jours
+
+    Même index que le nettoyage automatique (aucun parcours des dossiers),
+    suppressions par lots hors de la boucle d'événements.
+    """
     try:
-        # Récupérer les paramètres du formulaire
         try:
-            body = await request.body()
-            if body:
-                import json
-                data = json.loads(body.decode('utf-8'))
-            else:
-                data = {}
-        except:
+            data = await request.json()
+        except Exception:
             data = {}
-        
-        cleanup_days = data.get('cleanup_days', 30)
-        
-        # Variables pour tracking réel
-        deleted_count = 0
-        total_size_freed = 0  # En bytes
-        
-        # Nettoyage manuel avec calcul de taille
-        zones = ['left1', 'left2', 'left3', 'center']
-        cutoff_date = datetime.now() - timedelta(days=cleanup_days)
-        
-        for zone in zones:
-            zone_path = Path(f"static/media/{zone}")
-            if not zone_path.exists():
-                continue
-                
-            for file_path in zone_path.iterdir():
-                if file_path.is_file():
-                    # Vérifier l'âge du fichier
-                    file_date = datetime.fromtimestamp(file_path.stat().st_ctime)
-                    
-                    if file_date < cutoff_date:
-                        try:
-                            # Calculer la taille AVANT suppression
-                            file_size = file_path.stat().st_size
-                            
-                            # Supprimer le fichier
-                            file_path.unlink()
-                            
-                            # Mettre à jour les compteurs avec la VRAIE taille
-                            deleted_count += 1
-                            total_size_freed += file_size
-                            
-                            print(f"Supprimé: {file_path.name} ({file_size / (1024*1024):.2f} MB)")
-                            
-                        except Exception as e:
-                            print(f"Erreur suppression {file_path.name}: {e}")
-        
-        # Nettoyer aussi les selfies si configuré
-        selfies_path = Path("static/selfies")
-        if selfies_path.exists():
-            for file_path in selfies_path.iterdir():
-                if file_path.is_file() and file_path.suffix.lower() in ['.jpg', '.jpeg', '.png']:
-                    file_date = datetime.fromtimestamp(file_path.stat().st_ctime)
-                    
-                    if file_date < cutoff_date:
-                        try:
-                            file_size = file_path.stat().st_size
-                            file_path.unlink()
-                            deleted_count += 1
-                            total_size_freed += file_size
-                            print(f"Selfie supprimé: {file_path.name} ({file_size / (1024*1024):.2f} MB)")
-                        except Exception as e:
-                            print(f"Erreur suppression selfie {file_path.name}: {e}")
-        
-        # Convertir en MB avec précision
+        cleanup_days = int((data or {}).get('cleanup_days') or retention_worker.days)
+        if cleanup_days < 1:
+            raise HTTPException(status_code=400, detail="Jours de nettoyage doit être supérieur à 0")
+
+        result = await retention_worker.run_all(cleanup_days)
+        deleted_count = result["deleted"]
+        total_size_freed = result["freed_bytes"]
         size_freed_mb = total_size_freed / (1024 * 1024)
-        
-        # Log d'activité avec vraies données
+
         activity_log.add(
             "cleanup", 
             f"Nettoyage système terminé", 
@@ -868,23 +742,34 @@ async def run_system_cleanup(request: Request):
             "success": True,
             "message": "Nettoyage terminé",
             "deleted_files": deleted_count,
-            "size_freed_mb": round(size_freed_mb, 2),  # ← VRAIE taille libérée
-            "size_freed_bytes": total_size_freed,      # ← Détail en bytes
+            "size_freed_mb": round(size_freed_mb, 2),
+            "size_freed_bytes": total_size_freed,
             "cleanup_days": cleanup_days,
             "details": f"{deleted_count} fichiers de plus de {cleanup_days} jours supprimés"
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         activity_log.add("error", "Erreur nettoyage système", str(e))
         raise HTTPException(status_code=500, detail=f"Erreur nettoyage: {str(e)}")
 
+@router.get("/cleanup/status")
+async def get_cleanup_status():
+    """État du nettoyage automatique (activation, durée, derniers passages)"""
+    return JSONResponse(content={"success": True, "retention": retention_worker.get_stats()})
+
 @router.get("/logs")
-async def get_system_logs():
-    """Logs système - AMÉLIORÉ avec JSON et HTML"""
+async def get_system_logs(lines: int = 2000, before: Optional[int] = None, grep: Optional[str] = None,
+                          file: Optional[str] = None):
+    """
+    Logs système : dernières lignes du fichier de log le plus récent (ou de `file`)
+
+    Les pages plus anciennes s'obtiennent en repassant `next_before` dans
+    `before` ; `grep` filtre les lignes côté serveur (sans tenir compte de la casse).
+    """
     try:
-        logs_dir = Path("logs")
-        
-        if not logs_dir.exists():
+        if not log_reader.directory.exists():
             default_logs = """[INFO] Module TEASER démarré
 [INFO] Interface admin accessible sur port 8000
 [INFO] Services initialisés avec succès
@@ -898,11 +783,12 @@ async def get_system_logs():
                 "source": "generated"
             })
         
-        # Lire le dernier fichier de log
-        log_files = sorted(logs_dir.glob("*.log"), 
-                          key=lambda x: x.stat().st_mtime, reverse=True)
+        try:
+            latest_log = log_reader.resolve(file)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        if not log_files:
+        if latest_log is None:
             return JSONResponse(content={
                 "success": True,
                 "logs": "[INFO] Aucun fichier de log trouvé",
@@ -910,33 +796,23 @@ async def get_system_logs():
                 "size": 0
             })
         
-        latest_log = log_files[0]
-        
-        try:
-            with open(latest_log, 'r', encoding='utf-8') as f:
-                logs_content = f.read()
-        except UnicodeDecodeError:
-            # Si problème d'encodage, essayer latin-1
-            with open(latest_log, 'r', encoding='latin-1') as f:
-                logs_content = f.read()
-        
-        # Limiter aux 2000 dernières lignes pour éviter les gros fichiers
-        log_lines = logs_content.split('\n')
-        if len(log_lines) > 2000:
-            logs_content = '\n'.join(log_lines[-2000:])
-            truncated = True
-        else:
-            truncated = False
+        # Lecture depuis la fin par blocs : coût proportionnel aux lignes demandées
+        page = await asyncio.to_thread(log_reader.tail, latest_log, lines, before, grep)
         
         return JSONResponse(content={
             "success": True,
-            "logs": logs_content,
+            "logs": "\n".join(page["lines"]),
             "file": str(latest_log.name),
-            "size": len(log_lines),
-            "truncated": truncated,
-            "file_size_kb": round(latest_log.stat().st_size / 1024, 2)
+            "size": len(page["lines"]),
+            "truncated": page["next_before"] is not None,
+            "next_before": page["next_before"],
+            "end_offset": page["end_offset"],
+            "file_size_kb": round(page["end_offset"] / 1024, 2),
+            "files": [path.name for path in log_reader.files()]
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         return JSONResponse(content={
             "success": False,
@@ -944,95 +820,145 @@ async def get_system_logs():
             "logs": f"[ERROR] Impossible de charger les logs: {str(e)}"
         })
 
+@router.get("/logs/follow")
+async def follow_system_logs(request: Request, after: Optional[int] = None, grep: Optional[str] = None,
+                             file: Optional[str] = None):
+    """
+    Suivi en direct du fichier de log (Server-Sent Events)
+
+    Chaque ligne est envoyée avec sa position (`id`) : `after` (ou l'en-tête
+    Last-Event-ID à la reconnexion) reprend là où le client s'est arrêté.
+    Sans `after`, seules les nouvelles lignes sont envoyées.
+    """
+    try:
+        path = log_reader.resolve(file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if path is None:
+        raise HTTPException(status_code=404, detail="Aucun fichier de log trouvé")
+
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        after = int(last_event_id)
+
+    try:
+        follow = log_reader.follow(path, after, grep)
+    except RuntimeError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    async def event_stream():
+        try:
+            idle = 0.0
+            yield f"retry: 2000\nevent: file\ndata: {path.name}\n\n"
+            while not await request.is_disconnected():
+                batch = await asyncio.to_thread(follow.poll)
+                events = []
+                if batch["skipped"]:
+                    events.append(f"event: skipped\ndata: {batch['skipped']}\n\n")
+                if batch["rotated"]:
+                    events.append(f"event: rotated\ndata: {path.name}\n\n")
+                events.extend(f"id: {offset}\n{sse_data(line)}\n" for offset, line in batch["lines"])
+
+                if events:
+                    # Un envoi par lot : un client lent ralentit la lecture au lieu de tout mettre en mémoire
+                    idle = 0.0
+                    yield "".join(events)
+                    continue
+
+                idle += 0.5
+                if idle >= 15:
+                    idle = 0.0
+                    yield ": keep-alive\n\n"
+                await asyncio.sleep(0.5)
+        finally:
+            follow.close()
+
+    # Le suivi est aussi libéré si le flux n'a jamais démarré (client parti avant le premier envoi)
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    }, background=BackgroundTask(follow.close))
+
+@router.get("/logging/levels")
+async def get_logging_levels():
+    """Niveaux de log de la racine ("") et des modules réglés"""
+    return JSONResponse(content={"success": True, "levels": get_levels()})
+
+@router.post("/logging/levels")
+async def update_logging_level(level_data: dict):
+    """
+    Changer à chaud le niveau de log d'un module
+
+    Ex. {"logger": "services.weather", "level": "DEBUG"} ; "level": null
+    rend au module le niveau de son parent.
+    """
+    name = level_data.get("logger", "")
+    try:
+        set_level(name, level_data.get("level"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info(f"Niveau de log de '{name or 'root'}' : {level_data.get('level') or 'hérité'}")
+    return JSONResponse(content={"success": True, "levels": get_levels()})
+
 @router.get("/backup")
-async def download_config_backup():
-    """Sauvegarde configuration - AMÉLIORÉE"""
+async def download_config_backup(media: bool = False, base: Optional[str] = None):
+    """
+    Sauvegarde complète, générée à la volée (archive tar)
+
+    Configuration, catalogue et journal d'activité ; avec media=true, les
+    fichiers des zones et les selfies. Avec base=<id> (ou base=latest),
+    sauvegarde incrémentale : seuls les contenus absents de la base sont
+    inclus. L'archive est envoyée au fur et à mesure, sans fichier temporaire.
+    """
     try:
-        activity_log.add("backup", "Génération du backup en cours")
-        
-        # Collecter toutes les données système
-        backup_data = {
-            "teaser_backup": True,
-            "version": "1.0",
-            "created_at": datetime.utcnow().isoformat(),
-            "created_by": "admin",
-            
-            # Stats actuelles
-            "stats": {
-                "storage": file_manager.get_storage_stats(),
-                "selfies": selfie_service.get_selfie_stats(),
-                "zones_count": {
-                    "left1": len(file_manager.get_media_files("left1")),
-                    "left2": len(file_manager.get_media_files("left2")),
-                    "left3": len(file_manager.get_media_files("left3")),
-                    "center": len(file_manager.get_media_files("center"))
-                }
-            },
-            
-            # Configuration système
-            "system_config": {},
-            
-            # Liste des fichiers média (pour sauvegarde complète)
-            "media_inventory": {
-                "left1": [f['name'] for f in file_manager.get_media_files("left1")],
-                "left2": [f['name'] for f in file_manager.get_media_files("left2")],
-                "left3": [f['name'] for f in file_manager.get_media_files("left3")],
-                "center": [f['name'] for f in file_manager.get_media_files("center")]
-            },
-            
-            # Activité récente
-            "recent_activity": activity_log.get_recent_activities(limit=50)
+        manifest = await backup_service.prepare(include_media=media, base=base)
+    except ValueError as e:
+        raise HTTPException(status_code=404 if base else 400, detail=str(e))
+
+    backup_filename = f"teaser_backup_{manifest['id']}{'_incr' if manifest['base'] else ''}.tar"
+    activity_log.add("backup", "Génération du backup en cours",
+                     f"Fichier: {backup_filename}" + (" (avec médias)" if manifest["include_media"] else ""))
+
+    return StreamingResponse(
+        backup_service.stream(manifest),
+        media_type="application/x-tar",
+        headers={
+            "Content-Disposition": f"attachment; filename={backup_filename}",
+            "Content-Description": "TEASER System Backup"
         }
-        
-        # Charger la config système si elle existe
-        config_file = Path("config/system_config.json")
-        if config_file.exists():
-            with open(config_file, 'r', encoding='utf-8') as f:
-                backup_data["system_config"] = json.load(f)
-        
-        # Nom du fichier avec timestamp
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_filename = f"teaser_backup_{timestamp}.json"
-        
-        # Créer le fichier temporaire
-        backup_file = Path(f"temp_{backup_filename}")
-        
-        with open(backup_file, 'w', encoding='utf-8') as f:
-            json.dump(backup_data, f, indent=2, ensure_ascii=False)
-        
-        activity_log.add(
-            "backup", 
-            "Backup généré avec succès", 
-            f"Fichier: {backup_filename} ({round(backup_file.stat().st_size/1024, 2)} KB)"
-        )
-        
-        # Retourner le fichier
-        response = FileResponse(
-            path=backup_file,
-            filename=backup_filename,
-            media_type="application/json",
-            headers={
-                "Content-Disposition": f"attachment; filename={backup_filename}",
-                "Content-Description": "TEASER System Backup"
-            }
-        )
-        
-        # Supprimer le fichier temporaire après envoi
-        def cleanup():
-            try:
-                if backup_file.exists():
-                    backup_file.unlink()
-            except:
-                pass
-        
-        import atexit
-        atexit.register(cleanup)
-        
-        return response
-        
-    except Exception as e:
-        activity_log.add("error", "Erreur génération backup", str(e))
-        raise HTTPException(status_code=500, detail=f"Erreur backup: {str(e)}")
+    )
+
+@router.post("/restore")
+async def restore_backup(request: Request, config: bool = True):
+    """
+    Restaurer une archive de backup envoyée telle quelle dans le corps de la requête
+
+    L'archive est lue au fil de l'envoi (pas de fichier intermédiaire) ;
+    les médias sont vérifiés par empreinte avant de remplacer les zones.
+    Une archive incrémentale nécessite que les backups de sa chaîne aient
+    été restaurés avant elle.
+    """
+    try:
+        result = await backup_service.restore(request.stream(), restore_config=config)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except OSError as e:
+        # Éléments déjà remplacés remis en place par le service
+        raise HTTPException(status_code=500, detail=f"Erreur restauration: {str(e)}")
+
+    teaser_page_cache.invalidate()
+    if result["config"]:
+        widget_scheduler.update_intervals(config_service.get_teaser_config())
+        retention_worker.configure(config_service.get_system_config())
+    return JSONResponse(content={"success": True, **result})
+
+@router.get("/backups")
+async def list_backups():
+    """Sauvegardes avec médias conservées (bases possibles d'un backup incrémental)"""
+    backups = await asyncio.to_thread(backup_service.list_backups)
+    return JSONResponse(content={"success": True, "backups": backups})
 
 # ===== STATISTIQUES =====
 
@@ -1405,6 +1331,46 @@ async def get_recent_activity():
             "error": str(e),
             "activities": []
         })
+
+def _parse_activity_date(value: str, name: str) -> float:
+    """Borne de date de l'historique (ISO, ex. 2025-08-06 ou 2025-08-06T14:00)"""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Date invalide pour {name}: {value}")
+
+@router.get("/activity/history")
+async def get_activity_history(
+    type: Optional[List[str]] = Query(None),
+    zone: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50
+):
+    """
+    Historique complet des activités, filtré et paginé par curseur
+
+    Ex. uploads de la zone centrale depuis une date :
+        /api/admin/activity/history?type=upload&zone=center&since=2025-08-01
+    La page suivante s'obtient en repassant `next_cursor` dans `cursor`.
+    """
+    since_ts = _parse_activity_date(since, "since") if since else None
+    until_ts = _parse_activity_date(until, "until") if until else None
+    try:
+        page = await asyncio.to_thread(
+            activity_log.query, types=type, zone=zone, since=since_ts, until=until_ts,
+            cursor=cursor, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return JSONResponse(content={
+        "success": True,
+        "activities": page["items"],
+        "count": len(page["items"]),
+        "next_cursor": page["next_cursor"]
+    })
     
 # Ajouter dans admin.py
 
@@ -1428,6 +1394,10 @@ async def save_system_config(config_data: dict):
         if config_data.get('cleanup_days', 30) < 1:
             raise ValueError("Jours de nettoyage doit être supérieur à 0")
         
+        for field in ['weather_refresh', 'tide_refresh', 'music_refresh']:
+            if field in config_data and not (isinstance(config_data[field], (int, float)) and config_data[field] > 0):
+                raise ValueError(f"Intervalle invalide: {field}")
+        
         # TODO: Sauvegarder en base de données
         # config_service.save_system_config(config_data)
         
@@ -1442,6 +1412,11 @@ async def save_system_config(config_data: dict):
                 'updated_by': 'admin'
             }, f, indent=2)
         
+        # Appliquer les nouveaux intervalles et la conservation sans redémarrage
+        widget_scheduler.update_intervals(config_data)
+        retention_worker.configure(config_data)
+        teaser_page_cache.invalidate()
+        
         activity_log.add(
             "config",
             "Configuration système mise à jour",
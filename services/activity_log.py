@@ -0,0 +1,364 @@
+"""
+Journal des activités de l'interface admin du TEASER
+Base SQLite en ajout seul alimentée par un thread d'écriture (insertions
+groupées), activités récentes servies depuis un tampon circulaire en mémoire
+"""
+
+import base64
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS activities (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    type TEXT NOT NULL,
+    zone TEXT,
+    message TEXT NOT NULL,
+    details TEXT,
+    size_mb REAL
+);
+CREATE INDEX IF NOT EXISTS idx_activities_ts ON activities(ts);
+CREATE INDEX IF NOT EXISTS idx_activities_type_ts ON activities(type, ts);
+CREATE INDEX IF NOT EXISTS idx_activities_zone_ts ON activities(zone, ts);
+"""
+
+# Taille maximale d'une page de l'historique
+MAX_PAGE_SIZE = 200
+
+COLUMNS = ("id", "ts", "type", "zone", "message", "details", "size_mb")
+
+# Icône et fond de chaque type d'activité dans le tableau de bord
+ACTIVITY_STYLES = {
+    "upload": ("fas fa-upload text-blue-600", "bg-blue-100 dark:bg-blue-900/30"),
+    "config": ("fas fa-cog text-gray-600", "bg-gray-100 dark:bg-gray-700"),
+    "api_test": ("fas fa-vial text-purple-600", "bg-purple-100 dark:bg-purple-900/30"),
+    "cleanup": ("fas fa-broom text-orange-600", "bg-orange-100 dark:bg-orange-900/30"),
+    "backup": ("fas fa-download text-green-600", "bg-green-100 dark:bg-green-900/30"),
+    "error": ("fas fa-exclamation-circle text-red-600", "bg-red-100 dark:bg-red-900/30"),
+    "system": ("fas fa-server text-indigo-600", "bg-indigo-100 dark:bg-indigo-900/30"),
+    "media": ("fas fa-images text-cyan-600", "bg-cyan-100 dark:bg-cyan-900/30"),
+    "selfie": ("fas fa-camera text-pink-600", "bg-pink-100 dark:bg-pink-900/30")
+}
+DEFAULT_STYLE = ("fas fa-info-circle text-gray-600", "bg-gray-100 dark:bg-gray-700")
+
+
+def calculate_time_ago(timestamp: datetime) -> str:
+    """Temps écoulé en français"""
+    diff = datetime.now() - timestamp
+
+    if diff.days > 0:
+        return f"Il y a {diff.days} jour{'s' if diff.days > 1 else ''}"
+    elif diff.seconds > 3600:
+        hours = diff.seconds // 3600
+        return f"Il y a {hours} heure{'s' if hours > 1 else ''}"
+    elif diff.seconds > 60:
+        minutes = diff.seconds // 60
+        return f"Il y a {minutes} minute{'s' if minutes > 1 else ''}"
+    else:
+        return "À l'instant"
+
+
+def format_activity(activity: Dict[str, Any]) -> Dict[str, Any]:
+    """Activité mise en forme pour l'UI (date, temps relatif, icône)"""
+    timestamp = datetime.fromtimestamp(activity["ts"])
+    icon, bg = ACTIVITY_STYLES.get(activity["type"], DEFAULT_STYLE)
+    return {
+        "id": activity["id"],
+        "type": activity["type"],
+        "zone": activity.get("zone"),
+        "message": activity["message"],
+        "details": activity.get("details"),
+        "size_mb": activity.get("size_mb"),
+        "timestamp": timestamp.isoformat(),
+        "time_ago": calculate_time_ago(timestamp),
+        "icon": icon,
+        "bg": bg,
+        "description": activity["message"]
+    }
+
+
+class ActivityLog:
+    """
+    Activités admin (uploads, suppressions, tests d'API...) en base SQLite
+
+    `add` ne fait qu'ajouter l'activité au tampon circulaire et à la file
+    d'écriture : un thread dédié insère les activités par lots, et supprime
+    périodiquement celles qui dépassent la durée de conservation.
+    """
+
+    def __init__(self, db_path: Path, legacy_path: Optional[Path] = None, ring_size: int = 200,
+                 retention_days: int = 180, flush_interval: float = 0.5, batch_size: int = 500):
+        self.db_path = db_path
+        self.legacy_path = legacy_path
+        self.retention_days = retention_days
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=ring_size)
+        self._queue: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._flushed = threading.Condition()
+        self._pending = 0
+        self._last_retention: Optional[float] = None
+        self.stats = {"written": 0, "batches": 0, "expired": 0, "errors": 0}
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._open()
+        self._thread = threading.Thread(target=self._writer, name="activity-log-writer", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # Avant le passage en WAL : ignoré sans erreur une fois la base créée
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _open(self):
+        """Créer la base, migrer l'ancien fichier JSON et remplir le tampon circulaire"""
+        with self._connect() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                # Base créée sans compactage incrémental : réécrite une fois pour l'activer
+                conn.execute("VACUUM")
+            conn.executescript(SCHEMA)
+            self._migrate_legacy(conn)
+            rows = conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM activities ORDER BY seq DESC LIMIT ?",
+                (self._recent.maxlen,)
+            ).fetchall()
+        conn.close()
+        self._recent.extend(dict(row) for row in reversed(rows))
+
+    def _migrate_legacy(self, conn: sqlite3.Connection):
+        if not self.legacy_path or not self.legacy_path.exists():
+            return
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                activities = json.load(f)
+            rows = []
+            for activity in reversed(activities):
+                ts = datetime.fromisoformat(activity["timestamp"]).timestamp()
+                rows.append((activity.get("id") or uuid.uuid4().hex[:8], ts, activity.get("type", "system"),
+                             activity.get("zone"), activity.get("message", ""),
+                             activity.get("details"), activity.get("size_mb")))
+            conn.executemany(
+                f"INSERT INTO activities ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.commit()
+            self.legacy_path.rename(self.legacy_path.with_suffix(".json.migrated"))
+            logger.info(f"{len(rows)} activité(s) migrée(s) depuis {self.legacy_path}")
+        except Exception as e:
+            logger.warning(f"Migration de {self.legacy_path} impossible: {str(e)}")
+
+    def add(self, activity_type: str, message: str, details: str = None, size_mb: float = None,
+            zone: str = None):
+        """Enregistrer une activité (sans attendre l'écriture sur disque)"""
+        activity = {
+            "id": uuid.uuid4().hex[:8],
+            "ts": time.time(),
+            "type": activity_type,
+            "zone": zone,
+            "message": message,
+            "details": details,
+            "size_mb": round(size_mb, 2) if size_mb else None
+        }
+        self._recent.append(activity)
+        with self._flushed:
+            self._pending += 1
+        self._queue.put(activity)
+        logger.info(f"📝 {message}")
+
+    def get_recent_activities(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Activités les plus récentes, mises en forme pour l'UI"""
+        recent = list(self._recent)
+        return [format_activity(activity) for activity in reversed(recent[-limit:])] if limit > 0 else []
+
+    @staticmethod
+    def encode_cursor(ts: float, seq: int) -> str:
+        return base64.urlsafe_b64encode(f"{ts!r}:{seq}".encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[float, int]:
+        """Position (ts, seq) d'un curseur ; ValueError s'il est invalide"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            ts, seq = raw.split(":")
+            return float(ts), int(seq)
+        except Exception:
+            raise ValueError("Curseur invalide")
+
+    def query(self, types: Optional[Sequence[str]] = None, zone: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None,
+              cursor: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+        """
+        Historique filtré, du plus récent au plus ancien, page par page
+
+        Args:
+            types: Types d'activité retenus (tous si vide)
+            zone: Zone concernée
+            since / until: Bornes [since, until[ en timestamp
+            cursor: Curseur `next_cursor` de la page précédente
+
+        Returns:
+            {"items": [...], "next_cursor": str ou None}
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        clauses, params = [], []
+        if types:
+            clauses.append(f"type IN ({', '.join('?' for _ in types)})")
+            params.extend(types)
+        if zone:
+            clauses.append("zone = ?")
+            params.append(zone)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        if cursor:
+            # Reprise strictement après la dernière ligne renvoyée (ordre ts, seq décroissant)
+            clauses.append("(ts, seq) < (?, ?)")
+            params.extend(self.decode_cursor(cursor))
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (f"SELECT seq, {', '.join(COLUMNS)} FROM activities {where} "
+               f"ORDER BY ts DESC, seq DESC LIMIT ?")
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, (*params, limit + 1)).fetchall()
+        finally:
+            conn.close()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self.encode_cursor(rows[-1]["ts"], rows[-1]["seq"])
+        return {"items": [format_activity(dict(row)) for row in rows], "next_cursor": next_cursor}
+
+    def open_export(self) -> sqlite3.Connection:
+        """
+        Connexion figée sur l'état actuel du journal (appel bloquant)
+
+        Les activités en attente sont écrites d'abord ; les lectures faites
+        ensuite sur cette connexion ne voient pas les écritures suivantes.
+        """
+        self.flush()
+        conn = self._connect()
+        conn.execute("BEGIN")
+        conn.execute("SELECT seq FROM activities LIMIT 1").fetchall()
+        return conn
+
+    @staticmethod
+    def export_lines(conn: sqlite3.Connection, batch_size: int = 1000) -> Iterator[List[bytes]]:
+        """Activités en lignes JSON, par lots, dans l'ordre d'insertion"""
+        cursor = conn.execute(f"SELECT seq, {', '.join(COLUMNS)} FROM activities ORDER BY seq")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield [(json.dumps(dict(row), ensure_ascii=False) + "\n").encode("utf-8") for row in rows]
+
+    def _drain(self, first: Dict[str, Any]) -> List[Dict[str, Any]]:
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                activity = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if activity is None:
+                self._queue.put(None)
+                break
+            batch.append(activity)
+        return batch
+
+    def _write(self, conn: sqlite3.Connection, batch: List[Dict[str, Any]]):
+        try:
+            with conn:
+                conn.executemany(
+                    f"INSERT INTO activities ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [tuple(activity[column] for column in COLUMNS) for activity in batch]
+                )
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+        except sqlite3.Error as e:
+            self.stats["errors"] += 1
+            logger.error(f"Écriture de {len(batch)} activité(s) impossible: {str(e)}")
+        finally:
+            with self._flushed:
+                self._pending -= len(batch)
+                self._flushed.notify_all()
+
+    def _expire(self, conn: sqlite3.Connection):
+        """Supprimer les activités trop anciennes par lots, puis rendre l'espace libéré"""
+        cutoff = time.time() - self.retention_days * 86400
+        try:
+            while True:
+                with conn:
+                    deleted = conn.execute(
+                        "DELETE FROM activities WHERE seq IN "
+                        "(SELECT seq FROM activities WHERE ts < ? ORDER BY ts LIMIT ?)",
+                        (cutoff, self.batch_size)
+                    ).rowcount
+                self.stats["expired"] += deleted
+                if deleted < self.batch_size:
+                    break
+            conn.execute("PRAGMA incremental_vacuum")
+        except sqlite3.Error as e:
+            logger.warning(f"Purge des anciennes activités impossible: {str(e)}")
+
+    def _writer(self):
+        conn = self._connect()
+        try:
+            while True:
+                try:
+                    first = self._queue.get(timeout=60)
+                except queue.Empty:
+                    first = {}
+                if first is None:
+                    break
+                if first:
+                    self._write(conn, self._drain(first))
+                    # Laisser les activités suivantes s'accumuler pour le prochain lot
+                    time.sleep(self.flush_interval)
+                if self._last_retention is None or time.monotonic() - self._last_retention >= 3600:
+                    self._last_retention = time.monotonic()
+                    self._expire(conn)
+        finally:
+            conn.close()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Attendre que les activités en file soient écrites"""
+        with self._flushed:
+            return self._flushed.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def close(self):
+        """Écrire les activités en attente et arrêter le thread d'écriture"""
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": self._pending, "recent": len(self._recent)}
+
+
+# Instance globale du journal des activités
+activity_log = ActivityLog(
+    Path("data/activity.db"),
+    legacy_path=Path("logs/admin_activity.json"),
+    retention_days=settings.ACTIVITY_RETENTION_DAYS
+)
@@ -0,0 +1,657 @@
+"""
+Sauvegardes du module TEASER
+Archive tar générée à la volée : chaque membre (en-tête puis contenu par
+morceaux) est envoyé directement dans la réponse, sans fichier temporaire
+ni archive complète en mémoire. Sauvegardes incrémentales : seuls les
+contenus absents de la sauvegarde de base sont envoyés. Restauration lue
+au fil de l'envoi, contenus vérifiés puis dossiers remplacés d'un bloc.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import tarfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from services.activity_log import ActivityLog, activity_log
+from services.media_catalog import MediaCatalog, media_catalog
+
+logger = logging.getLogger(__name__)
+
+# Version du format d'archive (manifest.json)
+FORMAT_VERSION = "2.0"
+
+# Taille des morceaux lus puis envoyés
+CHUNK_SIZE = 256 * 1024
+
+# Dossiers de médias sauvegardés (relatifs à la racine du catalogue, static/)
+MEDIA_DIRS = ("media", "selfies")
+
+# Zones comptées dans les statistiques du manifeste
+ZONES = ("left1", "left2", "left3", "center", "backgrounds")
+
+ACTIVITY_MEMBER = "activity/activities.jsonl"
+
+# Restauration : fichiers écrits en parallèle, morceaux en attente par fichier
+RESTORE_WORKERS = 4
+RESTORE_QUEUE_CHUNKS = 4
+
+# Identifiant d'une sauvegarde (AAAAMMJJ-HHMMSS, suffixe si plusieurs dans la même seconde)
+BACKUP_ID_PATTERN = re.compile(r"^\d{8}-\d{6}(?:-\d+)?$")
+
+
+def tar_header(name: str, size: int, mtime: float) -> bytes:
+    """En-tête tar (PAX : noms longs et UTF-8) d'un fichier de `size` octets"""
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(mtime)
+    info.mode = 0o644
+    return info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+
+
+def tar_padding(size: int) -> bytes:
+    """Complément du contenu d'un membre jusqu'au bloc de 512 octets suivant"""
+    return tarfile.NUL * (-size % tarfile.BLOCKSIZE)
+
+
+def tar_end(written: int) -> bytes:
+    """Deux blocs vides de fin d'archive, complétés jusqu'à un enregistrement entier"""
+    end = tarfile.NUL * (tarfile.BLOCKSIZE * 2)
+    return end + tarfile.NUL * (-(written + len(end)) % tarfile.RECORDSIZE)
+
+
+def _media_unit(rel: str) -> str:
+    """Élément remplacé d'un bloc à la restauration (une zone, tous les selfies, ou un fichier hors zone)"""
+    parts = rel.split("/")
+    return parts[0] if parts[0] == "selfies" else "/".join(parts[:2])
+
+
+def _check_media_path(rel: str) -> str:
+    path = PurePosixPath(rel)
+    if path.is_absolute() or ".." in path.parts or len(path.parts) < 2 or path.parts[0] not in MEDIA_DIRS:
+        raise ValueError(f"Chemin invalide dans le backup: {rel}")
+    return rel
+
+
+class _BlockingStream(io.RawIOBase):
+    """Flux asynchrone (corps de la requête) lu de façon bloquante depuis un thread"""
+
+    def __init__(self, stream: AsyncIterator[bytes], loop: asyncio.AbstractEventLoop):
+        self._iterator = stream.__aiter__()
+        self._loop = loop
+        self._chunk = b""
+        self._offset = 0
+        self._eof = False
+        self.received = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while self._offset >= len(self._chunk):
+            if self._eof:
+                return 0
+            try:
+                self._chunk = asyncio.run_coroutine_threadsafe(self._iterator.__anext__(), self._loop).result()
+            except StopAsyncIteration:
+                self._eof = True
+                self._chunk = b""
+            self._offset = 0
+            self.received += len(self._chunk)
+
+        size = min(len(buffer), len(self._chunk) - self._offset)
+        buffer[:size] = self._chunk[self._offset:self._offset + size]
+        self._offset += size
+        return size
+
+
+def _write_staged(path: Path, chunks: "queue.Queue[Optional[bytes]]", mtime_ns: int):
+    """Écrire un fichier à partir des morceaux reçus (None : fin), puis le synchroniser"""
+    done = False
+    try:
+        with open(path, "wb") as f:
+            while not done:
+                chunk = chunks.get()
+                done = chunk is None
+                if not done:
+                    f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+    finally:
+        # Écriture échouée : vider la file pour ne jamais bloquer le lecteur
+        while not done:
+            done = chunks.get() is None
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class BackupService:
+    """
+    Archive de sauvegarde du TEASER
+
+    Contenu, dans l'ordre :
+        manifest.json            inventaire des médias (chemin, taille, date, empreinte)
+        data/config.json, config/*.json  configuration
+        data/media_catalog.json  index du catalogue
+        activity/activities.jsonl  journal d'activité (instantané cohérent)
+        static/...               contenus des médias et selfies (optionnel)
+
+    Les empreintes viennent du catalogue : seuls les fichiers nouveaux ou
+    modifiés depuis leur dernier passage sont relus.
+
+    Chaque fichier de l'inventaire indique la sauvegarde (`backup`) qui
+    contient son contenu. Une sauvegarde incrémentale reprend celle de sa
+    base pour les contenus déjà sauvegardés (même empreinte) et n'envoie que
+    les autres ; `chain` liste les archives nécessaires à la restauration,
+    de la plus ancienne à la plus récente. Le manifeste est conservé dans
+    `manifest_dir` une fois l'archive envoyée en entier.
+    """
+
+    def __init__(self, catalog: MediaCatalog, activities: ActivityLog, config_dir: Path = Path("config"),
+                 teaser_config_path: Path = Path("data/config.json"),
+                 manifest_dir: Path = Path("data/backups/manifests")):
+        self.catalog = catalog
+        self.activities = activities
+        self.config_dir = config_dir
+        self.teaser_config_path = teaser_config_path
+        self.manifest_dir = manifest_dir
+        self._restore_lock = asyncio.Lock()
+
+    def _manifest_path(self, backup_id: str) -> Path:
+        if not BACKUP_ID_PATTERN.match(backup_id):
+            raise ValueError(f"Identifiant de backup invalide: {backup_id}")
+        return self.manifest_dir / f"{backup_id}.json"
+
+    def _ids(self) -> List[str]:
+        if not self.manifest_dir.exists():
+            return []
+        return sorted(path.stem for path in self.manifest_dir.glob("*.json") if BACKUP_ID_PATTERN.match(path.stem))
+
+    def _new_id(self) -> str:
+        backup_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+        candidate, index = backup_id, 1
+        while self._manifest_path(candidate).exists():
+            candidate = f"{backup_id}-{index}"
+            index += 1
+        return candidate
+
+    def load_manifest(self, backup_id: str) -> Optional[Dict[str, Any]]:
+        """Manifeste d'une sauvegarde terminée (None si inconnue)"""
+        path = self._manifest_path(backup_id)
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        self.manifest_dir.mkdir(parents=True, exist_ok=True)
+        path = self._manifest_path(manifest["id"])
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def list_backups(self) -> List[Dict[str, Any]]:
+        """Sauvegardes conservées, de la plus récente à la plus ancienne"""
+        backups = []
+        for backup_id in reversed(self._ids()):
+            try:
+                manifest = self.load_manifest(backup_id)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Manifeste {backup_id} illisible: {str(e)}")
+                continue
+            backups.append({key: manifest.get(key) for key in
+                            ("id", "created_at", "base", "chain", "include_media", "blobs", "stats")})
+        return backups
+
+    async def inventory(self) -> List[Dict[str, Any]]:
+        """Fichiers des dossiers sauvegardés avec leur entrée de catalogue"""
+        files = []
+        for subdir in MEDIA_DIRS:
+            for rel in sorted(await asyncio.to_thread(self.catalog.files, subdir)):
+                entry = await self.catalog.entry_async(rel)
+                if entry:
+                    files.append({"path": rel, "size": entry["size"],
+                                  "mtime_ns": entry["mtime_ns"], "hash": entry["hash"]})
+        await asyncio.to_thread(self.catalog.save)
+        return files
+
+    @staticmethod
+    def _stats(files: List[Dict[str, Any]]) -> Dict[str, Any]:
+        zones_count = {zone: 0 for zone in ZONES}
+        selfies = 0
+        for item in files:
+            parts = item["path"].split("/")
+            if parts[0] == "selfies":
+                selfies += 1
+            elif len(parts) == 3 and parts[1] in zones_count and parts[2] != ".gitkeep":
+                zones_count[parts[1]] += 1
+        return {
+            "zones_count": zones_count,
+            "selfies": selfies,
+            "files": len(files),
+            "size_mb": round(sum(item["size"] for item in files) / (1024 * 1024), 2)
+        }
+
+    def _extra_files(self) -> List[Tuple[str, Path]]:
+        """(nom dans l'archive, chemin) des fichiers de configuration et du catalogue"""
+        members = [("data/config.json", self.teaser_config_path)]
+        if self.config_dir.exists():
+            for path in sorted(self.config_dir.glob("*.json")):
+                members.append((f"config/{path.name}", path))
+        members.append(("data/media_catalog.json", self.catalog.index_path))
+        return members
+
+    def _config_target(self, name: str) -> Optional[Path]:
+        """Destination d'un fichier de configuration de l'archive (None si non restauré)"""
+        if name == "data/config.json":
+            return self.teaser_config_path
+        path = PurePosixPath(name)
+        if len(path.parts) == 2 and path.parts[0] == "config" and path.suffix == ".json":
+            return self.config_dir / path.name
+        return None
+
+    async def _file_member(self, name: str, path: Path, size: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        En-tête et contenu d'un fichier, lu par morceaux hors de la boucle
+
+        La taille annoncée (celle de l'inventaire) est respectée même si le
+        fichier change pendant l'envoi : l'archive reste lisible et la
+        différence d'empreinte est détectée à la restauration.
+        """
+        try:
+            f = await asyncio.to_thread(open, path, "rb")
+        except OSError as e:
+            logger.warning(f"{path} ignoré dans le backup: {str(e)}")
+            return
+
+        try:
+            stat = os.fstat(f.fileno())
+            if size is None:
+                size = stat.st_size
+            yield tar_header(name, size, stat.st_mtime)
+
+            remaining = size
+            while remaining > 0:
+                chunk = await asyncio.to_thread(f.read, min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    logger.warning(f"{path} raccourci pendant le backup, complété par des zéros")
+                    chunk = tarfile.NUL * remaining
+                remaining -= len(chunk)
+                yield chunk
+            yield tar_padding(size)
+        finally:
+            f.close()
+
+    async def _activity_member(self, created: float) -> AsyncIterator[bytes]:
+        """Journal d'activité en lignes JSON, lu deux fois dans le même instantané (taille puis contenu)"""
+        conn = await asyncio.to_thread(self.activities.open_export)
+        try:
+            size = await asyncio.to_thread(
+                lambda: sum(len(line) for batch in self.activities.export_lines(conn) for line in batch)
+            )
+            yield tar_header(ACTIVITY_MEMBER, size, created)
+
+            batches = self.activities.export_lines(conn)
+            while True:
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    break
+                yield b"".join(batch)
+            yield tar_padding(size)
+        finally:
+            conn.close()
+
+    async def prepare(self, include_media: bool = False, base: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Manifeste d'une nouvelle sauvegarde, avant son envoi
+
+        Args:
+            include_media: inclure les contenus des médias et selfies
+            base: sauvegarde de référence ("latest" : la plus récente, backup
+                  complet s'il n'y en a pas) ; implique include_media, seuls
+                  les contenus absents de la base sont inclus
+
+        Raises:
+            ValueError: base invalide ou introuvable
+        """
+        base_manifest = None
+        if base:
+            include_media = True
+            if base == "latest":
+                ids = await asyncio.to_thread(self._ids)
+                base = ids[-1] if ids else None
+            if base:
+                base_manifest = await asyncio.to_thread(self.load_manifest, base)
+                if base_manifest is None:
+                    raise ValueError(f"Backup de base introuvable: {base}")
+
+        backup_id = self._new_id()
+        files = await self.inventory()
+
+        # Empreinte -> sauvegarde qui contient déjà ce contenu
+        stored: Dict[str, Optional[str]] = {}
+        if base_manifest is not None:
+            stored = {item["hash"]: item["backup"] for item in base_manifest["files"] if item.get("backup")}
+
+        blobs = 0
+        blob_bytes = 0
+        for item in files:
+            if not include_media:
+                item["backup"] = None
+                continue
+            if item["hash"] not in stored:
+                stored[item["hash"]] = backup_id
+                item["blob"] = True
+                blobs += 1
+                blob_bytes += item["size"]
+            item["backup"] = stored[item["hash"]]
+
+        return {
+            "teaser_backup": True,
+            "version": FORMAT_VERSION,
+            "id": backup_id,
+            "created_at": datetime.utcnow().isoformat(),
+            "created_by": "admin",
+            "include_media": include_media,
+            "base": base_manifest["id"] if base_manifest else None,
+            "chain": sorted({item["backup"] for item in files if item["backup"]}),
+            "blobs": {"count": blobs, "size_mb": round(blob_bytes / (1024 * 1024), 2)},
+            "stats": self._stats(files),
+            "files": files
+        }
+
+    async def stream(self, manifest: Dict[str, Any]) -> AsyncIterator[bytes]:
+        """Archive tar de la sauvegarde préparée, envoyée morceau par morceau"""
+        started = time.monotonic()
+        created = time.time()
+        written = 0
+        try:
+            data = json.dumps(manifest, indent=2, ensure_ascii=False).encode("utf-8")
+            for chunk in (tar_header("manifest.json", len(data), created), data, tar_padding(len(data))):
+                written += len(chunk)
+                yield chunk
+
+            members = [self._file_member(name, path) for name, path in self._extra_files()]
+            members.append(self._activity_member(created))
+            # Un seul exemplaire de chaque contenu, rangé sous le premier chemin qui le porte
+            members.extend(self._file_member(f"static/{item['path']}", self.catalog.root / item["path"], item["size"])
+                           for item in manifest["files"] if item.get("blob"))
+
+            for member in members:
+                async for chunk in member:
+                    written += len(chunk)
+                    yield chunk
+
+            end = tar_end(written)
+            written += len(end)
+            yield end
+        except Exception as e:
+            logger.error(f"Backup {manifest['id']} interrompu après {written} octets: {str(e)}")
+            self.activities.add("error", "Erreur génération backup", str(e))
+            raise
+
+        # Archive complète : utilisable comme base des sauvegardes suivantes
+        if manifest["include_media"]:
+            await asyncio.to_thread(self._save_manifest, manifest)
+
+        logger.info(f"Backup {manifest['id']} envoyé: {written} octets en {time.monotonic() - started:.1f}s")
+        self.activities.add(
+            "backup",
+            "Backup généré avec succès",
+            f"{manifest['id']}: {manifest['blobs']['count']} contenu(s) sur {len(manifest['files'])} fichier(s), "
+            f"{round(written / (1024 * 1024), 2)} MB" + (f", base {manifest['base']}" if manifest["base"] else "")
+        )
+
+
+    def _stage_blob(self, pool: ThreadPoolExecutor, data, target: Path, item: Dict[str, Any]) -> Future:
+        """
+        Recopier un contenu de l'archive vers la zone de préparation
+
+        Lecture et empreinte dans le thread de lecture de l'archive, écriture
+        et synchronisation par un thread d'écriture : la lecture du fichier
+        suivant commence pendant que les précédents finissent d'être écrits.
+        """
+        target.parent.mkdir(parents=True, exist_ok=True)
+        chunks: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=RESTORE_QUEUE_CHUNKS)
+        future = pool.submit(_write_staged, target, chunks, item["mtime_ns"])
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            for chunk in iter(lambda: data.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                size += len(chunk)
+                chunks.put(chunk)
+        finally:
+            chunks.put(None)
+
+        if size != item["size"] or digest.hexdigest() != item["hash"]:
+            raise ValueError(f"Contenu corrompu dans le backup: {item['path']}")
+        return future
+
+    def _extract(self, fileobj, staging: Path, restore_config: bool) -> Dict[str, Any]:
+        """
+        Lire l'archive en flux et préparer les fichiers dans `staging` (appel bloquant)
+
+        Returns:
+            manifest, contenus reçus (empreinte -> chemin préparé) et
+            fichiers de configuration préparés (destination -> chemin préparé)
+        """
+        manifest = None
+        blobs: Dict[str, Dict[str, Any]] = {}
+        received: Dict[str, Path] = {}
+        configs: Dict[Path, Path] = {}
+        futures: List[Future] = []
+
+        with ThreadPoolExecutor(max_workers=RESTORE_WORKERS, thread_name_prefix="backup-restore") as pool:
+            try:
+                with tarfile.open(fileobj=fileobj, mode="r|") as tar:
+                    for member in tar:
+                        if manifest is None:
+                            if member.name != "manifest.json" or not member.isfile():
+                                raise ValueError("Archive invalide : manifest.json attendu en tête")
+                            manifest = json.load(tar.extractfile(member))
+                            if not manifest.get("teaser_backup") or "files" not in manifest:
+                                raise ValueError("Archive invalide : ce n'est pas un backup du TEASER")
+                            for item in manifest["files"]:
+                                _check_media_path(item["path"])
+                                if item.get("blob"):
+                                    blobs[f"static/{item['path']}"] = item
+                            continue
+                        if not member.isfile():
+                            continue
+
+                        item = blobs.get(member.name)
+                        if item is not None:
+                            target = staging / item["path"]
+                            futures.append(self._stage_blob(pool, tar.extractfile(member), target, item))
+                            received[item["hash"]] = target
+                        elif restore_config and self._config_target(member.name) is not None:
+                            target = staging / ".config" / member.name
+                            target.parent.mkdir(parents=True, exist_ok=True)
+                            with open(target, "wb") as f:
+                                shutil.copyfileobj(tar.extractfile(member), f)
+                            configs[self._config_target(member.name)] = target
+            except tarfile.TarError as e:
+                raise ValueError(f"Archive illisible: {str(e)}")
+            finally:
+                # Attendre les écritures en cours avant de rendre la main (et de nettoyer)
+                for future in futures:
+                    future.exception()
+
+        for future in futures:
+            future.result()
+        if manifest is None:
+            raise ValueError("Archive vide")
+        return {"manifest": manifest, "received": received, "configs": configs}
+
+    def _assemble(self, manifest: Dict[str, Any], received: Dict[str, Path], staging: Path,
+                  local: Dict[str, str]) -> Set[str]:
+        """
+        Compléter la zone de préparation avec les contenus déjà présents (appel bloquant)
+
+        Un fichier dont le contenu n'est pas dans l'archive (copie, ou backup
+        incrémental) est repris du fichier préparé ou du fichier local de même
+        empreinte, par lien physique quand c'est possible.
+
+        Returns:
+            Dossiers (et fichiers hors zone) à remplacer
+        """
+        units = {f"media/{zone}" for zone in ZONES} | {"selfies"}
+        # Fichiers directement sous media/ absents du backup : retirés au remplacement
+        media_root = self.catalog.root / "media"
+        if media_root.is_dir():
+            with os.scandir(media_root) as it:
+                units.update(f"media/{item.name}" for item in it if item.is_file(follow_symlinks=False))
+        missing = []
+        for item in manifest["files"]:
+            units.add(_media_unit(item["path"]))
+            target = staging / item["path"]
+            if target.exists():
+                continue
+
+            source = received.get(item["hash"])
+            if source is None and item["hash"] in local and self.catalog.lookup(local[item["hash"]]):
+                source = self.catalog.root / local[item["hash"]]
+            if source is None:
+                missing.append(item)
+                continue
+
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copyfile(source, target)
+            os.utime(target, ns=(item["mtime_ns"], item["mtime_ns"]))
+
+        if missing:
+            needed = sorted({item["backup"] for item in missing if item.get("backup")})
+            raise ValueError(
+                f"{len(missing)} contenu(s) absent(s) de l'archive et du disque"
+                + (f" : restaurer d'abord {', '.join(needed)}" if needed else "")
+            )
+        return units
+
+    def _swap(self, staging: Path, units: Set[str], configs: Dict[Path, Path]):
+        """
+        Mettre en place les éléments préparés (un renommage chacun) et la configuration
+
+        L'élément en place est d'abord mis de côté dans `staging` ; à la
+        moindre erreur, tout ce qui a déjà été remplacé est remis en place.
+        """
+        pairs = [(self.catalog.root / unit, staging / unit) for unit in sorted(units)]
+        pairs += list(configs.items())
+
+        done = []
+        try:
+            for index, (current, prepared) in enumerate(pairs):
+                if not prepared.exists() and not current.is_file():
+                    # Zone vide dans le backup
+                    prepared.mkdir(parents=True, exist_ok=True)
+                previous = staging / ".previous" / str(index)
+                existed = current.exists()
+                if existed:
+                    previous.parent.mkdir(parents=True, exist_ok=True)
+                    os.rename(current, previous)
+                installed = False
+                try:
+                    # Préparé absent : fichier hors zone retiré depuis le backup
+                    if prepared.exists():
+                        current.parent.mkdir(parents=True, exist_ok=True)
+                        os.rename(prepared, current)
+                        installed = True
+                except OSError:
+                    if existed:
+                        os.rename(previous, current)
+                    raise
+                done.append((current, prepared, previous, existed, installed))
+        except OSError:
+            for current, prepared, previous, existed, installed in reversed(done):
+                if installed:
+                    os.rename(current, prepared)
+                if existed:
+                    os.rename(previous, current)
+            raise
+
+    async def restore(self, stream: AsyncIterator[bytes], restore_config: bool = True) -> Dict[str, Any]:
+        """
+        Restaurer une archive de backup reçue en flux
+
+        Les médias sont préparés à côté du dossier static/ (même système de
+        fichiers, hors des fichiers servis) et vérifiés par empreinte pendant
+        la lecture ; rien n'est remplacé si l'archive est incomplète ou
+        corrompue. Les zones et les selfies sont ensuite remplacés dossier par
+        dossier, et le catalogue mis à jour une seule fois à partir des
+        empreintes vérifiées.
+
+        Raises:
+            RuntimeError: une restauration est déjà en cours
+            ValueError: archive invalide, corrompue ou incomplète
+            OSError: écriture ou remplacement impossible (rien n'est remplacé)
+        """
+        if self._restore_lock.locked():
+            raise RuntimeError("Une restauration est déjà en cours")
+
+        async with self._restore_lock:
+            started = time.monotonic()
+            # Restes d'une restauration interrompue (arrêt du service)
+            staging_prefix = f".{self.catalog.root.name}-restore-"
+            leftovers = await asyncio.to_thread(lambda: list(self.catalog.root.parent.glob(f"{staging_prefix}*")))
+            for leftover in leftovers:
+                await asyncio.to_thread(shutil.rmtree, leftover, True)
+
+            staging = self.catalog.root.parent / f"{staging_prefix}{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+            reader = _BlockingStream(stream, asyncio.get_running_loop())
+            try:
+                extracted = await asyncio.to_thread(
+                    self._extract, io.BufferedReader(reader, CHUNK_SIZE), staging, restore_config
+                )
+                manifest = extracted["manifest"]
+                # Backup sans médias : configuration seule, médias en place conservés
+                units: Set[str] = set()
+                if manifest.get("include_media"):
+                    units = await asyncio.to_thread(
+                        self._assemble, manifest, extracted["received"], staging, self.catalog.paths_by_hash()
+                    )
+                await asyncio.to_thread(self._swap, staging, units, extracted["configs"])
+            except Exception as e:
+                logger.error(f"Restauration interrompue après {reader.received} octets: {str(e)}")
+                self.activities.add("error", "Erreur restauration backup", str(e))
+                raise
+            finally:
+                await asyncio.to_thread(shutil.rmtree, staging, True)
+
+            if units:
+                await self.catalog.replace(sorted(units), {item["path"]: item["hash"] for item in manifest["files"]})
+
+        result = {
+            "id": manifest.get("id"),
+            "files": len(manifest["files"]),
+            "media": bool(units),
+            "received": len(extracted["received"]),
+            "config": sorted(str(path) for path in extracted["configs"]),
+            "zones": sorted(units),
+            "received_mb": round(reader.received / (1024 * 1024), 2),
+            "duration_s": round(time.monotonic() - started, 1)
+        }
+        logger.info(f"Backup {result['id']} restauré: {result['files']} fichier(s) en {result['duration_s']}s")
+        self.activities.add(
+            "backup",
+            "Backup restauré",
+            f"{result['id']}: {result['files']} fichier(s), {result['received']} contenu(s) reçu(s)"
+        )
+        return result
+
+
+# Instance globale du service de sauvegarde
+backup_service = BackupService(media_catalog, activity_log)
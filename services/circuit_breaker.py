@@ -0,0 +1,177 @@
+"""
+Disjoncteurs et dernières valeurs connues des APIs externes
+Évite d'attendre le timeout d'un upstream en panne et sert la dernière réponse réussie
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    """Appel refusé car le disjoncteur de l'upstream est ouvert"""
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur par upstream
+
+    - fermé : les appels passent, les échecs consécutifs sont comptés
+    - ouvert : après `failure_threshold` échecs, les appels échouent immédiatement
+    - semi-ouvert : après `recovery_timeout` secondes, un seul appel d'essai passe ;
+      son succès referme le disjoncteur, son échec le rouvre
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 3, recovery_timeout: float = 60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_progress = False
+        self.last_error: Optional[str] = None
+
+        breakers[name] = self
+
+    def _before_call(self):
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_timeout:
+                raise CircuitOpenError(f"Disjoncteur {self.name} ouvert")
+            self.state = self.HALF_OPEN
+            logger.info(f"Disjoncteur {self.name} semi-ouvert, appel d'essai")
+
+        if self.state == self.HALF_OPEN:
+            if self.trial_in_progress:
+                raise CircuitOpenError(f"Disjoncteur {self.name} en cours d'essai")
+            self.trial_in_progress = True
+
+    def _on_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"Disjoncteur {self.name} refermé")
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_progress = False
+        self.last_error = None
+
+    def _on_failure(self, error: Exception):
+        self.failures += 1
+        self.last_error = str(error)
+        self.trial_in_progress = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Disjoncteur {self.name} ouvert après {self.failures} échec(s): {error}")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Exécuter un appel upstream à travers le disjoncteur"""
+        self._before_call()
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException as e:
+            # Une annulation (budget dépassé) ne doit pas bloquer l'essai en cours
+            if isinstance(e, Exception):
+                self._on_failure(e)
+            else:
+                self.trial_in_progress = False
+            raise
+        self._on_success()
+        return result
+
+    def status(self) -> Dict[str, Any]:
+        """État du disjoncteur pour l'admin"""
+        retry_in = None
+        if self.state == self.OPEN:
+            retry_in = max(0, round(self.recovery_timeout - (time.monotonic() - self.opened_at), 1))
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in": retry_in,
+            "last_error": self.last_error
+        }
+
+
+class LastGoodStore:
+    """Dernières réponses réussies par upstream et par clé, persistées sur disque"""
+
+    def __init__(self, path: Path, max_entries: int = 50, flush_interval: float = 10):
+        self.path = path
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+
+        self._data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._dirty = False
+        self._last_flush = 0.0
+        self._load()
+
+    def _load(self):
+        try:
+            if self.path.exists():
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+                logger.info(f"Dernières valeurs connues chargées depuis {self.path}")
+        except Exception as e:
+            logger.warning(f"Lecture {self.path} impossible: {str(e)}")
+            self._data = {}
+
+    def get(self, upstream: str, key: str) -> Optional[Any]:
+        """Dernière valeur réussie (ou None)"""
+        entry = self._data.get(upstream, {}).get(key)
+        return entry["payload"] if entry else None
+
+    def put(self, upstream: str, key: str, payload: Any):
+        """Enregistrer une réponse réussie"""
+        entries = self._data.setdefault(upstream, {})
+        entries[key] = {"payload": payload, "saved_at": time.time()}
+
+        # Borner le nombre de clés par upstream (les plus anciennes partent)
+        if len(entries) > self.max_entries:
+            oldest = sorted(entries, key=lambda k: entries[k]["saved_at"])
+            for old_key in oldest[:len(entries) - self.max_entries]:
+                del entries[old_key]
+
+        self._dirty = True
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Écrire le store sur disque (écriture atomique)"""
+        if not self._dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            self._last_flush = time.monotonic()
+        except Exception as e:
+            logger.warning(f"Écriture {self.path} impossible: {str(e)}")
+
+    def status(self) -> Dict[str, Any]:
+        """Âge des dernières valeurs par upstream"""
+        now = time.time()
+        return {
+            upstream: {key: round(now - entry["saved_at"]) for key, entry in entries.items()}
+            for upstream, entries in self._data.items()
+        }
+
+
+# Registre des disjoncteurs (rempli à la création de chaque disjoncteur)
+breakers: Dict[str, CircuitBreaker] = {}
+
+# Instance globale des dernières valeurs connues
+last_good_store = LastGoodStore(Path("data/last_good.json"))
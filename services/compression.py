@@ -0,0 +1,237 @@
+"""
+Compression des réponses du module TEASER
+Négociation gzip / brotli, compression à la volée des réponses dynamiques
+et variantes précompressées des corps mis en cache et des assets
+"""
+
+import gzip
+import logging
+import os
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli optionnel : gzip uniquement
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# En dessous de cette taille, la compression ne vaut pas son coût
+MINIMUM_SIZE = 1024
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+COMPRESSIBLE_TYPES = {
+    "text/html", "text/css", "text/plain", "text/javascript",
+    "application/javascript", "application/json", "application/xml", "image/svg+xml"
+}
+
+# Assets précompressés une fois (fichiers .br / .gz à côté de l'original)
+PRECOMPRESSED_EXTENSIONS = {".js", ".css", ".svg"}
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def supported_encodings() -> tuple:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Meilleur encodage accepté par le client (br puis gzip), None sinon"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name] = quality
+
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=9 if best else GZIP_LEVEL, mtime=0)
+
+
+class EncodedBody:
+    """Corps mis en cache avec ses variantes compressées, calculées une seule fois"""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._variants: Dict[str, bytes] = {}
+
+    def get(self, encoding: Optional[str]) -> bytes:
+        if encoding is None or len(self.body) < MINIMUM_SIZE:
+            return self.body
+        variant = self._variants.get(encoding)
+        if variant is None:
+            variant = compress(self.body, encoding)
+            self._variants[encoding] = variant
+        return variant
+
+
+def encoded_response(request: Request, body: EncodedBody, media_type: str,
+                     headers: Optional[Dict[str, str]] = None) -> Response:
+    """Réponse servie depuis la variante précompressée négociée avec le client"""
+    encoding = negotiate(request.headers.get("accept-encoding", ""))
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    content = body.get(encoding)
+    if content is not body.body:
+        headers["Content-Encoding"] = encoding
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+class _StreamCompressor:
+    """Compression incrémentale, vidée à chaque morceau pour ne pas retarder le flux"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    Compression négociée des réponses HTML / JSON / texte
+
+    Les réponses déjà encodées (variantes précompressées), les médias et les
+    réponses partielles passent telles quelles. Une réponse en flux est
+    compressée morceau par morceau avec un vidage à chaque envoi.
+    """
+
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def send_start(headers: MutableHeaders):
+            # Le contenu dépend de Accept-Encoding, même envoyé non compressé
+            media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+            if media_type in COMPRESSIBLE_TYPES and "accept-encoding" not in headers.get("vary", "").lower():
+                headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] != "http.response.body":
+                # Envoi direct du fichier (zerocopy / pathsend) : en-têtes d'abord, sans compression
+                if compressor is None:
+                    passthrough = True
+                    await send_start(MutableHeaders(scope=start_message))
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = MutableHeaders(scope=start_message)
+                media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+                if ("content-encoding" in headers or "content-range" in headers
+                        or start_message["status"] in (204, 206, 304)
+                        or media_type not in COMPRESSIBLE_TYPES
+                        or (not more_body and len(body) < self.minimum_size)):
+                    passthrough = True
+                    await send_start(headers)
+                    await send(message)
+                    return
+
+                headers["Content-Encoding"] = encoding
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    # Corps compressé : autre représentation, le validateur fort ne lui correspond plus
+                    headers["ETag"] = f"W/{etag}"
+                if not more_body:
+                    body = compress(body, encoding)
+                    headers["Content-Length"] = str(len(body))
+                    await send_start(headers)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                del headers["Content-Length"]
+                compressor = _StreamCompressor(encoding)
+                await send_start(headers)
+
+            data = compressor.chunk(body) if body else b""
+            if not more_body:
+                data += compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def precompress_assets(root: Path, extensions: Iterable[str] = PRECOMPRESSED_EXTENSIONS) -> int:
+    """
+    Écrire les variantes .gz / .br des assets texte (si absentes ou périmées)
+
+    Returns:
+        Nombre de variantes écrites
+    """
+    extensions = set(extensions)
+    written = 0
+    for path in root.rglob("*"):
+        if not path.is_file() or path.suffix.lower() not in extensions:
+            continue
+        source_mtime = path.stat().st_mtime
+        for encoding in supported_encodings():
+            target = path.with_name(path.name + ENCODING_SUFFIXES[encoding])
+            if target.exists() and target.stat().st_mtime >= source_mtime:
+                continue
+            try:
+                tmp_path = target.with_name(target.name + ".tmp")
+                tmp_path.write_bytes(compress(path.read_bytes(), encoding, best=True))
+                os.replace(tmp_path, target)
+                written += 1
+            except OSError as e:
+                logger.warning(f"Précompression de {path} impossible: {str(e)}")
+    if written:
+        logger.info(f"{written} variante(s) précompressée(s) écrite(s) sous {root}")
+    return written
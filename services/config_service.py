@@ -15,12 +15,52 @@ from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Paramètres transmis à l'écran teaser (jamais les clés d'API)
+TEASER_CONFIG_KEYS = (
+    "carousel_speed", "auto_play_videos", "video_volume", "zones",
+    "weather_refresh", "tide_refresh", "music_refresh"
+)
+
+# Sections du formulaire admin (gatherAllConfig dans admin.js)
+ADMIN_CONFIG_SECTIONS = ("weather", "tide", "system", "modules")
+
+
+def flatten_admin_config(config_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aplatir la configuration envoyée par l'admin en clés système
+
+    Le formulaire envoie {weather, tide, system, modules, zones} et exprime
+    weather_refresh en minutes ; la configuration système le garde en secondes
+    (music_refresh reste en minutes des deux côtés).
+    """
+    flat: Dict[str, Any] = {}
+    for section in ADMIN_CONFIG_SECTIONS:
+        flat.update(config_data.get(section) or {})
+    if config_data.get("zones"):
+        flat["zones"] = config_data["zones"]
+
+    for key, value in list(flat.items()):
+        if value == "":
+            # Champ de formulaire laissé vide : valeur courante conservée
+            del flat[key]
+
+    if "weather_refresh" in flat:
+        try:
+            flat["weather_refresh"] = float(flat["weather_refresh"]) * 60
+        except (TypeError, ValueError):
+            logger.warning(f"Intervalle météo invalide: {flat['weather_refresh']}")
+            del flat["weather_refresh"]
+    return flat
+
+
 class ConfigService:
     """Service de gestion de la configuration TEASER"""
     
     def __init__(self):
         self.config_file_path = Path("data/config.json")
+        self.system_config_path = Path("config/system_config.json")
         self.backup_dir = Path("data/backups")
+        self._teaser_config = None
         
         # Configuration par défaut
         self.default_config = {
@@ -127,6 +167,39 @@ class ConfigService:
             logger.error(f"Erreur récupération configuration: {str(e)}")
             return self.default_config.copy()
     
+    def get_system_config(self) -> Dict[str, Any]:
+        """
+        Récupérer la configuration système enregistrée par l'admin
+        
+        Returns:
+            Configuration par défaut fusionnée avec config/system_config.json
+        """
+        config = self.default_config.copy()
+        try:
+            if self.system_config_path.exists():
+                with open(self.system_config_path, 'r', encoding='utf-8') as f:
+                    config.update(json.load(f))
+        except Exception as e:
+            logger.error(f"Erreur lecture config système: {str(e)}")
+        return config
+    
+    def get_teaser_config(self) -> Dict[str, Any]:
+        """
+        Configuration utile à l'écran teaser
+        
+        Returns:
+            Sous-ensemble de la config système, relu uniquement quand le fichier change
+        """
+        try:
+            mtime = self.system_config_path.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        
+        if self._teaser_config is None or self._teaser_config[0] != mtime:
+            config = self.get_system_config()
+            self._teaser_config = (mtime, {key: config.get(key) for key in TEASER_CONFIG_KEYS})
+        return self._teaser_config[1]
+    
     async def _get_config_from_db(self, db: Session) -> Dict[str, Any]:
         """Récupérer la configuration depuis la base de données"""
         try:
@@ -0,0 +1,136 @@
+"""
+Cache local des pochettes d'album pour la carte "En cours"
+Téléchargement unique, redimensionnement et éviction LRU bornée en octets
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+import aiohttp
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Délai maximum de téléchargement d'une pochette (secondes)
+COVER_TIMEOUT = aiohttp.ClientTimeout(total=5)
+
+
+class CoverCache:
+    """Pochettes redimensionnées stockées sous /static/covers"""
+
+    def __init__(self, cache_dir: Path, url_prefix: str, max_bytes: int = 20 * 1024 * 1024,
+                 size: Tuple[int, int] = (160, 160)):
+        self.cache_dir = cache_dir
+        self.url_prefix = url_prefix
+        self.max_bytes = max_bytes
+        self.size = size
+
+        # nom de fichier -> taille, du moins au plus récemment utilisé
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._inflight = {}
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Reconstruire l'ordre LRU depuis les dates de modification"""
+        files = sorted(self.cache_dir.glob("*.jpg"), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            size = path.stat().st_size
+            self._entries[path.name] = size
+            self._total_bytes += size
+
+    def _filename(self, remote_url: str) -> str:
+        return hashlib.sha1(remote_url.encode("utf-8")).hexdigest()[:20] + ".jpg"
+
+    def _touch(self, filename: str):
+        """Marquer une pochette comme récemment utilisée"""
+        self._entries.move_to_end(filename)
+        try:
+            os.utime(self.cache_dir / filename)
+        except OSError:
+            pass
+
+    def _resize(self, content: bytes) -> bytes:
+        with Image.open(io.BytesIO(content)) as img:
+            img = ImageOps.fit(img.convert("RGB"), self.size, Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            img.save(buffer, "JPEG", quality=85, optimize=True)
+            return buffer.getvalue()
+
+    def _write(self, filename: str, content: bytes):
+        path = self.cache_dir / filename
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _evict(self):
+        """Supprimer les pochettes les moins récemment utilisées au-delà du budget"""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            filename, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                (self.cache_dir / filename).unlink()
+                logger.debug(f"Pochette évincée: {filename}")
+            except OSError:
+                pass
+
+    async def _download(self, remote_url: str, filename: str) -> Optional[str]:
+        try:
+            async with aiohttp.ClientSession(timeout=COVER_TIMEOUT) as session:
+                async with session.get(remote_url) as response:
+                    if response.status != 200:
+                        raise RuntimeError(f"Status HTTP {response.status}")
+                    content = await response.read()
+
+            resized = await asyncio.to_thread(self._resize, content)
+            await asyncio.to_thread(self._write, filename, resized)
+        except Exception as e:
+            logger.warning(f"Pochette {remote_url} non mise en cache: {str(e)}")
+            return None
+
+        self._entries[filename] = len(resized)
+        self._total_bytes += len(resized)
+        self._evict()
+        return f"{self.url_prefix}/{filename}"
+
+    async def localize(self, remote_url: str) -> Optional[str]:
+        """
+        URL locale de la pochette, téléchargée et redimensionnée si besoin
+
+        Returns:
+            Chemin /static/covers/... ou None si la pochette est indisponible
+        """
+        if not remote_url:
+            return None
+
+        filename = self._filename(remote_url)
+        if filename in self._entries:
+            self._touch(filename)
+            return f"{self.url_prefix}/{filename}"
+
+        task = self._inflight.get(filename)
+        if task is None:
+            task = asyncio.ensure_future(self._download(remote_url, filename))
+            self._inflight[filename] = task
+            task.add_done_callback(lambda t: self._inflight.pop(filename, None))
+        return await asyncio.shield(task)
+
+    def get_stats(self):
+        return {
+            "files": len(self._entries),
+            "size_mb": round(self._total_bytes / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2)
+        }
+
+
+# Instance globale du cache de pochettes
+cover_cache = CoverCache(Path("static/covers"), "/static/covers")
@@ -15,6 +15,8 @@ import json
 from PIL import Image
 import aiofiles
 
+from services.media_catalog import media_catalog
+
 logger = logging.getLogger(__name__)
 
 class FileManager:
@@ -36,6 +38,9 @@ class FileManager:
         self.max_video_size = 100 * 1024 * 1024  # 100MB
         self.max_audio_size = 20 * 1024 * 1024   # 20MB
         
+        # Playlists des zones, recalculées quand le contenu du dossier change
+        self._playlist_cache: Dict[str, Tuple[int, List[Dict[str, Any]]]] = {}
+        
         # Créer les dossiers nécessaires
         self._ensure_directories()
     
@@ -446,6 +451,78 @@ class FileManager:
             logger.error(f"Erreur lecture zone {zone}: {str(e)}")
             return []
     
+    async def get_zone_playlist(self, zone: str) -> List[Dict[str, Any]]:
+        """
+        Playlist d'une zone telle qu'affichée par le teaser
+        
+        Args:
+            zone: Zone à lister (left1, left2, left3, center)
+            
+        Returns:
+            Médias (URL empreintée dès que l'empreinte est connue) et URLs distantes de la zone,
+            plus récents d'abord
+        """
+        zone_path = self.base_media_path / zone
+        try:
+            dir_mtime = zone_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+        
+        # Un ajout ou une suppression de fichier change la date du dossier
+        cached = self._playlist_cache.get(zone)
+        if cached and cached[0] == dir_mtime:
+            return cached[1]
+        
+        files = []
+        for file_path in zone_path.iterdir():
+            if not file_path.is_file():
+                continue
+            suffix = file_path.suffix.lower()
+            stat = file_path.stat()
+            
+            # Médias classiques
+            if suffix in ['.jpg', '.jpeg', '.png', '.gif', '.mp4', '.webm', '.webp', '.mov']:
+                file_type = "image" if suffix in ['.jpg', '.jpeg', '.png', '.gif', '.webp'] else "video"
+                files.append({
+                    "id": hash(file_path.name),
+                    "filename": file_path.name,
+                    "src": media_catalog.url_cached(f"media/{zone}/{file_path.name}", stat),
+                    "path": f"/static/media/{zone}/{file_path.name}",
+                    "size": stat.st_size,
+                    "type": file_type,
+                    "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat()
+                })
+            
+            # URLs distantes (fichiers .json)
+            elif suffix == '.json' and file_path.name.startswith('url_'):
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        url_data = json.load(f)
+                    
+                    files.append({
+                        "id": hash(file_path.name),
+                        "filename": url_data.get("title", "URL distante"),
+                        "src": url_data.get("url", ""),
+                        "path": url_data.get("url", ""),
+                        "size": stat.st_size,
+                        "type": "url",
+                        "url": url_data.get("url", ""),
+                        "created_at": url_data.get("created_at", datetime.fromtimestamp(stat.st_ctime).isoformat())
+                    })
+                except Exception:
+                    continue
+        
+        # Trier par date de création : plus récent d'abord
+        files.sort(key=lambda x: x['created_at'], reverse=True)
+        self._playlist_cache[zone] = (dir_mtime, files)
+        return files
+    
+    def invalidate_playlist(self, rel: str):
+        """Oublier la playlist d'une zone dont un média a changé (empreinte calculée, fichier remplacé)"""
+        parts = rel.split("/")
+        if len(parts) == 3 and parts[0] == "media":
+            self._playlist_cache.pop(parts[1], None)
+    
     def _get_file_type_from_extension(self, extension: str) -> str:
         """Déterminer le type depuis l'extension"""
         extension = extension.lower()
@@ -688,27 +765,7 @@ class FileManager:
         except Exception as e:
             logger.error(f"Erreur sauvegarde média: {str(e)}")
             return False
-        
-    async def cleanup_old_files(self, days: int = 30) -> int:
-        """Supprimer les fichiers de plus de X jours"""
-        deleted_count = 0
-        cutoff_date = datetime.now() - timedelta(days=days)
-
-        # Nettoyer les medias
-        zones = ['left1', 'left2', 'left3', 'center']
-        for zone in zones:
-            zone_path = Path(f"static/media{zone}")
-            if zone_path.exists():
-                for file_path in zone_path.iterdir():
-                    if file_path.is_file():
-                        file_date = datetime.fromtimestamp(file_path.stat().st_ctime)
-                        if file_date < cutoff_date:
-                            try:
-                                os.remove(file_path)
-                                deleted_count += 1
-                            except Exception as e:
-                                print(f"Erreur suppression: {e}")
-        return deleted_count
 
 # Instance globale du gestionnaire de fichiers
-file_manager = FileManager()
\ No newline at end of file
+file_manager = FileManager()
+media_catalog.add_listener(file_manager.invalidate_playlist)
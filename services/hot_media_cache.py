@@ -0,0 +1,214 @@
+"""
+Cache mémoire des médias les plus servis par le module TEASER
+Octets et en-têtes précalculés, LRU borné en octets, invalidé par le catalogue
+"""
+
+import asyncio
+import logging
+import mimetypes
+import os
+import time
+from collections import OrderedDict
+from email.utils import formatdate
+from hashlib import md5
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi.responses import Response
+from starlette.datastructures import Headers
+
+from config import settings
+from services.media_catalog import media_catalog
+from services.media_response import RangeResponseMixin
+
+logger = logging.getLogger(__name__)
+
+# Délai après lequel une entrée est revérifiée sur disque (secondes)
+REVALIDATE_INTERVAL = 1.0
+
+
+class HotMediaEntry:
+    """Contenu d'un média et en-têtes de réponse calculés une fois"""
+
+    __slots__ = ("body", "size", "mtime_ns", "raw_headers", "checked_at")
+
+    def __init__(self, body: bytes, stat: os.stat_result, media_type: str):
+        self.body = body
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self.checked_at = time.monotonic()
+
+        # Mêmes ETag / Last-Modified que FileResponse pour que les caches navigateur restent valides
+        etag = md5(f"{stat.st_mtime}-{stat.st_size}".encode()).hexdigest()
+        self.raw_headers: List[Tuple[bytes, bytes]] = [
+            (b"content-type", media_type.encode("latin-1")),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"last-modified", formatdate(stat.st_mtime, usegmt=True).encode("latin-1")),
+            (b"etag", f'"{etag}"'.encode("latin-1")),
+        ]
+
+
+class MemoryMediaResponse(RangeResponseMixin, Response):
+    """Média servi depuis la mémoire, en entier ou par plages"""
+
+    def __init__(self, entry: HotMediaEntry, request_headers: Headers, method: str):
+        self.status_code = 200
+        self.background = None
+        self.body = entry.body
+        self.raw_headers = list(entry.raw_headers)
+        self.send_header_only = method.upper() == "HEAD"
+        self.setup_ranges(len(entry.body), request_headers)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.send_header_only or not self.parts:
+            body = b""
+        elif self.parts == [(b"", 0, len(self.body))]:
+            body = self.body
+        else:
+            view = memoryview(self.body)
+            body = b"".join(prefix + view[start:start + length] for prefix, start, length in self.parts)
+            body += self.trailer
+        await send({"type": "http.response.body", "body": body, "more_body": False})
+
+
+class HotMediaCache:
+    """
+    LRU des médias chauds (chemin relatif à static/ -> contenu et en-têtes)
+
+    Seuls les fichiers sous `max_file_bytes` sont admis ; une entrée est
+    retirée quand le catalogue signale un changement, ou quand une vérification
+    périodique (taille / date) constate que le fichier a changé.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, max_file_bytes: int, prefixes: Tuple[str, ...] = ("media/",)):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.prefixes = prefixes
+
+        self._entries: "OrderedDict[str, HotMediaEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"hits": 0, "misses": 0, "bypass": 0, "evictions": 0, "invalidations": 0}
+
+    def accepts(self, rel: str) -> bool:
+        return rel.startswith(self.prefixes)
+
+    def invalidate(self, rel: str):
+        """Retirer un média (fichier modifié ou supprimé)"""
+        entry = self._entries.pop(rel, None)
+        if entry is not None:
+            self._total_bytes -= len(entry.body)
+            self.stats["invalidations"] += 1
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._total_bytes -= len(entry.body)
+            self.stats["evictions"] += 1
+
+    def _fresh(self, rel: str, entry: HotMediaEntry) -> bool:
+        now = time.monotonic()
+        if now - entry.checked_at < REVALIDATE_INTERVAL:
+            return True
+        try:
+            stat = (self.root / rel).stat()
+        except OSError:
+            return False
+        if stat.st_size != entry.size or stat.st_mtime_ns != entry.mtime_ns:
+            return False
+        entry.checked_at = now
+        return True
+
+    def get(self, rel: str) -> Optional[HotMediaEntry]:
+        """Entrée en mémoire et à jour, ou None (défaut de cache)"""
+        entry = self._entries.get(rel)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        if not self._fresh(rel, entry):
+            self.invalidate(rel)
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(rel)
+        self.stats["hits"] += 1
+        return entry
+
+    def _read(self, rel: str) -> Tuple[Optional[bytes], os.stat_result]:
+        with open(self.root / rel, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size > self.max_file_bytes:
+                return None, stat
+            body = f.read()
+        return body, stat
+
+    async def _load(self, rel: str) -> Optional[HotMediaEntry]:
+        try:
+            body, stat = await asyncio.to_thread(self._read, rel)
+        except OSError:
+            return None
+        if body is None:
+            self.stats["bypass"] += 1
+            return None
+        if len(body) != stat.st_size:
+            # Fichier en cours d'écriture : ne pas mettre en cache une version partielle
+            return None
+        media_type = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+        entry = HotMediaEntry(body, stat, media_type)
+        self.invalidate(rel)
+        self._entries[rel] = entry
+        self._total_bytes += len(body)
+        self._evict()
+        return entry
+
+    async def load(self, rel: str) -> Optional[HotMediaEntry]:
+        """Charger un média en mémoire (None s'il est trop gros ou illisible)"""
+        task = self._inflight.get(rel)
+        if task is None:
+            task = asyncio.ensure_future(self._load(rel))
+            self._inflight[rel] = task
+            task.add_done_callback(lambda t: self._inflight.pop(rel, None))
+        return await asyncio.shield(task)
+
+    def admit(self, rel: str, size: int):
+        """Après un défaut de cache : charger le média en tâche de fond s'il tient dans le budget"""
+        if size > self.max_file_bytes:
+            self.stats["bypass"] += 1
+            return
+        if rel not in self._inflight:
+            task = asyncio.ensure_future(self.load(rel))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def prewarm(self, paths: Iterable[str]) -> int:
+        """Précharger des médias (ex. playlists des zones) dans la limite du budget"""
+        loaded = 0
+        for rel in paths:
+            if self._total_bytes >= self.max_bytes:
+                break
+            if rel in self._entries or not self.accepts(rel):
+                continue
+            if await self.load(rel) is not None:
+                loaded += 1
+        if loaded:
+            logger.info(f"{loaded} média(s) préchargé(s) en mémoire")
+        return loaded
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "size_mb": round(self._total_bytes / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "hit_ratio": round(self.stats["hits"] / lookups, 3) if lookups else None
+        }
+
+
+# Instance globale du cache mémoire des médias
+hot_media_cache = HotMediaCache(
+    Path("static"),
+    max_bytes=settings.HOT_MEDIA_CACHE_MB * 1024 * 1024,
+    max_file_bytes=settings.HOT_MEDIA_MAX_FILE_MB * 1024 * 1024
+)
+media_catalog.add_listener(hot_media_cache.invalidate)
@@ -0,0 +1,243 @@
+"""
+Lecture des fichiers de log du TEASER
+Dernières lignes lues en remontant depuis la fin par blocs, pagination par
+position en octets et filtrage côté serveur : le coût dépend du nombre de
+lignes demandées, pas de la taille du fichier
+"""
+
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Taille des blocs lus en remontant le fichier
+BLOCK_SIZE = 64 * 1024
+
+# Octets parcourus au plus par requête filtrée (la suite via le curseur)
+MAX_SCAN_BYTES = 64 * 1024 * 1024
+
+# Au-delà, une ligne est tronquée (fichier sans retour à la ligne)
+MAX_LINE_BYTES = 64 * 1024
+
+MAX_LINES = 5000
+
+# Suivi en direct : retard maximal d'un client avant de sauter les lignes en trop
+MAX_FOLLOW_LAG_BYTES = 4 * 1024 * 1024
+
+# Suivis simultanés autorisés (chacun garde un fichier ouvert)
+MAX_FOLLOWERS = 8
+
+# Fins de ligne reconnues par les Server-Sent Events (un \r seul en est une)
+SSE_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+
+def decode_line(raw: bytes) -> str:
+    """Ligne décodée en UTF-8, en latin-1 si elle n'est pas valide"""
+    try:
+        return raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return raw.decode("latin-1")
+
+
+def sse_data(text: str) -> str:
+    """Champs `data:` d'un événement SSE, un par segment de la ligne"""
+    return "".join(f"data: {segment}\n" for segment in SSE_LINE_BREAK.split(text))
+
+
+def _matches(raw: bytes, needle: Optional[bytes]) -> bool:
+    return needle is None or needle in raw.lower()
+
+
+def _iter_lines_backward(f, end: int) -> Iterator[Tuple[int, bytes]]:
+    """(position de début, contenu) des lignes qui précèdent `end`, de la dernière à la première"""
+    if end > 0:
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            end -= 1
+
+    pos = end
+    buffer = b""
+    while pos > 0:
+        size = min(BLOCK_SIZE, pos)
+        pos -= size
+        f.seek(pos)
+        buffer = f.read(size) + buffer
+        lines = buffer.split(b"\n")
+        buffer = lines.pop(0)
+
+        start = pos + len(buffer) + 1
+        positioned = []
+        for line in lines:
+            positioned.append((start, line))
+            start += len(line) + 1
+        for offset, line in reversed(positioned):
+            yield offset, line[:MAX_LINE_BYTES].rstrip(b"\r")
+
+        # Ligne démesurée : seul son début est conservé (mémoire bornée)
+        buffer = buffer[:MAX_LINE_BYTES]
+
+    if buffer:
+        yield 0, buffer[:MAX_LINE_BYTES].rstrip(b"\r")
+
+
+class LogFollow:
+    """
+    Suivi d'un fichier de log pour un client, à partir d'une position
+
+    Le fichier reste ouvert : après une rotation (fichier renommé puis
+    recréé), la fin de l'ancien fichier est lue avant de passer au nouveau.
+    Un client qui prend plus de MAX_FOLLOW_LAG_BYTES de retard saute les
+    lignes en trop au lieu de les accumuler.
+    """
+
+    def __init__(self, path: Path, offset: Optional[int] = None, grep: Optional[str] = None,
+                 on_close: Optional[Callable[[], None]] = None):
+        self.path = path
+        self.offset = offset
+        self.needle = grep.lower().encode("utf-8") if grep else None
+        self._file = None
+        self._identity: Optional[Tuple[int, int]] = None
+        self._on_close = on_close
+
+    def _open(self, offset: Optional[int]) -> bool:
+        try:
+            self._file = open(self.path, "rb")
+        except OSError:
+            return False
+        stat = os.fstat(self._file.fileno())
+        self._identity = (stat.st_dev, stat.st_ino)
+        self.offset = stat.st_size if offset is None or offset > stat.st_size else offset
+        return True
+
+    def _rotated(self) -> bool:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return False
+        return (stat.st_dev, stat.st_ino) != self._identity
+
+    def poll(self, count: int = 500) -> Dict[str, Any]:
+        """
+        Nouvelles lignes complètes depuis le dernier appel
+
+        Returns:
+            lines: [(position après la ligne, texte)]
+            skipped: octets sautés (client trop lent)
+            rotated: le fichier a été remplacé ou tronqué
+        """
+        result: Dict[str, Any] = {"lines": [], "skipped": 0, "rotated": False}
+        if self._file is None and not self._open(self.offset):
+            return result
+
+        size = os.fstat(self._file.fileno()).st_size
+        if size < self.offset:
+            # Fichier tronqué sur place
+            self.offset = 0
+            result["rotated"] = True
+        elif size - self.offset > MAX_FOLLOW_LAG_BYTES:
+            skip_to = size - MAX_FOLLOW_LAG_BYTES
+            self._file.seek(skip_to)
+            skip_to += len(self._file.readline(MAX_LINE_BYTES))
+            result["skipped"] = skip_to - self.offset
+            self.offset = skip_to
+
+        self._file.seek(self.offset)
+        while len(result["lines"]) < count:
+            raw = self._file.readline(MAX_LINE_BYTES)
+            if not raw or (not raw.endswith(b"\n") and len(raw) < MAX_LINE_BYTES):
+                break
+            self.offset += len(raw)
+            raw = raw.rstrip(b"\r\n")
+            if _matches(raw, self.needle):
+                result["lines"].append((self.offset, decode_line(raw)))
+
+        if not result["lines"] and self.offset >= size and self._rotated():
+            # Ancien fichier lu jusqu'au bout : passer au nouveau depuis son début
+            self.close()
+            self._open(0)
+            result["rotated"] = True
+        return result
+
+    def close(self):
+        """Fermer le fichier et libérer la place du suivi (sans effet au second appel)"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close()
+
+
+class LogReader:
+    """Fichiers *.log d'un dossier, lus par pages de lignes"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.followers = 0
+
+    def files(self) -> List[Path]:
+        """Fichiers de log, du plus récent au plus ancien"""
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob("*.log"), key=lambda p: p.stat().st_mtime, reverse=True)
+
+    def resolve(self, name: Optional[str] = None) -> Optional[Path]:
+        """Fichier demandé (nom simple uniquement) ou le plus récent"""
+        if not name:
+            files = self.files()
+            return files[0] if files else None
+        if Path(name).name != name or not name.endswith(".log"):
+            raise ValueError(f"Nom de fichier de log invalide: {name}")
+        path = self.directory / name
+        return path if path.is_file() else None
+
+    def tail(self, path: Path, count: int = 200, before: Optional[int] = None,
+             grep: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Dernières lignes avant la position `before` (fin du fichier par défaut)
+
+        Returns:
+            lines: lignes dans l'ordre du fichier
+            next_before: curseur de la page précédente (None au début du fichier)
+            end_offset: taille du fichier lue, point de départ d'un suivi
+        """
+        count = max(1, min(count, MAX_LINES))
+        needle = grep.lower().encode("utf-8") if grep else None
+        lines: List[str] = []
+        next_before: Optional[int] = None
+        scanned = 0
+
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            end = size if before is None else max(0, min(before, size))
+            for offset, raw in _iter_lines_backward(f, end):
+                scanned += len(raw) + 1
+                if _matches(raw, needle):
+                    lines.append(decode_line(raw))
+                if len(lines) >= count or scanned >= MAX_SCAN_BYTES:
+                    next_before = offset or None
+                    break
+
+        lines.reverse()
+        return {"lines": lines, "next_before": next_before, "end_offset": size, "scanned_bytes": scanned}
+
+    def follow(self, path: Path, offset: Optional[int] = None, grep: Optional[str] = None) -> LogFollow:
+        """
+        Nouveau suivi en direct, compté jusqu'à son close()
+
+        RuntimeError si trop de suivis sont déjà ouverts
+        """
+        if self.followers >= MAX_FOLLOWERS:
+            raise RuntimeError("Trop de suivis de logs simultanés")
+        self.followers += 1
+        return LogFollow(path, offset, grep, on_close=self._unfollow)
+
+    def _unfollow(self):
+        self.followers -= 1
+
+
+# Instance globale du lecteur de logs
+log_reader = LogReader(Path("logs"))
@@ -0,0 +1,226 @@
+"""
+Journalisation du TEASER
+Les appels de log ne font que déposer l'enregistrement dans une file : mise en
+forme (lignes JSON) et écriture dans logs/teaser.log sont faites par un thread
+dédié. Rotation par taille et par jour, niveaux par module modifiables à chaud.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import time
+from datetime import datetime
+from logging.handlers import BaseRotatingHandler, QueueHandler, QueueListener
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config import settings
+
+# Attributs standard d'un LogRecord (le reste est repris tel quel dans la ligne JSON)
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+# Niveaux modifiables depuis l'admin, conservés entre redémarrages
+LEVELS_PATH = Path("data/log_levels.json")
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement (ts, level, logger, msg et champs `extra`)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SizedTimedRotatingFileHandler(BaseRotatingHandler):
+    """
+    Fichier renommé en teaser-AAAAMMJJ-HHMMSS.log à minuit ou au-delà de `max_bytes`
+
+    Les fichiers archivés gardent l'extension .log (lisibles depuis l'admin) ;
+    seuls les `backup_count` plus récents sont conservés.
+    """
+
+    def __init__(self, filename: Path, max_bytes: int, backup_count: int = 14):
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        super().__init__(str(filename), "a", encoding="utf-8", delay=False)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rollover_at = self._next_midnight()
+
+    @staticmethod
+    def _next_midnight() -> float:
+        now = datetime.now()
+        return datetime(now.year, now.month, now.day).timestamp() + 86400
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if time.time() >= self.rollover_at:
+            return True
+        return self.max_bytes > 0 and self.stream is not None and self.stream.tell() >= self.max_bytes
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        base = Path(self.baseFilename)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        target = base.with_name(f"{base.stem}-{stamp}{base.suffix}")
+        index = 1
+        while target.exists():
+            target = base.with_name(f"{base.stem}-{stamp}-{index}{base.suffix}")
+            index += 1
+        if base.exists() and base.stat().st_size > 0:
+            os.rename(base, target)
+
+        archives = sorted(base.parent.glob(f"{base.stem}-*{base.suffix}"), key=lambda p: (p.stat().st_mtime, p.name))
+        for old in archives[:max(0, len(archives) - self.backup_count)]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+        self.stream = self._open()
+        self.rollover_at = self._next_midnight()
+
+
+class _FrozenQueueHandler(QueueHandler):
+    """Dépose l'enregistrement dans la file sans le mettre en forme (fait par le listener)"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Message figé tout de suite : les arguments peuvent changer d'ici l'écriture
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _check_level(level: Any) -> str:
+    """Nom de niveau normalisé ("debug" -> "DEBUG") ; ValueError si inconnu"""
+    if not isinstance(level, str) or not isinstance(logging.getLevelName(level.upper()), int):
+        raise ValueError(f"Niveau de log inconnu: {level!r}")
+    return level.upper()
+
+
+def _load_levels() -> Dict[str, str]:
+    """Niveaux conservés ; une entrée invalide (fichier édité à la main, ancienne version) est ignorée"""
+    try:
+        if not LEVELS_PATH.exists():
+            return {}
+        with open(LEVELS_PATH, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if not isinstance(saved, dict):
+            raise ValueError("objet JSON attendu")
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Lecture de {LEVELS_PATH} impossible: {str(e)}")
+        return {}
+
+    levels = {}
+    for name, level in saved.items():
+        try:
+            levels[name] = _check_level(level)
+        except ValueError as e:
+            logging.getLogger(__name__).warning(f"Niveau de '{name or 'root'}' ignoré dans {LEVELS_PATH}: {str(e)}")
+    return levels
+
+
+def _save_levels(levels: Dict[str, str]):
+    try:
+        LEVELS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = LEVELS_PATH.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(levels, f, indent=2)
+        os.replace(tmp_path, LEVELS_PATH)
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Écriture de {LEVELS_PATH} impossible: {str(e)}")
+
+
+def setup_logging(log_dir: Path = Path("logs")):
+    """Brancher tous les loggers (uvicorn compris) sur la file et démarrer le thread d'écriture"""
+    global _listener
+    if _listener is not None:
+        return
+
+    file_handler = SizedTimedRotatingFileHandler(
+        log_dir / "teaser.log",
+        max_bytes=settings.LOG_MAX_MB * 1024 * 1024,
+        backup_count=settings.LOG_BACKUP_COUNT
+    )
+    file_handler.setFormatter(JsonFormatter())
+
+    console_handler = logging.StreamHandler(sys.stderr)
+    console_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_FrozenQueueHandler(log_queue))
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    # uvicorn : mêmes fichiers et même file plutôt que ses propres handlers synchrones
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    for name, level in _load_levels().items():
+        logging.getLogger(name or None).setLevel(level)
+
+    _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Écrire les enregistrements en attente et arrêter le thread d'écriture"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_levels() -> Dict[str, Any]:
+    """Niveau effectif de la racine et des loggers configurés"""
+    levels = {"": logging.getLevelName(logging.getLogger().level)}
+    for name, item in sorted(logging.Logger.manager.loggerDict.items()):
+        if isinstance(item, logging.Logger) and item.level != logging.NOTSET:
+            levels[name] = logging.getLevelName(item.level)
+    return levels
+
+
+def set_level(name: str, level: Optional[str]):
+    """
+    Changer le niveau d'un module ("" pour la racine) ; None revient au niveau hérité
+
+    Raises:
+        ValueError: nom de module ou niveau invalide
+    """
+    if not isinstance(name, str):
+        raise ValueError(f"Nom de module invalide: {name!r}")
+    logger = logging.getLogger(name or None)
+    levels = _load_levels()
+    if level is None:
+        if not name:
+            raise ValueError("Le niveau racine ne peut pas être retiré")
+        logger.setLevel(logging.NOTSET)
+        levels.pop(name, None)
+    else:
+        level = _check_level(level)
+        logger.setLevel(level)
+        levels[name] = level
+    _save_levels(levels)
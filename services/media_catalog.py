@@ -0,0 +1,289 @@
+"""
+Catalogue des fichiers statiques du module TEASER
+Empreinte de contenu de chaque fichier, recalculée uniquement quand sa taille
+ou sa date de modification change
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import stat as stat_module
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Longueur de l'empreinte ajoutée aux URLs (?v=...)
+FINGERPRINT_LENGTH = 12
+
+# Empreintes calculées en même temps en tâche de fond (url_cached)
+BACKGROUND_HASHES = 2
+
+
+class MediaCatalog:
+    """
+    Index chemin relatif -> {size, mtime_ns, hash} des fichiers sous `root`
+
+    L'index est persisté pour ne pas relire les vidéos à chaque démarrage ;
+    une entrée dont la taille ou la date a changé est considérée inconnue
+    et son empreinte est recalculée.
+    """
+
+    def __init__(self, root: Path, index_path: Path, url_prefix: str = "/static"):
+        self.root = root
+        self.index_path = index_path
+        self.url_prefix = url_prefix
+
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._listeners: List[Callable[[str], None]] = []
+        self._hashing: Dict[str, asyncio.Task] = {}
+        self._hash_slots = asyncio.Semaphore(BACKGROUND_HASHES)
+        self._load()
+
+    def add_listener(self, callback: Callable[[str], None]):
+        """Être prévenu (chemin relatif) quand un fichier apparaît, change ou disparaît"""
+        self._listeners.append(callback)
+
+    def _notify(self, rel: str):
+        for callback in self._listeners:
+            try:
+                callback(rel)
+            except Exception as e:
+                logger.warning(f"Notification du catalogue pour {rel} échouée: {str(e)}")
+
+    def forget(self, rel: str):
+        """Retirer un fichier supprimé du catalogue"""
+        if self._entries.pop(rel, None) is not None:
+            self._dirty = True
+        self._notify(rel)
+
+    def _load(self):
+        try:
+            if self.index_path.exists():
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+        except Exception as e:
+            logger.warning(f"Lecture du catalogue {self.index_path} impossible: {str(e)}")
+            self._entries = {}
+
+    def save(self):
+        """Écrire l'index sur disque (écriture atomique, appelable depuis un thread)"""
+        if not self._dirty:
+            return
+        # Copie prise d'un coup : la boucle peut continuer à modifier l'index pendant l'écriture
+        entries = dict(self._entries)
+        self._dirty = False
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix(".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            self._dirty = True
+            logger.warning(f"Écriture du catalogue {self.index_path} impossible: {str(e)}")
+
+    def relative(self, path: str) -> str:
+        """Chemin relatif à la racine ("/static/media/a.jpg" -> "media/a.jpg")"""
+        path = path.split("?", 1)[0]
+        prefix = self.url_prefix.rstrip("/") + "/"
+        if path.startswith(prefix):
+            path = path[len(prefix):]
+        return path.lstrip("/")
+
+    def _stat(self, rel: str) -> Optional[os.stat_result]:
+        try:
+            stat = (self.root / rel).stat()
+        except OSError:
+            return None
+        return stat if stat_module.S_ISREG(stat.st_mode) else None
+
+    def _hash_file(self, path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _known(self, rel: str, stat: os.stat_result) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(rel)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry
+        return None
+
+    def _store(self, rel: str, stat: os.stat_result, file_hash: str) -> Dict[str, Any]:
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": file_hash}
+        self._entries[rel] = entry
+        self._dirty = True
+        self._notify(rel)
+        return entry
+
+    def cached(self, rel: str) -> Optional[Dict[str, Any]]:
+        """Entrée enregistrée du fichier, sans vérification sur disque"""
+        return self._entries.get(rel)
+
+    def items(self, prefixes: Sequence[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """(chemin relatif, entrée) des fichiers catalogués sous ces préfixes"""
+        prefixes = tuple(prefixes)
+        return [(rel, entry) for rel, entry in self._entries.items() if rel.startswith(prefixes)]
+
+    def lookup(self, rel: str) -> Optional[Dict[str, Any]]:
+        """Entrée à jour du fichier, sans calcul (None si inconnue ou modifiée)"""
+        stat = self._stat(rel)
+        return self._known(rel, stat) if stat else None
+
+    def entry(self, rel: str) -> Optional[Dict[str, Any]]:
+        """Entrée à jour du fichier, empreinte calculée si besoin (réservé aux petits fichiers)"""
+        stat = self._stat(rel)
+        if stat is None:
+            if rel in self._entries:
+                self.forget(rel)
+            return None
+        entry = self._known(rel, stat)
+        if entry is None:
+            try:
+                entry = self._store(rel, stat, self._hash_file(self.root / rel))
+            except OSError as e:
+                logger.warning(f"Empreinte de {rel} impossible: {str(e)}")
+        return entry
+
+    async def entry_async(self, rel: str) -> Optional[Dict[str, Any]]:
+        """Entrée à jour du fichier, empreinte calculée hors de la boucle d'événements"""
+        stat = await asyncio.to_thread(self._stat, rel)
+        if stat is None:
+            if rel in self._entries:
+                self.forget(rel)
+            return None
+        entry = self._known(rel, stat)
+        if entry is None:
+            try:
+                file_hash = await asyncio.to_thread(self._hash_file, self.root / rel)
+            except OSError as e:
+                logger.warning(f"Empreinte de {rel} impossible: {str(e)}")
+                return None
+            entry = self._store(rel, stat, file_hash)
+        return entry
+
+    def matches(self, rel: str, fingerprint: str) -> bool:
+        """Vérifie qu'une empreinte d'URL correspond au contenu actuel du fichier"""
+        entry = self.lookup(rel)
+        return bool(entry) and len(fingerprint) >= FINGERPRINT_LENGTH and entry["hash"].startswith(fingerprint)
+
+    def _url(self, rel: str, entry: Optional[Dict[str, Any]]) -> str:
+        url = f"{self.url_prefix}/{rel}"
+        if entry is None:
+            return url
+        return f"{url}?v={entry['hash'][:FINGERPRINT_LENGTH]}"
+
+    def url(self, path: str) -> str:
+        """URL empreintée d'un asset (global Jinja `asset_url`)"""
+        rel = self.relative(path)
+        return self._url(rel, self.entry(rel))
+
+    def exists(self, path: str) -> bool:
+        """Présence d'un asset (global Jinja `asset_exists`, ex. bundle local construit)"""
+        return self._stat(self.relative(path)) is not None
+
+    async def _hash_in_background(self, rel: str):
+        async with self._hash_slots:
+            await self.entry_async(rel)
+
+    def refresh_later(self, rel: str):
+        """Mettre à jour l'entrée d'un fichier en tâche de fond (à appeler depuis la boucle)"""
+        if rel not in self._hashing:
+            task = asyncio.get_running_loop().create_task(self._hash_in_background(rel))
+            self._hashing[rel] = task
+            task.add_done_callback(lambda _: self._hashing.pop(rel, None))
+
+    def url_cached(self, path: str, stat: Optional[os.stat_result] = None) -> str:
+        """
+        URL empreintée d'un média sans attendre de hachage
+
+        Empreinte inconnue : URL simple, empreinte calculée en tâche de fond
+        (les abonnés du catalogue sont prévenus quand elle est connue).
+        À appeler depuis la boucle d'événements.
+        """
+        rel = self.relative(path)
+        stat = stat or self._stat(rel)
+        entry = self._known(rel, stat) if stat else None
+        if entry is None and stat is not None:
+            self.refresh_later(rel)
+        return self._url(rel, entry)
+
+    def _walk(self, directory: Path) -> List[str]:
+        files = []
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for item in it:
+                        if item.is_dir(follow_symlinks=False):
+                            stack.append(Path(item.path))
+                        elif item.is_file(follow_symlinks=False) and not item.name.endswith(".tmp"):
+                            files.append(Path(item.path).relative_to(self.root).as_posix())
+            except OSError as e:
+                logger.warning(f"Lecture du dossier {current} impossible: {str(e)}")
+        return files
+
+    def files(self, subdir: str = "") -> List[str]:
+        """Chemins relatifs des fichiers présents sous un sous-dossier (sans calcul d'empreinte)"""
+        return self._walk(self.root / subdir if subdir else self.root)
+
+    async def scan(self, subdir: str = "") -> Dict[str, Dict[str, Any]]:
+        """
+        Mettre à jour le catalogue d'un sous-dossier
+
+        Returns:
+            Entrées à jour des fichiers du sous-dossier
+        """
+        files = await asyncio.to_thread(self.files, subdir)
+
+        prefix = f"{subdir.strip('/')}/" if subdir else ""
+        present = set(files)
+        for rel in [rel for rel in self._entries if rel.startswith(prefix) and rel not in present]:
+            self.forget(rel)
+
+        result = {}
+        for rel in files:
+            entry = await self.entry_async(rel)
+            if entry:
+                result[rel] = entry
+        self.save()
+        return result
+
+    def paths_by_hash(self) -> Dict[str, str]:
+        """Empreinte -> chemin relatif d'un fichier catalogué (à vérifier avec lookup)"""
+        return {entry["hash"]: rel for rel, entry in self._entries.items()}
+
+    async def replace(self, subdirs: Sequence[str], hashes: Dict[str, str]):
+        """
+        Remplacer en une fois les entrées de sous-dossiers (ou fichiers) restaurés
+
+        Les empreintes fournies (déjà vérifiées) sont reprises sans relire
+        les fichiers ; les entrées absentes de `hashes` sont oubliées.
+        """
+        names = {subdir.strip('/') for subdir in subdirs}
+        prefixes = tuple(f"{name}/" for name in names)
+        stats = await asyncio.to_thread(lambda: {rel: self._stat(rel) for rel in hashes})
+
+        restored = [rel for rel in self._entries if rel in names or rel.startswith(prefixes)]
+        for rel in [rel for rel in restored if rel not in hashes]:
+            self.forget(rel)
+        for rel, file_hash in hashes.items():
+            if stats[rel] is not None:
+                self._store(rel, stats[rel], file_hash)
+        self.save()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "files": len(self._entries),
+            "size_mb": round(sum(e["size"] for e in self._entries.values()) / (1024 * 1024), 2)
+        }
+
+
+# Instance globale du catalogue des fichiers statiques
+media_catalog = MediaCatalog(Path("static"), Path("data/media_catalog.json"))
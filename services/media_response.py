@@ -0,0 +1,182 @@
+"""
+Réponses média du module TEASER
+Requêtes partielles (Range, If-Range) et envoi sans copie quand le serveur le permet
+"""
+
+import os
+import secrets
+from typing import List, Optional, Tuple
+
+import anyio
+from fastapi.responses import FileResponse
+from starlette.datastructures import Headers
+
+# Au-delà, la requête multi-plages est ignorée et le fichier servi en entier
+MAX_RANGES = 16
+
+# Taille des lectures quand l'envoi sans copie n'est pas disponible
+CHUNK_SIZE = 256 * 1024
+
+
+def parse_range_header(value: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Plages demandées par un en-tête Range ("bytes=0-499,1000-")
+
+    Returns:
+        Liste triée et fusionnée de (début, fin incluse) ; liste vide si aucune
+        plage n'est satisfiable (416) ; None si l'en-tête est invalide ou
+        abusif, auquel cas le fichier est servi en entier
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start_text, sep, end_text = part.partition("-")
+        if not sep:
+            return None
+        try:
+            if not start_text.strip():
+                # Plage suffixe : les N derniers octets
+                length = int(end_text)
+                if length <= 0 or size == 0:
+                    continue
+                ranges.append((max(size - length, 0), size - 1))
+                continue
+            start = int(start_text)
+            end = int(end_text) if end_text.strip() else None
+        except ValueError:
+            return None
+        if start < 0 or (end is not None and start > end):
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, size - 1 if end is None else min(end, size - 1)))
+
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def if_range_matches(if_range: Optional[str], etag: Optional[str], last_modified: Optional[str]) -> bool:
+    """If-Range : la plage ne vaut que si la représentation n'a pas changé"""
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        # Comparaison forte : un ETag faible ne valide jamais une plage
+        return not if_range.startswith("W/") and etag is not None and if_range == etag
+    return last_modified is not None and if_range == last_modified
+
+
+class RangeResponseMixin:
+    """Calcul du statut, des en-têtes et des parties d'une réponse à plages"""
+
+    def setup_ranges(self, size: int, request_headers: Headers):
+        self.total_size = size
+        self.parts: List[Tuple[bytes, int, int]] = [(b"", 0, size)]
+        self.trailer = b""
+        self.headers["Accept-Ranges"] = "bytes"
+
+        range_header = request_headers.get("range")
+        if not range_header or self.status_code != 200:
+            return
+        if not if_range_matches(request_headers.get("if-range"),
+                                self.headers.get("etag"), self.headers.get("last-modified")):
+            return
+
+        ranges = parse_range_header(range_header, size)
+        if ranges is None:
+            return
+
+        if not ranges:
+            self.status_code = 416
+            self.parts = []
+            self.headers["Content-Range"] = f"bytes */{size}"
+            self.headers["Content-Length"] = "0"
+            return
+
+        self.status_code = 206
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            self.parts = [(b"", start, end - start + 1)]
+            self.headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            self.headers["Content-Length"] = str(end - start + 1)
+            return
+
+        # Plusieurs plages : corps multipart/byteranges
+        boundary = secrets.token_hex(12)
+        part_type = self.headers.get("content-type", "application/octet-stream")
+        self.parts = []
+        for index, (start, end) in enumerate(ranges):
+            separator = b"" if index == 0 else b"\r\n"
+            prefix = separator + (
+                f"--{boundary}\r\n"
+                f"Content-Type: {part_type}\r\n"
+                f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+            ).encode("latin-1")
+            self.parts.append((prefix, start, end - start + 1))
+        self.trailer = f"\r\n--{boundary}--\r\n".encode("latin-1")
+        self.headers["Content-Type"] = f"multipart/byteranges; boundary={boundary}"
+        self.headers["Content-Length"] = str(
+            sum(len(prefix) + length for prefix, _, length in self.parts) + len(self.trailer))
+
+
+class RangeFileResponse(RangeResponseMixin, FileResponse):
+    """
+    Fichier servi en entier ou par plages (206, multipart/byteranges, 416)
+
+    Le contenu est transmis par l'extension ASGI http.response.zerocopy
+    (sendfile) quand le serveur la propose, sinon lu par blocs hors de la
+    boucle d'événements.
+    """
+
+    def __init__(self, path: str, stat_result: os.stat_result, request_headers: Headers, **kwargs):
+        super().__init__(path, stat_result=stat_result, **kwargs)
+        self.setup_ranges(stat_result.st_size, request_headers)
+
+    @staticmethod
+    def _read(file, offset: int, length: int) -> bytes:
+        file.seek(offset)
+        return file.read(length)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+        if self.send_header_only or not self.parts:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        else:
+            zerocopy = "http.response.zerocopy" in scope.get("extensions", {})
+            file = await anyio.to_thread.run_sync(open, self.path, "rb")
+            try:
+                for prefix, start, length in self.parts:
+                    if prefix:
+                        await send({"type": "http.response.body", "body": prefix, "more_body": True})
+                    if zerocopy:
+                        await send({"type": "http.response.zerocopy", "file": file,
+                                    "offset": start, "count": length, "more_body": True})
+                        continue
+                    offset, end = start, start + length
+                    while offset < end:
+                        chunk = await anyio.to_thread.run_sync(
+                            self._read, file, offset, min(CHUNK_SIZE, end - offset))
+                        if not chunk:
+                            break
+                        offset += len(chunk)
+                        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            finally:
+                await anyio.to_thread.run_sync(file.close)
+            await send({"type": "http.response.body", "body": self.trailer, "more_body": False})
+
+        if self.background is not None:
+            await self.background()
@@ -1,20 +1,56 @@
-import requests
+import aiohttp
+import os
 import random
 
-DEEZER_API_URL = "https://api.deezer.com"
-
-async def get_music():
-    try:
-        response = requests.get(f"{DEEZER_API_URL}/chart/0/tracks?limit=50")
-        data = response.json()
-
-        if 'data' in data:
-            track = random.choice(data['data'])
-            return {
-                "titre" : track['title'],
-                "artiste": track['artist']['name'],
-                "cover": track['album']['cover_small'],
-                "preview": track['preview']
-            }
-    except Exception as e:
-        print (f"Erreur API Deezer : {e}")
\ No newline at end of file
+from services.circuit_breaker import CircuitBreaker, last_good_store
+from services.cover_cache import cover_cache
+
+# Surchargeable pour pointer vers le serveur de stubs (stub_upstreams.py)
+DEEZER_API_URL = os.getenv("DEEZER_API_URL", "https://api.deezer.com")
+
+# Délai maximum d'un appel Deezer (secondes)
+DEEZER_TIMEOUT = aiohttp.ClientTimeout(total=5)
+
+music_breaker = CircuitBreaker("deezer")
+
+def get_cached_music():
+    """Dernière piste réussie, sinon valeur par défaut"""
+    return last_good_store.get("music", "chart") or get_default_music()
+
+async def fetch_music():
+    """Appel Deezer protégé par le disjoncteur, lève une exception en cas d'échec"""
+    track = await music_breaker.call(_request_music)
+    album = track['album']
+
+    # Pochette servie localement (redimensionnée) ; l'URL Deezer reste le repli
+    cover = await cover_cache.localize(album.get('cover_medium') or album['cover_small'])
+
+    data = {
+        "titre" : track['title'],
+        "artiste": track['artist']['name'],
+        "cover": cover or album['cover_small'],
+        "preview": track['preview']
+    }
+    last_good_store.put("music", "chart", data)
+    return data
+
+async def _request_music():
+    """Appel direct à Deezer, retourne une piste du classement"""
+    async with aiohttp.ClientSession(timeout=DEEZER_TIMEOUT) as session:
+        async with session.get(f"{DEEZER_API_URL}/chart/0/tracks?limit=50") as response:
+            if response.status != 200:
+                raise RuntimeError(f"Erreur API: {response.status}")
+            data = await response.json()
+
+    if 'data' not in data or not data['data']:
+        raise RuntimeError("Réponse Deezer sans pistes")
+
+    return random.choice(data['data'])
+
+def get_default_music():
+    return {
+        "titre": "Aucune lecture en cours",
+        "artiste": "",
+        "cover": "musique.jpg",
+        "preview": None
+    }
@@ -0,0 +1,250 @@
+"""
+Cache du rendu de la page TEASER
+Coquille statique et fragments des widgets mis en cache séparément,
+templates précompilés au démarrage
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from markupsafe import Markup
+
+from services.compression import EncodedBody
+from services.media_catalog import media_catalog
+
+logger = logging.getLogger(__name__)
+
+# Bytecode Jinja partagé par tous les environnements de templates de l'application
+BYTECODE_DIR = Path("data/jinja_cache")
+BYTECODE_DIR.mkdir(parents=True, exist_ok=True)
+template_bytecode_cache = FileSystemBytecodeCache(str(BYTECODE_DIR))
+
+# Fragments dynamiques de la page : template et données dont ils dépendent
+TEASER_FRAGMENTS = {
+    "meteo": ("fragments/meteo.html", ("meteo", "marees")),
+    "musique": ("fragments/musique.html", ("musique",)),
+    "cocktail": ("fragments/cocktail.html", ("cocktail",)),
+    "bootstrap": ("fragments/bootstrap.html", ("config", "playlists", "meteo", "musique", "marees")),
+}
+
+# Remplacement d'un fragment déjà affiché par sa version arrivée plus tard dans le flux
+PATCH_SCRIPT = (
+    b"<script>(function(t){var n=t.content.firstElementChild;"
+    b"var el=n&&document.getElementById(n.id);if(el){el.replaceWith(n);}t.remove();})"
+    b"(document.currentScript.previousElementSibling);document.currentScript.remove();</script>"
+)
+
+
+def precompile_templates(env: Environment) -> int:
+    """Compiler tous les templates HTML (et remplir le cache de bytecode)"""
+    count = 0
+    for name in env.list_templates(extensions=["html"]):
+        try:
+            env.get_template(name)
+            count += 1
+        except Exception as e:
+            logger.error(f"Compilation du template {name} impossible: {str(e)}")
+    return count
+
+
+class PageCache:
+    """
+    Page rendue en octets, recalculée uniquement quand ses entrées changent
+
+    - la coquille (tout sauf les fragments) est rendue une fois par version de config
+    - chaque fragment est rendu une fois par version des données dont il dépend
+    - la page complète est mise en cache par (version de config, versions des données)
+    """
+
+    def __init__(self, directory: str, shell: str, fragments: Dict[str, Tuple[str, Tuple[str, ...]]],
+                 max_pages: int = 16, max_fragments: int = 64):
+        self.env = Environment(
+            loader=FileSystemLoader(directory),
+            autoescape=True,
+            bytecode_cache=template_bytecode_cache
+        )
+        self.env.globals["asset_url"] = media_catalog.url
+        self.env.globals["asset_exists"] = media_catalog.exists
+        self.shell = shell
+        self.fragments = fragments
+        self.max_pages = max_pages
+        self.max_fragments = max_fragments
+
+        self.config_version = 0
+        self._segments: Optional[List[Union[bytes, str]]] = None
+        self._fragment_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._pages: "OrderedDict[tuple, EncodedBody]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "fragment_renders": 0, "shell_renders": 0}
+
+    def precompile(self) -> int:
+        return precompile_templates(self.env)
+
+    def invalidate(self):
+        """Changement de configuration : coquille et pages à recalculer"""
+        self.config_version += 1
+        self._segments = None
+        self._fragment_cache.clear()
+        self._pages.clear()
+
+    def _marker(self, name: str) -> str:
+        return f"<!--teaser-fragment:{name}-->"
+
+    def _shell_segments(self) -> List[Union[bytes, str]]:
+        """Coquille découpée : octets statiques et noms de fragments alternés"""
+        if self._segments is None:
+            markers = {name: Markup(self._marker(name)) for name in self.fragments}
+            html = self.env.get_template(self.shell).render(fragments=markers)
+            pattern = "|".join(re.escape(self._marker(name)) for name in self.fragments)
+            parts = re.split(f"({pattern})", html)
+
+            segments: List[Union[bytes, str]] = []
+            for i, part in enumerate(parts):
+                if i % 2:
+                    segments.append(part[len("<!--teaser-fragment:"):-len("-->")])
+                else:
+                    segments.append(part.encode("utf-8"))
+            self._segments = segments
+            self.stats["shell_renders"] += 1
+        return self._segments
+
+    def _data_key(self, value: Any, version: Optional[int]) -> tuple:
+        """Clé d'une donnée : sa version, ou son empreinte pour une valeur de repli"""
+        if version is not None:
+            return ("v", version)
+        raw = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+        return ("h", hashlib.sha1(raw.encode("utf-8")).hexdigest())
+
+    def _fragment(self, name: str, data: Dict[str, Any], keys: Dict[str, tuple]) -> bytes:
+        template_name, depends = self.fragments[name]
+        cache_key = (name,) + tuple(keys[dep] for dep in depends)
+        content = self._fragment_cache.get(cache_key)
+        if content is None:
+            # Version (ou empreinte) de chaque donnée, reprise par le bootstrap côté client
+            versions = {dep: keys[dep][1] for dep in depends}
+            html = self.env.get_template(template_name).render(data=data, versions=versions)
+            content = html.encode("utf-8")
+            self._fragment_cache[cache_key] = content
+            if len(self._fragment_cache) > self.max_fragments:
+                self._fragment_cache.popitem(last=False)
+            self.stats["fragment_renders"] += 1
+        else:
+            self._fragment_cache.move_to_end(cache_key)
+        return content
+
+    def render(self, data: Dict[str, Any], versions: Optional[Dict[str, Optional[int]]] = None) -> bytes:
+        """
+        Page complète en octets
+
+        Args:
+            data: Données des widgets passées aux fragments
+            versions: Version de chaque donnée (None ou absente : clé par empreinte)
+        """
+        return self.render_encoded(data, versions).body
+
+    def render_encoded(self, data: Dict[str, Any],
+                       versions: Optional[Dict[str, Optional[int]]] = None) -> EncodedBody:
+        """Page complète avec ses variantes compressées (calculées une fois par page)"""
+        versions = versions or {}
+        keys = {name: self._data_key(value, versions.get(name)) for name, value in data.items()}
+        page_key = (self.config_version,) + tuple(sorted(keys.items()))
+
+        page = self._pages.get(page_key)
+        if page is not None:
+            self._pages.move_to_end(page_key)
+            self.stats["hits"] += 1
+            return page
+
+        self.stats["misses"] += 1
+        page = EncodedBody(b"".join(
+            segment if isinstance(segment, bytes) else self._fragment(segment, data, keys)
+            for segment in self._shell_segments()
+        ))
+        self._pages[page_key] = page
+        if len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return page
+
+    def _split_body_end(self) -> Tuple[List[Union[bytes, str]], bytes]:
+        """Coquille jusqu'à </body> exclu, et la fin du document"""
+        segments = list(self._shell_segments())
+        for i in range(len(segments) - 1, -1, -1):
+            segment = segments[i]
+            if isinstance(segment, bytes) and b"</body>" in segment:
+                head, sep, tail = segment.rpartition(b"</body>")
+                return segments[:i] + [head], sep + tail + b"".join(
+                    s for s in segments[i + 1:] if isinstance(s, bytes))
+        return segments, b""
+
+    async def stream(self, data: Dict[str, Any], versions: Dict[str, Optional[int]],
+                     pending: List[str], resolve: Callable[[str], Awaitable[Tuple[Any, Optional[int]]]]
+                     ) -> AsyncIterator[bytes]:
+        """
+        Page en flux : coquille envoyée tout de suite, données en retard ensuite
+
+        `data` contient les valeurs disponibles (ou de repli) ; `resolve(nom)`
+        retourne (valeur, version) de chaque donnée de `pending` encore en attente. Les
+        fragments concernés sont renvoyés dès que leur donnée arrive et remplacent
+        la version de repli dans le DOM. `data` et `versions` sont mis à jour.
+        """
+        if not pending:
+            yield self.render(data, versions)
+            return
+
+        keys = {name: self._data_key(value, versions.get(name)) for name, value in data.items()}
+        head, tail = self._split_body_end()
+        self.stats["misses"] += 1
+        yield b"".join(
+            segment if isinstance(segment, bytes) else self._fragment(segment, data, keys)
+            for segment in head
+        )
+
+        tasks = {asyncio.ensure_future(resolve(name)): name for name in pending}
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                chunks = []
+                for task in done:
+                    name = tasks.pop(task)
+                    try:
+                        value, version = task.result()
+                    except Exception as e:
+                        logger.warning(f"Donnée {name} indisponible pour le flux: {str(e)}")
+                        continue
+                    key = self._data_key(value, version)
+                    if key == keys.get(name):
+                        continue
+                    data[name] = value
+                    versions[name] = version
+                    keys[name] = key
+                    for fragment, (_, depends) in self.fragments.items():
+                        if name in depends:
+                            chunks.append(b"<template>" + self._fragment(fragment, data, keys)
+                                          + b"</template>" + PATCH_SCRIPT)
+                if chunks:
+                    yield b"".join(chunks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        yield tail
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "config_version": self.config_version,
+            "pages": len(self._pages),
+            "fragments": len(self._fragment_cache),
+            "hit_ratio": round(self.stats["hits"] / lookups, 3) if lookups else None
+        }
+
+
+# Instance globale du cache de la page teaser
+teaser_page_cache = PageCache("templates", "teaser.html", TEASER_FRAGMENTS)
@@ -0,0 +1,250 @@
+"""
+Nettoyage automatique des médias du TEASER (auto_cleanup / cleanup_days)
+Fichiers des zones rangés par date de modification dans un tas alimenté par
+le catalogue : les fichiers expirés sont trouvés sans parcourir les dossiers,
+puis supprimés par lots hors de la boucle, dans un budget par passage
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.activity_log import ActivityLog, activity_log
+from services.media_catalog import MediaCatalog, media_catalog
+
+logger = logging.getLogger(__name__)
+
+# Zones nettoyées (les selfies ont leur propre conservation par mois)
+RETENTION_ZONES = ("left1", "left2", "left3", "center")
+
+# Intervalle entre deux passages automatiques (secondes)
+RETENTION_INTERVAL = 3600
+
+# Durée de conservation par défaut (cleanup_days absent ou invalide)
+DEFAULT_CLEANUP_DAYS = 30
+
+# Premier passage après le démarrage (laisse finir le scan du catalogue)
+STARTUP_DELAY = 120
+
+# Budget d'un passage : fichiers supprimés et durée au plus
+MAX_DELETES_PER_RUN = 200
+MAX_RUN_SECONDS = 2.0
+
+# Pause entre deux passages quand il reste des fichiers expirés
+CATCH_UP_DELAY = 5
+
+
+class RetentionWorker:
+    """
+    Suppression des médias plus anciens que `cleanup_days`
+
+    Le tas (date de modification, chemin) est construit une fois depuis le
+    catalogue puis tenu à jour par ses notifications ; une entrée devenue
+    obsolète (fichier modifié ou supprimé) est ignorée quand elle sort du
+    tas. Un dossier de zone n'est relu que si sa date a changé (fichier
+    ajouté ou retiré hors du TEASER).
+    """
+
+    def __init__(self, catalog: MediaCatalog, activities: ActivityLog, zones=RETENTION_ZONES):
+        self.catalog = catalog
+        self.activities = activities
+        self.prefixes = tuple(f"media/{zone}/" for zone in zones)
+
+        self.enabled = False
+        self.days = DEFAULT_CLEANUP_DAYS
+
+        self._heap: List[Tuple[int, str]] = []
+        self._zone_mtimes: Dict[str, Optional[int]] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"runs": 0, "deleted": 0, "freed_bytes": 0, "last_run": None, "backlog": False}
+
+        catalog.add_listener(self._on_change)
+        self._rebuild()
+
+    def configure(self, config: Dict[str, Any]):
+        """Reprendre auto_cleanup / cleanup_days de la configuration système"""
+        if "auto_cleanup" in config:
+            self.enabled = bool(config["auto_cleanup"])
+        if "cleanup_days" in config:
+            try:
+                self.days = max(1, int(config["cleanup_days"]))
+            except (TypeError, ValueError):
+                logger.warning(f"cleanup_days invalide ({config['cleanup_days']!r}), {DEFAULT_CLEANUP_DAYS} jours retenus")
+                self.days = DEFAULT_CLEANUP_DAYS
+
+    def _in_scope(self, rel: str) -> bool:
+        return rel.startswith(self.prefixes) and not rel.endswith("/.gitkeep")
+
+    def _on_change(self, rel: str):
+        if self._in_scope(rel):
+            entry = self.catalog.cached(rel)
+            if entry is not None:
+                heapq.heappush(self._heap, (entry["mtime_ns"], rel))
+
+    def _rebuild(self):
+        self._heap = [(entry["mtime_ns"], rel) for rel, entry in self.catalog.items(self.prefixes)
+                      if self._in_scope(rel)]
+        heapq.heapify(self._heap)
+
+    def _zone_dirs(self) -> Dict[str, Optional[int]]:
+        mtimes = {}
+        for prefix in self.prefixes:
+            try:
+                mtimes[prefix] = (self.catalog.root / prefix).stat().st_mtime_ns
+            except OSError:
+                mtimes[prefix] = None
+        return mtimes
+
+    async def _sync_zones(self):
+        """Relire les seuls dossiers de zone modifiés depuis le passage précédent"""
+        mtimes = await asyncio.to_thread(self._zone_dirs)
+        for prefix, mtime in mtimes.items():
+            if mtime is not None and self._zone_mtimes.get(prefix) != mtime:
+                await self.catalog.scan(prefix.rstrip("/"))
+        self._zone_mtimes = mtimes
+
+    def _expired(self, cutoff_ns: int, limit: int) -> List[Tuple[str, int]]:
+        """Jusqu'à `limit` fichiers expirés (chemin, date attendue), les plus anciens d'abord"""
+        batch = []
+        seen = set()
+        while self._heap and self._heap[0][0] < cutoff_ns and len(batch) < limit:
+            mtime_ns, rel = heapq.heappop(self._heap)
+            entry = self.catalog.cached(rel)
+            if entry is not None and entry["mtime_ns"] == mtime_ns and rel not in seen:
+                seen.add(rel)
+                batch.append((rel, mtime_ns))
+        return batch
+
+    def _delete(self, batch: List[Tuple[str, int]]) -> Tuple[List[str], int, List[Tuple[str, int]]]:
+        """
+        Supprimer un lot de fichiers (appel bloquant)
+
+        Returns:
+            chemins supprimés, octets libérés, fichiers à remettre dans le tas
+            (budget de durée épuisé, ou réécrits depuis : avec leur nouvelle date)
+        """
+        deadline = time.monotonic() + MAX_RUN_SECONDS
+        deleted = []
+        freed = 0
+        requeue = []
+        for index, (rel, mtime_ns) in enumerate(batch):
+            if time.monotonic() >= deadline:
+                return deleted, freed, requeue + batch[index:]
+            path = self.catalog.root / rel
+            try:
+                stat = path.stat()
+                if stat.st_mtime_ns != mtime_ns:
+                    # Réécrit depuis : gardé, à sa nouvelle date
+                    requeue.append((rel, stat.st_mtime_ns))
+                    continue
+                path.unlink()
+            except FileNotFoundError:
+                deleted.append(rel)
+                continue
+            except OSError as e:
+                logger.warning(f"Suppression de {rel} impossible: {str(e)}")
+                continue
+            deleted.append(rel)
+            freed += stat.st_size
+        return deleted, freed, requeue
+
+    async def run(self, days: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Un passage de nettoyage, dans le budget MAX_DELETES_PER_RUN / MAX_RUN_SECONDS
+
+        Returns:
+            deleted: fichiers supprimés, freed_bytes: octets libérés,
+            backlog: il reste des fichiers expirés (passage suivant)
+        """
+        days = days or self.days
+        async with self._lock:
+            await self._sync_zones()
+            if len(self._heap) > 2 * self.catalog.get_stats()["files"] + 1024:
+                # Trop d'entrées obsolètes accumulées
+                self._rebuild()
+
+            cutoff_ns = int((time.time() - days * 86400) * 1e9)
+            batch = self._expired(cutoff_ns, MAX_DELETES_PER_RUN)
+            deleted, freed, remaining = await asyncio.to_thread(self._delete, batch)
+
+            for rel, mtime_ns in remaining:
+                heapq.heappush(self._heap, (mtime_ns, rel))
+                entry = self.catalog.cached(rel)
+                if entry is not None and entry["mtime_ns"] != mtime_ns:
+                    # L'entrée du catalogue doit suivre, sinon la nouvelle date serait ignorée
+                    self.catalog.refresh_later(rel)
+            for rel in deleted:
+                self.catalog.forget(rel)
+            if deleted:
+                self.catalog.save()
+
+            backlog = bool(self._heap and self._heap[0][0] < cutoff_ns)
+            self.stats["runs"] += 1
+            self.stats["deleted"] += len(deleted)
+            self.stats["freed_bytes"] += freed
+            self.stats["last_run"] = time.time()
+            self.stats["backlog"] = backlog
+
+        if deleted:
+            logger.info(f"Nettoyage: {len(deleted)} fichier(s) de plus de {days} jours supprimé(s)")
+        return {"deleted": len(deleted), "freed_bytes": freed, "backlog": backlog, "days": days}
+
+    async def run_all(self, days: Optional[int] = None) -> Dict[str, Any]:
+        """Passages successifs jusqu'à épuisement des fichiers expirés (nettoyage manuel)"""
+        total = {"deleted": 0, "freed_bytes": 0}
+        while True:
+            result = await self.run(days)
+            total["deleted"] += result["deleted"]
+            total["freed_bytes"] += result["freed_bytes"]
+            if not result["backlog"]:
+                return {**total, "days": result["days"]}
+            await asyncio.sleep(0.1)
+
+    async def _loop(self):
+        await asyncio.sleep(STARTUP_DELAY)
+        while True:
+            delay = RETENTION_INTERVAL
+            if self.enabled:
+                try:
+                    result = await self.run()
+                    if result["deleted"]:
+                        self.activities.add(
+                            "cleanup",
+                            "Nettoyage automatique",
+                            f"{result['deleted']} fichier(s) de plus de {result['days']} jours supprimé(s)",
+                            round(result["freed_bytes"] / (1024 * 1024), 2)
+                        )
+                    if result["backlog"]:
+                        delay = CATCH_UP_DELAY
+                except Exception as e:
+                    logger.error(f"Nettoyage automatique échoué: {str(e)}")
+            await asyncio.sleep(delay)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="media-retention")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "days": self.days,
+            "indexed": len(self._heap),
+            "freed_mb": round(self.stats["freed_bytes"] / (1024 * 1024), 2)
+        }
+
+
+# Instance globale du nettoyage automatique
+retention_worker = RetentionWorker(media_catalog, activity_log)
@@ -0,0 +1,118 @@
+"""
+Service des fichiers statiques pour le module TEASER
+En-têtes de cache adaptés aux contenus immuables
+"""
+
+import mimetypes
+import os
+from typing import Optional
+from urllib.parse import parse_qs
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse
+
+from services.compression import ENCODING_SUFFIXES, PRECOMPRESSED_EXTENSIONS, negotiate
+from services.hot_media_cache import HotMediaCache, MemoryMediaResponse
+from services.media_catalog import MediaCatalog
+from services.media_response import RangeFileResponse
+
+# Contenu dont l'URL change dès que le fichier change : cache navigateur d'un an
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Contenu sans empreinte : le navigateur revalide (ETag / Last-Modified)
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """Fichiers statiques adressés par contenu, servis avec un cache long"""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """
+    Fichiers statiques avec URLs empreintées (?v=<empreinte du contenu>)
+
+    Le cache long n'est accordé que si l'empreinte de l'URL correspond au
+    contenu actuel du fichier ; une URL périmée ou sans empreinte est revalidée.
+    Les assets texte disposant d'une variante .br / .gz à jour sont servis
+    précompressés, sans compression à la volée. Les requêtes Range (lecture
+    et reprise des vidéos) sont honorées. Les médias chauds sont servis
+    depuis la mémoire quand un cache est fourni.
+    """
+
+    def __init__(self, *args, catalog: MediaCatalog, hot_cache: Optional[HotMediaCache] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.catalog = catalog
+        self.hot_cache = hot_cache
+
+    def _memory_response(self, rel: str, scope):
+        if self.hot_cache is None or not self.hot_cache.accepts(rel):
+            return None
+        entry = self.hot_cache.get(rel)
+        if entry is None:
+            return None
+        request_headers = Headers(scope=scope)
+        response = MemoryMediaResponse(entry, request_headers, scope["method"])
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        response = RangeFileResponse(full_path, stat_result=stat_result, request_headers=request_headers,
+                                     status_code=status_code, method=scope["method"])
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    async def _precompressed_response(self, path: str, scope):
+        if os.path.splitext(path)[1].lower() not in PRECOMPRESSED_EXTENSIONS:
+            return None
+        request_headers = Headers(scope=scope)
+        if "range" in request_headers:
+            return None
+        encoding = negotiate(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            return None
+
+        _, source_stat = await anyio.to_thread.run_sync(self.lookup_path, path)
+        full_path, stat_result = await anyio.to_thread.run_sync(
+            self.lookup_path, path + ENCODING_SUFFIXES[encoding])
+        if source_stat is None or stat_result is None or stat_result.st_mtime < source_stat.st_mtime:
+            return None
+
+        response = self.file_response(full_path, stat_result, scope)
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type == "application/javascript":
+            media_type += "; charset=utf-8"
+        response.headers["Content-Type"] = media_type
+        response.headers["Content-Encoding"] = encoding
+        response.headers.add_vary_header("Accept-Encoding")
+        return response
+
+    async def get_response(self, path: str, scope):
+        rel = self.catalog.relative(path)
+        response = self._memory_response(rel, scope) if scope["method"] in ("GET", "HEAD") else None
+        if response is None:
+            response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+            if self.hot_cache is not None and isinstance(response, RangeFileResponse) \
+                    and self.hot_cache.accepts(rel):
+                # Défaut de cache : servi depuis le disque, chargé en mémoire pour la suite
+                self.hot_cache.admit(rel, response.total_size)
+        if response.status_code in (200, 206, 304):
+            query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+            fingerprint = query.get("v", [""])[0]
+            if fingerprint and self.catalog.matches(rel, fingerprint):
+                response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+            else:
+                response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+        return response
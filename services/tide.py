@@ -1,31 +1,72 @@
-import requests
+import aiohttp
+import logging
+import os
 from datetime import datetime
 import json
 
+from services.circuit_breaker import CircuitBreaker, last_good_store
+
+logger = logging.getLogger(__name__)
+
+# Surchargeable pour pointer vers le serveur de stubs (stub_upstreams.py)
+WORLDTIDES_API_URL = os.getenv("WORLDTIDES_API_URL", "https://www.worldtides.info/api/v3")
+
+# Délai maximum d'un appel WorldTides (secondes)
+TIDE_TIMEOUT = aiohttp.ClientTimeout(total=5)
+
+tide_breaker = CircuitBreaker("worldtides")
+
 async def get_tide_data(lat: float = None, lon: float = None):
     try:
         if lat and lon:
-            url = "https://www.worldtides.info/api/v3"
-            params = {
-                "lat": lat,
-                "lon": lon,
-                "length": 86400, # 24heures
-                "datum": "LAT"
-            }
-
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                return format_real_tide_data(data)
-            else:
-                print(f"Erreur API: {response.status_code}")
-                return get_fallback_tide_data(lat, lon)
+            return await fetch_tide_data(lat, lon)
         else:
             return get_fallback_tide_data()
         
     except Exception as e:
-        print(f"Erreur lors de la récupération des marées: {e}")
-        return get_fallback_tide_data(lat, lon)
+        logger.warning(f"Erreur lors de la récupération des marées: {e}")
+        return get_cached_tide_data(lat, lon)
+
+def tide_key(lat: float, lon: float):
+    """Clé de la dernière valeur connue pour une position"""
+    return f"{lat:.3f},{lon:.3f}"
+
+def get_cached_tide_data(lat: float = None, lon: float = None):
+    """Prochaine marée d'après les derniers extrêmes reçus, sinon estimation de repli"""
+    if lat and lon:
+        # Les extrêmes bruts sont stockés pour que la prochaine marée reste juste
+        extremes = last_good_store.get("tide", tide_key(lat, lon))
+        if extremes:
+            return format_real_tide_data({"extremes": extremes})
+    return get_fallback_tide_data(lat, lon)
+
+async def fetch_tide_data(lat: float, lon: float):
+    """Appel WorldTides protégé par le disjoncteur, lève une exception en cas d'échec"""
+    extremes = await tide_breaker.call(_request_tide_data, lat, lon)
+    last_good_store.put("tide", tide_key(lat, lon), extremes)
+    return format_real_tide_data({"extremes": extremes})
+
+async def _request_tide_data(lat: float, lon: float):
+    """Appel direct à WorldTides, retourne la liste des extrêmes"""
+    url = WORLDTIDES_API_URL
+    params = {
+        "lat": lat,
+        "lon": lon,
+        "length": 86400, # 24heures
+        "datum": "LAT"
+    }
+
+    async with aiohttp.ClientSession(timeout=TIDE_TIMEOUT) as session:
+        async with session.get(url, params=params) as response:
+            if response.status != 200:
+                raise RuntimeError(f"Erreur API: {response.status}")
+
+            data = await response.json()
+
+    extremes = data.get("extremes", [])
+    if not extremes:
+        raise RuntimeError("Réponse WorldTides sans extrêmes")
+    return extremes
     
 def format_real_tide_data(data):
     try:
@@ -47,7 +88,7 @@ def format_real_tide_data(data):
                 }
         return get_fallback_tide_data()
     except Exception as e:
-        print(f"Erreur formatage: {e}")
+        logger.warning(f"Erreur formatage: {e}")
         return get_fallback_tide_data()
         
 def get_fallback_tide_data(lat=None, lon=None):
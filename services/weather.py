@@ -1,65 +1,182 @@
 import requests
+import logging
+import math
 import os
+import time
+import asyncio
+from collections import OrderedDict
 from dotenv import load_dotenv
 import aiohttp
 
+from services.circuit_breaker import CircuitBreaker, last_good_store
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 OPENWEATHER_API_KEY=os.getenv("OPENWEATHER_API_KEY")
+# Surchargeable pour pointer vers le serveur de stubs (stub_upstreams.py)
+OPENWEATHER_API_URL=os.getenv("OPENWEATHER_API_URL", "https://api.openweathermap.org/data/2.5/weather")
+
+# Délai maximum d'un appel OpenWeatherMap (secondes)
+WEATHER_TIMEOUT = aiohttp.ClientTimeout(total=5)
+
+weather_breaker = CircuitBreaker("openweathermap")
+
+# Cache par tuile géographique : les écrans proches partagent la même météo
+GEO_TILE_SIZE = 0.05        # degrés (~5 km)
+GEO_TILE_TTL = 300          # secondes
+GEO_TILE_MAX_ENTRIES = 1024 # tuiles gardées au plus (les moins récemment utilisées sortent)
+_tile_cache = OrderedDict() # clé de tuile -> (horodatage, météo)
+_tile_inflight = {}         # clé de tuile -> tâche d'appel en cours
+
+def check_coordinates(lat: float = None, lon: float = None):
+    """Lève ValueError si des coordonnées fournies sont hors limites (ou NaN / infinies)"""
+    if lat is not None and not (math.isfinite(lat) and -90 <= lat <= 90):
+        raise ValueError(f"Latitude invalide: {lat}")
+    if lon is not None and not (math.isfinite(lon) and -180 <= lon <= 180):
+        raise ValueError(f"Longitude invalide: {lon}")
+
+def _cache_tile(key: str, data):
+    _tile_cache[key] = (time.monotonic(), data)
+    _tile_cache.move_to_end(key)
+    while len(_tile_cache) > GEO_TILE_MAX_ENTRIES:
+        _tile_cache.popitem(last=False)
 
 async def get_weather(ville: str = None, lat: float = None, lon: float = None):
-    try:
+    check_coordinates(lat, lon)
+    key = geo_tile_key(ville, lat, lon)
+    cached = _tile_cache.get(key)
+    if cached and time.monotonic() - cached[0] < GEO_TILE_TTL:
+        _tile_cache.move_to_end(key)
+        return cached[1]
 
-        if not OPENWEATHER_API_KEY:
-            print("Clé API OpenWeahterMap manquante")
-            return get_default_weather()
-        # url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}&units=metric&lang=fr"
-        base_url =f"https://api.openweathermap.org/data/2.5/weather"
-
-        if lat is not None and lon is not None:
-            # Utiliser les coordonnées GPS
-            url = f"{base_url}?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}&units=metric&lang=fr"
-            print(f"Appel API avec coordonnées: {lat}, {lon}")
-        elif ville:
-            # Utiliser le nom de la ville
-            url = f"{base_url}?q={ville}&appid={OPENWEATHER_API_KEY}&units=metric&lang=fr"
-            print(f"Appel API avec ville: {ville}")
-        else:
-            # Par défaut Paris
-            url = f"{base_url}?q=Paris,FR&appid={OPENWEATHER_API_KEY}&units=metric&lang=fr"
-            print("Appel API par défaut: Paris")
-        
-        # Appel API avec aiohttp
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                print(f"Status API: {response.status}")
-                
-                if response.status == 200:
-                    data = await response.json()
-                    city_name = data["name"]
-
-                    if lat is not None and lon is not None:
-                        if "country" in data.get("sys", {}):
-                            city_name = f"{data['name']}, {data['sys']['country']}"
-                    
-                    print(f"Données reçues: {data['name']}, {data['main']['temp']}°C")
-                                            
-                    return {
-                       "ville": city_name,
-                        "temperature": round(data["main"]["temp"]),
-                        "description": data["weather"][0]["description"].capitalize(),
-                        "icone": f"fa-{get_weather_icon(data['weather'][0]['icon'])}"
-                    }
-                else:
-                    print(f"Erreur API: {response.status}")
-                    return get_default_weather()
+    # Un seul appel upstream par tuile, même pour des requêtes simultanées
+    task = _tile_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch_weather(ville=ville, lat=lat, lon=lon))
+        _tile_inflight[key] = task
+        task.add_done_callback(lambda t: _tile_inflight.pop(key, None))
+    try:
+        data = await asyncio.shield(task)
+        _cache_tile(key, data)
+        return data
     except Exception as e:
-        print(f"Exception météo: {e}")
-        return get_default_weather()
+        logger.warning(f"Exception météo: {e}")
+        return get_cached_weather(ville=ville, lat=lat, lon=lon)
+
+def geo_tile_key(ville: str = None, lat: float = None, lon: float = None):
+    """Clé de tuile géographique (ou de ville) pour le cache météo"""
+    if lat is not None and lon is not None:
+        return f"tile:{round(lat / GEO_TILE_SIZE)}:{round(lon / GEO_TILE_SIZE)}"
+    return f"ville:{(ville or 'Paris,FR').lower()}"
+
+async def get_weather_batch(locations: list, concurrency: int = 4):
+    """
+    Météo de plusieurs localisations en un appel
+
+    Args:
+        locations: Liste de {"ville": ...} ou {"lat": ..., "lon": ...} (+ "id" optionnel)
+        concurrency: Nombre maximum d'appels upstream simultanés
+
+    Returns:
+        Résultats dans l'ordre des localisations demandées
+    """
+    # Dédupliquer par tuile et séparer les tuiles déjà en cache
+    tiles = {}
+    for location in locations:
+        key = geo_tile_key(location.get("ville"), location.get("lat"), location.get("lon"))
+        tiles.setdefault(key, location)
+
+    now = time.monotonic()
+    missing = [key for key in tiles
+               if key not in _tile_cache or now - _tile_cache[key][0] >= GEO_TILE_TTL]
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_tile(key):
+        location = tiles[key]
+        async with semaphore:
+            await get_weather(ville=location.get("ville"), lat=location.get("lat"), lon=location.get("lon"))
+
+    await asyncio.gather(*(fetch_tile(key) for key in missing))
+
+    results = []
+    for location in locations:
+        key = geo_tile_key(location.get("ville"), location.get("lat"), location.get("lon"))
+        cached = _tile_cache.get(key)
+        results.append({
+            "id": location.get("id"),
+            "tile": key,
+            "cached": key not in missing,
+            "meteo": cached[1] if cached else get_cached_weather(
+                ville=location.get("ville"), lat=location.get("lat"), lon=location.get("lon"))
+        })
+    return results
+
+def weather_key(ville: str = None, lat: float = None, lon: float = None):
+    """Clé de la dernière valeur connue pour une localisation"""
+    if lat is not None and lon is not None:
+        return f"{lat:.3f},{lon:.3f}"
+    return (ville or "Paris,FR").lower()
+
+def get_cached_weather(ville: str = None, lat: float = None, lon: float = None):
+    """Dernière météo réussie pour cette localisation, sinon valeur par défaut"""
+    return last_good_store.get("weather", weather_key(ville, lat, lon)) or get_default_weather()
+
+async def fetch_weather(ville: str = None, lat: float = None, lon: float = None):
+    """Appel OpenWeatherMap protégé par le disjoncteur, lève une exception en cas d'échec"""
+    data = await weather_breaker.call(_request_weather, ville, lat, lon)
+    last_good_store.put("weather", weather_key(ville, lat, lon), data)
+    return data
+
+async def _request_weather(ville: str = None, lat: float = None, lon: float = None):
+    """Appel direct à OpenWeatherMap"""
+    if not OPENWEATHER_API_KEY:
+        raise RuntimeError("Clé API OpenWeahterMap manquante")
+    # url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}&units=metric&lang=fr"
+    base_url = OPENWEATHER_API_URL
+
+    if lat is not None and lon is not None:
+        # Utiliser les coordonnées GPS
+        url = f"{base_url}?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}&units=metric&lang=fr"
+        logger.debug(f"Appel API avec coordonnées: {lat}, {lon}")
+    elif ville:
+        # Utiliser le nom de la ville
+        url = f"{base_url}?q={ville}&appid={OPENWEATHER_API_KEY}&units=metric&lang=fr"
+        logger.debug(f"Appel API avec ville: {ville}")
+    else:
+        # Par défaut Paris
+        url = f"{base_url}?q=Paris,FR&appid={OPENWEATHER_API_KEY}&units=metric&lang=fr"
+        logger.debug("Appel API par défaut: Paris")
+
+    # Appel API avec aiohttp
+    async with aiohttp.ClientSession(timeout=WEATHER_TIMEOUT) as session:
+        async with session.get(url) as response:
+            logger.debug(f"Status API: {response.status}")
+
+            if response.status != 200:
+                raise RuntimeError(f"Erreur API: {response.status}")
+
+            data = await response.json()
+            city_name = data["name"]
+
+            if lat is not None and lon is not None:
+                if "country" in data.get("sys", {}):
+                    city_name = f"{data['name']}, {data['sys']['country']}"
+
+            logger.debug(f"Données reçues: {data['name']}, {data['main']['temp']}°C")
+
+            return {
+               "ville": city_name,
+                "temperature": round(data["main"]["temp"]),
+                "description": data["weather"][0]["description"].capitalize(),
+                "icone": f"fa-{get_weather_icon(data['weather'][0]['icon'])}"
+            }
         
     #     response = requests.get(url)
     #     data = response.json()
-    #     async with aiohttp.ClientSession() as session:
+    #     async with aiohttp.ClientSession(timeout=WEATHER_TIMEOUT) as session:
     #         async with session.get(url) as response:
     #             if response.status == 200:
     #                 data = await response.json()
@@ -81,19 +198,21 @@ async def get_weather(ville: str = None, lat: float = None, lon: float = None):
     #        "maree" : "Haute à 15h"
     #     }
 
+# Code d'icône OpenWeatherMap -> icône Font Awesome (lue aussi par build_assets.py)
+WEATHER_ICONS = {
+    '01d': 'sun',             '01n': 'moon',
+    '02d': 'cloud-sun',       '02n': 'cloud-moon',
+    '03d': 'cloud',           '03n': 'cloud',
+    '04d': 'cloud-meatball',  '04n': 'cloud-meatball',
+    '09d': 'cloud-rain',      '09n': 'cloud-rain',
+    '10d': 'umbrella',        '10n': 'umbrella',
+    '11d': 'bolt',            '11n': 'bolt',
+    '13d': 'snowflake',       '13n': 'snowflake',
+    '50d': 'smog',            '50n': 'smog'
+}
+
 def get_weather_icon(icon_code):
-    icon_map = {
-        '01d': 'sun',             '01n': 'moon',
-        '02d': 'cloud-sun',       '02n': 'cloud-moon',
-        '03d': 'cloud',           '03n': 'cloud',
-        '04d': 'cloud-meatball',  '04n': 'cloud-meatball',
-        '09d': 'cloud-rain',      '09n': 'cloud-rain',
-        '10d': 'umbrella',        '10n': 'umbrella',
-        '11d': 'bolt',            '11n': 'bolt',
-        '13d': 'snowflake',       '13n': 'snowflake',
-        '50d': 'smog',            '50n': 'smog'
-    }
-    return icon_map.get(icon_code, icon_map.get(icon_code[:2], 'cloud'))
+    return WEATHER_ICONS.get(icon_code, WEATHER_ICONS.get(icon_code[:2], 'cloud'))
 
 def get_default_weather():
     return {
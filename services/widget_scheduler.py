@@ -0,0 +1,335 @@
+"""
+Planificateur de rafraîchissement des widgets pour le module TEASER
+Garde en mémoire les données météo, musique et marées à jour
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from services.weather import fetch_weather, get_cached_weather
+from services.music import fetch_music, get_cached_music
+from services.tide import fetch_tide_data, get_cached_tide_data, get_fallback_tide_data
+
+logger = logging.getLogger(__name__)
+
+
+class WidgetSource:
+    """Source de données d'un widget, rafraîchie périodiquement"""
+
+    def __init__(self, name: str, fetch: Callable[[], Awaitable[Any]],
+                 interval: float, fallback: Callable[[], Any]):
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+        self.fallback = fallback
+
+        self.data = None
+        self.updated_at: Optional[float] = None
+        self.version = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+        self.lock = asyncio.Lock()
+        self.wakeup = asyncio.Event()
+        self.inflight: Optional[asyncio.Task] = None
+
+    def status(self) -> Dict[str, Any]:
+        """État de la source pour l'admin"""
+        return {
+            "interval": self.interval,
+            "version": self.version,
+            "updated_at": self.updated_at,
+            "age": round(time.time() - self.updated_at, 1) if self.updated_at else None,
+            "failures": self.failures,
+            "last_error": self.last_error
+        }
+
+
+class WidgetScheduler:
+    """Rafraîchit chaque widget en tâche de fond à son intervalle configuré"""
+
+    # Clé de config -> (source, multiplicateur vers secondes)
+    INTERVAL_KEYS = {
+        "weather_refresh": ("meteo", 1),      # secondes
+        "tide_refresh": ("marees", 1),        # secondes
+        "music_refresh": ("musique", 60),     # minutes
+    }
+
+    def __init__(self, jitter: float = 0.1, retry_base: float = 5, min_interval: float = 10,
+                 persist_path: Optional[Path] = None, persist_interval: float = 60):
+        self.jitter = jitter
+        self.retry_base = retry_base
+        self.min_interval = min_interval
+        self.persist_path = persist_path
+        self.persist_interval = persist_interval
+
+        self.sources: Dict[str, WidgetSource] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+        # Date du dernier rendu d'écran (affichée par /widgets/status)
+        self.manifest_at: Optional[float] = None
+
+        # Paramètres d'appel des upstreams (mis à jour par configure())
+        self.weather_location = "Paris,FR"
+        self.tide_lat: Optional[float] = None
+        self.tide_lon: Optional[float] = None
+
+        # Valeurs de repli : dernière réponse réussie persistée, sinon valeur par défaut
+        self.register("meteo", lambda: fetch_weather(ville=self.weather_location), 300,
+                      lambda: get_cached_weather(ville=self.weather_location))
+        self.register("musique", fetch_music, 300, get_cached_music)
+        self.register("marees", self._fetch_tide, 3600,
+                      lambda: get_cached_tide_data(self.tide_lat, self.tide_lon))
+
+    def register(self, name: str, fetch: Callable[[], Awaitable[Any]],
+                 interval: float, fallback: Callable[[], Any]):
+        """Déclarer une source de widget"""
+        self.sources[name] = WidgetSource(name, fetch, interval, fallback)
+
+    async def _fetch_tide(self):
+        if self.tide_lat is None or self.tide_lon is None:
+            return get_fallback_tide_data()
+        return await fetch_tide_data(self.tide_lat, self.tide_lon)
+
+    def configure(self, config: Dict[str, Any]):
+        """
+        Appliquer la configuration admin (intervalles et emplacements)
+
+        Args:
+            config: Configuration système, seules les clés connues sont lues
+        """
+        if config.get("weather_location"):
+            self.weather_location = config["weather_location"]
+        if config.get("tide_lat") is not None and config.get("tide_lon") is not None:
+            self.tide_lat = float(config["tide_lat"])
+            self.tide_lon = float(config["tide_lon"])
+        self.update_intervals(config)
+
+    def update_intervals(self, config: Dict[str, Any]):
+        """Modifier les intervalles de rafraîchissement à chaud"""
+        for key, (name, factor) in self.INTERVAL_KEYS.items():
+            if config.get(key) is None:
+                continue
+            try:
+                interval = max(float(config[key]) * factor, self.min_interval)
+            except (TypeError, ValueError):
+                logger.warning(f"Intervalle invalide pour {key}: {config[key]}")
+                continue
+
+            source = self.sources[name]
+            if source.interval != interval:
+                logger.info(f"Intervalle {name}: {source.interval}s -> {interval}s")
+                source.interval = interval
+                # Réveiller la boucle pour qu'elle reprogramme son attente
+                source.wakeup.set()
+
+    def get(self, name: str) -> Any:
+        """Lire la dernière valeur en mémoire (ou la valeur de repli)"""
+        source = self.sources[name]
+        if source.data is None:
+            return source.fallback()
+        return source.data
+
+    def is_ready(self, name: str) -> bool:
+        """Indique si la source a déjà reçu une valeur réelle"""
+        return self.sources[name].data is not None
+
+    def version_of(self, name: str, value: Any) -> Optional[int]:
+        """Version de `value` si c'est la valeur en mémoire, None pour une valeur de repli"""
+        source = self.sources[name]
+        if source.data is None or value is not source.data:
+            return None
+        return source.version
+
+    async def refresh(self, name: str) -> Any:
+        """Rafraîchir immédiatement une source, lève l'exception en cas d'échec"""
+        return await self._refresh_task(name)
+
+    def _refresh_task(self, name: str) -> asyncio.Task:
+        """Tâche de rafraîchissement partagée (un seul appel upstream à la fois)"""
+        source = self.sources[name]
+        if source.inflight is None or source.inflight.done():
+            source.inflight = asyncio.create_task(self._do_refresh(source), name=f"refresh-{name}")
+            # L'erreur est déjà comptabilisée dans la source, ne pas la signaler deux fois
+            source.inflight.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return source.inflight
+
+    async def _do_refresh(self, source: WidgetSource) -> Any:
+        async with source.lock:
+            try:
+                data = await source.fetch()
+            except Exception as e:
+                source.failures += 1
+                source.last_error = str(e)
+                raise
+
+            if data != source.data:
+                source.version += 1
+            source.data = data
+            source.updated_at = time.time()
+            source.failures = 0
+            source.last_error = None
+            return data
+
+    async def get_within(self, name: str, deadline: float) -> Any:
+        """
+        Lire une source en respectant un budget de temps
+
+        Si aucune valeur n'est en mémoire, un rafraîchissement est lancé et
+        attendu au plus `deadline` secondes. Passé ce délai (ou en cas d'erreur),
+        la dernière valeur connue ou la valeur de repli est retournée ; l'appel
+        upstream continue en arrière-plan pour les requêtes suivantes.
+        """
+        if self.is_ready(name):
+            return self.get(name)
+        task = self._refresh_task(name)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=deadline)
+        except asyncio.TimeoutError:
+            logger.info(f"Budget {name} dépassé ({int(deadline * 1000)} ms), valeur de repli servie")
+        except Exception as e:
+            logger.warning(f"Rafraîchissement {name} échoué: {str(e)}")
+        return self.get(name)
+
+    def _next_delay(self, source: WidgetSource) -> float:
+        """Délai avant le prochain rafraîchissement (backoff exponentiel + jitter)"""
+        if source.failures:
+            delay = min(self.retry_base * (2 ** (source.failures - 1)), source.interval)
+        else:
+            delay = source.interval
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _initial_delay(self, source: WidgetSource) -> float:
+        """
+        Délai avant le premier rafraîchissement
+
+        Une valeur restaurée encore fraîche n'est rafraîchie qu'à son échéance ;
+        sinon le premier appel est étalé pour ne pas solliciter tous les
+        upstreams au même instant après un redémarrage.
+        """
+        if source.updated_at is not None:
+            remaining = source.interval - (time.time() - source.updated_at)
+            if remaining > 0:
+                return remaining * random.uniform(1 - self.jitter, 1 + self.jitter)
+            return random.uniform(0, min(5, source.interval * self.jitter))
+        return 0
+
+    async def _wait(self, source: WidgetSource, delay: float):
+        """Attendre `delay` secondes ou un changement d'intervalle"""
+        source.wakeup.clear()
+        try:
+            await asyncio.wait_for(source.wakeup.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self, source: WidgetSource):
+        """Boucle de rafraîchissement d'une source"""
+        delay = self._initial_delay(source)
+        if delay:
+            await self._wait(source, delay)
+
+        while True:
+            try:
+                await self.refresh(source.name)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Rafraîchissement {source.name} échoué ({source.failures}): {str(e)}")
+
+            await self._wait(source, self._next_delay(source))
+
+    # ===== PERSISTANCE (démarrage à chaud) =====
+
+    def record_manifest(self):
+        """Noter la date du dernier rendu d'écran"""
+        self.manifest_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        État sérialisable des caches widgets
+
+        Le rendu d'écran n'est pas conservé : la première page après un
+        redémarrage est rendue depuis les sources restaurées.
+        """
+        return {
+            "saved_at": time.time(),
+            "sources": {
+                name: {"data": source.data, "updated_at": source.updated_at, "version": source.version}
+                for name, source in self.sources.items() if source.data is not None
+            }
+        }
+
+    def restore(self, snapshot: Dict[str, Any]):
+        """Recharger un état sauvegardé par snapshot()"""
+        for name, state in snapshot.get("sources", {}).items():
+            source = self.sources.get(name)
+            if source is None or state.get("data") is None:
+                continue
+            source.data = state["data"]
+            source.updated_at = state.get("updated_at")
+            source.version = state.get("version", 0)
+
+    def load(self):
+        """Charger l'état persisté au démarrage"""
+        if not self.persist_path or not self.persist_path.exists():
+            return
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                self.restore(json.load(f))
+            warm = [name for name, source in self.sources.items() if source.data is not None]
+            logger.info(f"Caches widgets restaurés depuis {self.persist_path}: {', '.join(warm) or 'aucun'}")
+        except Exception as e:
+            logger.warning(f"Restauration des caches widgets impossible: {str(e)}")
+
+    def save(self):
+        """Écrire l'état sur disque (écriture atomique)"""
+        if not self.persist_path:
+            return
+        try:
+            self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.persist_path.with_suffix(".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False)
+            os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            logger.warning(f"Sauvegarde des caches widgets impossible: {str(e)}")
+
+    async def _persist_loop(self):
+        """Sauvegarde périodique, hors de la boucle d'événements"""
+        while True:
+            await asyncio.sleep(self.persist_interval)
+            await asyncio.to_thread(self.save)
+
+    async def start(self):
+        """Démarrer une tâche de rafraîchissement par source"""
+        for name, source in self.sources.items():
+            if name not in self._tasks:
+                self._tasks[name] = asyncio.create_task(self._run(source), name=f"widget-{name}")
+        if self.persist_path and "_persist" not in self._tasks:
+            self._tasks["_persist"] = asyncio.create_task(self._persist_loop(), name="widget-persist")
+        logger.info(f"Planificateur widgets démarré: {', '.join(self._tasks)}")
+
+    async def stop(self):
+        """Arrêter proprement les tâches de rafraîchissement et sauvegarder l'état"""
+        tasks = list(self._tasks.values())
+        tasks += [s.inflight for s in self.sources.values() if s.inflight and not s.inflight.done()]
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.save()
+        logger.info("Planificateur widgets arrêté")
+
+    def get_status(self) -> Dict[str, Any]:
+        """État de toutes les sources"""
+        return {name: source.status() for name, source in self.sources.items()}
+
+
+# Instance globale du planificateur
+widget_scheduler = WidgetScheduler(persist_path=Path("data/widget_cache.json"))
@@ -0,0 +1,233 @@
+/**
+ * Moteur de carrousel des zones du TEASER
+ *
+ * - un seul minuteur par zone (setTimeout enchaînés, annulés à chaque changement)
+ * - playlist comparée à la précédente : une zone inchangée n'est pas touchée
+ * - deux calques réutilisés : le média suivant est préchargé dans le calque
+ *   caché puis affiché par fondu, sans reconstruire le DOM
+ */
+(function (window, document) {
+    'use strict';
+
+    // Durée du fondu entre deux médias (ms)
+    const FADE_MS = 600;
+
+    // Au-delà, le média suivant est affiché même s'il n'a pas fini de charger (ms)
+    const PRELOAD_TIMEOUT_MS = 10000;
+
+    // Empreinte d'une playlist (type et URL empreintée de chaque média)
+    function playlistSignature(mediaFiles) {
+        return (mediaFiles || []).map(media => `${media.type}:${media.src}`).join('|');
+    }
+
+    function waitForEvent(element, events) {
+        return new Promise(resolve => {
+            const done = () => {
+                events.forEach(name => element.removeEventListener(name, done));
+                resolve();
+            };
+            events.forEach(name => element.addEventListener(name, done));
+        });
+    }
+
+    function withTimeout(promise) {
+        let timer = null;
+        const timeout = new Promise(resolve => { timer = setTimeout(resolve, PRELOAD_TIMEOUT_MS); });
+        return Promise.race([promise.catch(() => {}), timeout]).then(() => clearTimeout(timer));
+    }
+
+    function createLayer() {
+        const element = document.createElement('div');
+        element.className = 'absolute inset-0';
+        element.style.opacity = '0';
+        element.style.transition = `opacity ${FADE_MS}ms ease-in-out`;
+
+        const img = document.createElement('img');
+        img.alt = 'Media';
+        img.decoding = 'async';
+        img.className = 'w-full h-full object-cover rounded-xl';
+        img.hidden = true;
+
+        const video = document.createElement('video');
+        video.muted = true;
+        video.loop = true;
+        video.playsInline = true;
+        video.preload = 'auto';
+        video.className = 'w-full h-full object-cover rounded-xl';
+        video.hidden = true;
+
+        element.append(img, video);
+        return { element, img, video, media: null, ready: Promise.resolve() };
+    }
+
+    // Libérer le décodeur vidéo d'un calque
+    function releaseVideo(layer) {
+        layer.video.pause();
+        if (layer.video.getAttribute('src')) {
+            layer.video.removeAttribute('src');
+            layer.video.load();
+        }
+        layer.video.hidden = true;
+    }
+
+    // Charger un média dans un calque (réutilise ses éléments img / video)
+    function loadLayer(layer, media) {
+        if (layer.media && layer.media.type === media.type && layer.media.src === media.src) {
+            return layer.ready;
+        }
+        layer.media = media;
+
+        if (media.type === 'video') {
+            layer.img.hidden = true;
+            layer.img.removeAttribute('src');
+            layer.video.hidden = false;
+            layer.video.src = media.src;
+            layer.video.load();
+            layer.ready = withTimeout(waitForEvent(layer.video, ['loadeddata', 'error']));
+        } else {
+            releaseVideo(layer);
+            layer.img.hidden = false;
+            layer.img.src = media.src;
+            layer.ready = withTimeout(layer.img.decode
+                ? layer.img.decode()
+                : waitForEvent(layer.img, ['load', 'error']));
+        }
+        return layer.ready;
+    }
+
+    class ZoneCarousel {
+        /**
+         * @param {HTMLElement} container Conteneur de la zone (contenu initial = placeholder)
+         * @param {Function} getDelay Durée d'affichage d'un média en ms (relue à chaque média)
+         */
+        constructor(container, getDelay) {
+            this.container = container;
+            this.getDelay = getDelay;
+            this.placeholder = Array.from(container.childNodes);
+            this.layers = null;
+            this.front = 0;
+            this.items = [];
+            this.signature = '';
+            this.index = 0;
+            this.timer = null;
+            this.preloadTimer = null;
+            // Incrémentée à chaque changement : invalide les affichages en attente
+            this.generation = 0;
+        }
+
+        /**
+         * Appliquer une playlist ; sans effet si elle n'a pas changé
+         * @returns {boolean} true si la zone a été mise à jour
+         */
+        update(mediaFiles) {
+            const items = (mediaFiles || []).filter(media => media.type === 'image' || media.type === 'video');
+            const signature = playlistSignature(items);
+            if (signature === this.signature) {
+                return false;
+            }
+            this.signature = signature;
+            this.items = items;
+            this.stop();
+
+            if (items.length === 0) {
+                this._showPlaceholder();
+                return true;
+            }
+
+            this._mount();
+            // Continuer sur le média affiché s'il fait toujours partie de la playlist
+            const shown = this.layers[this.front].media;
+            const kept = shown
+                ? items.findIndex(media => media.type === shown.type && media.src === shown.src)
+                : -1;
+            if (kept >= 0) {
+                this.index = kept;
+                this._afterShow();
+            } else {
+                this._show(0);
+            }
+            return true;
+        }
+
+        stop() {
+            this.generation++;
+            clearTimeout(this.timer);
+            clearTimeout(this.preloadTimer);
+            this.timer = null;
+            this.preloadTimer = null;
+        }
+
+        _mount() {
+            if (this.layers) {
+                return;
+            }
+            this.layers = [createLayer(), createLayer()];
+            this.front = 0;
+            this.container.classList.add('relative');
+            this.container.replaceChildren(this.layers[0].element, this.layers[1].element);
+        }
+
+        _showPlaceholder() {
+            if (this.layers) {
+                this.layers.forEach(releaseVideo);
+                this.layers = null;
+            }
+            this.container.replaceChildren(...this.placeholder);
+        }
+
+        async _show(index) {
+            const generation = this.generation;
+            const back = this.layers[1 - this.front];
+            await loadLayer(back, this.items[index]);
+            if (generation !== this.generation) {
+                return;
+            }
+
+            const previous = this.layers[this.front];
+            this.front = 1 - this.front;
+            this.index = index;
+            back.element.style.opacity = '1';
+            previous.element.style.opacity = '0';
+            if (back.media.type === 'video') {
+                // Toujours depuis le début, même préchargée lors d'un tour précédent
+                back.video.currentTime = 0;
+                back.video.play().catch(() => {});
+            }
+            if (previous.media && previous.media.type === 'video') {
+                // Calque masqué après le fondu : sa vidéo (en boucle) ne tourne plus en arrière-plan
+                setTimeout(() => {
+                    if (this.layers && this.layers[this.front] !== previous) {
+                        previous.video.pause();
+                    }
+                }, FADE_MS);
+            }
+            this._afterShow();
+        }
+
+        // Précharger le média suivant (après le fondu) et programmer son affichage
+        _afterShow() {
+            if (this.items.length < 2) {
+                return;
+            }
+            const generation = this.generation;
+            const next = (this.index + 1) % this.items.length;
+
+            this.preloadTimer = setTimeout(() => {
+                this.preloadTimer = null;
+                if (generation === this.generation) {
+                    loadLayer(this.layers[1 - this.front], this.items[next]);
+                }
+            }, FADE_MS);
+
+            this.timer = setTimeout(() => {
+                this.timer = null;
+                if (generation === this.generation) {
+                    this._show(next);
+                }
+            }, Math.max(this.getDelay(), FADE_MS * 2));
+        }
+    }
+
+    window.ZoneCarousel = ZoneCarousel;
+    window.playlistSignature = playlistSignature;
+})(window, document);
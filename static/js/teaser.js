@@ -124,8 +124,8 @@ async function updateMusic() {
         musicCard.querySelector('.track-artist').textContent = data.artiste;
 
         const coverImg = musicCard.querySelector('#music-cover');
-        if (data.cover && data.cover.startsWith('http')) {
-            coverImg.src = data.cover; //Image venant de Deezer
+        if (data.cover && (data.cover.startsWith('http') || data.cover.startsWith('/'))) {
+            coverImg.src = data.cover; //Image Deezer ou pochette en cache local
         } else {
                 coverImg.src = `/static/media/${data.cover || 'musique.jpg'}`;  //Image locale
             }
@@ -0,0 +1,238 @@
+"""
+Serveur de stubs des APIs externes du TEASER (OpenWeatherMap, WorldTides, Deezer)
+Permet de faire tourner benchmarks et tests sans réseau ni quotas
+
+Lancement :
+    uvicorn stub_upstreams:app --port 9000
+
+Puis démarrer le TEASER en pointant les services vers les stubs :
+    OPENWEATHER_API_URL=http://127.0.0.1:9000/data/2.5/weather \\
+    WORLDTIDES_API_URL=http://127.0.0.1:9000/api/v3 \\
+    DEEZER_API_URL=http://127.0.0.1:9000 \\
+    OPENWEATHER_API_KEY=stub python main.py
+
+Injection de pannes (variables d'environnement, préfixe global STUB_ ou
+par upstream STUB_WEATHER_ / STUB_TIDE_ / STUB_MUSIC_) :
+    LATENCY_MS    latence fixe ajoutée à chaque réponse
+    JITTER_MS     latence aléatoire supplémentaire (0..JITTER_MS)
+    ERROR_RATE    proportion de réponses 500 (0.0 à 1.0)
+    RATE_LIMIT    requêtes par seconde autorisées avant réponse 429 (0 = illimité)
+STUB_SEED fixe le générateur aléatoire pour des runs reproductibles.
+Les mêmes paramètres sont modifiables à chaud via POST /_stub/config.
+"""
+
+import asyncio
+import io
+import os
+import random
+import time
+import zlib
+from typing import Any, Dict
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+from PIL import Image
+
+UPSTREAMS = ("weather", "tide", "music")
+
+app = FastAPI(title="TEASER upstream stubs")
+rng = random.Random(int(os.getenv("STUB_SEED", "42")))
+
+
+def _env_value(upstream: str, name: str, default: float) -> float:
+    """Paramètre par upstream, sinon global, sinon valeur par défaut"""
+    value = os.getenv(f"STUB_{upstream.upper()}_{name}", os.getenv(f"STUB_{name}"))
+    return float(value) if value is not None else default
+
+
+class FaultProfile:
+    """Latence, erreurs et limite de débit d'un upstream simulé"""
+
+    def __init__(self, upstream: str):
+        self.latency_ms = _env_value(upstream, "LATENCY_MS", 0)
+        self.jitter_ms = _env_value(upstream, "JITTER_MS", 0)
+        self.error_rate = _env_value(upstream, "ERROR_RATE", 0)
+        self.rate_limit = _env_value(upstream, "RATE_LIMIT", 0)
+
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.stats = {"requests": 0, "errors": 0, "rate_limited": 0}
+
+    def update(self, values: Dict[str, Any]):
+        for key in ("latency_ms", "jitter_ms", "error_rate", "rate_limit"):
+            if key in values:
+                setattr(self, key, float(values[key]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "latency_ms": self.latency_ms,
+            "jitter_ms": self.jitter_ms,
+            "error_rate": self.error_rate,
+            "rate_limit": self.rate_limit,
+            "stats": self.stats
+        }
+
+    def _rate_limited(self) -> bool:
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        if now - self.window_start >= 1:
+            self.window_start = now
+            self.window_count = 0
+        self.window_count += 1
+        return self.window_count > self.rate_limit
+
+    async def apply(self):
+        """Appliquer le profil avant de répondre (lève HTTPException si panne simulée)"""
+        self.stats["requests"] += 1
+
+        if self._rate_limited():
+            self.stats["rate_limited"] += 1
+            raise HTTPException(status_code=429, detail="Rate limit exceeded")
+
+        delay = self.latency_ms + (rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        if self.error_rate and rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            raise HTTPException(status_code=500, detail="Simulated upstream error")
+
+
+profiles = {upstream: FaultProfile(upstream) for upstream in UPSTREAMS}
+
+
+# ===== OPENWEATHERMAP =====
+
+WEATHER_CONDITIONS = [
+    ("ciel dégagé", "01d"),
+    ("peu nuageux", "02d"),
+    ("nuageux", "04d"),
+    ("légère pluie", "10d"),
+    ("orage", "11d"),
+]
+
+
+@app.get("/data/2.5/weather")
+async def stub_weather(q: str = None, lat: float = None, lon: float = None,
+                       appid: str = None, units: str = "metric", lang: str = "fr"):
+    await profiles["weather"].apply()
+
+    if not appid:
+        return JSONResponse(status_code=401, content={"cod": 401, "message": "Invalid API key"})
+
+    name = q.split(",")[0] if q else "Stubville"
+    # Valeurs stables pour une même localisation (hash() varie entre processus)
+    seed = zlib.crc32(repr((q, lat, lon)).encode()) & 0xFFFF
+    description, icon = WEATHER_CONDITIONS[seed % len(WEATHER_CONDITIONS)]
+
+    return {
+        "coord": {"lat": lat or 43.48, "lon": lon or -1.56},
+        "weather": [{"id": 800, "main": "Clear", "description": description, "icon": icon}],
+        "main": {"temp": 12 + (seed % 150) / 10, "humidity": 40 + seed % 50},
+        "wind": {"speed": (seed % 100) / 10},
+        "sys": {"country": q.split(",")[1] if q and "," in q else "FR"},
+        "name": name,
+        "cod": 200
+    }
+
+
+# ===== WORLDTIDES =====
+
+@app.get("/api/v3")
+async def stub_tides(lat: float = None, lon: float = None, length: int = 86400, datum: str = "LAT"):
+    await profiles["tide"].apply()
+
+    # Marées semi-diurnes : un extrême toutes les ~6h12
+    period = 6 * 3600 + 12 * 60
+    now = int(time.time())
+    start = now - now % period
+    extremes = []
+    for i in range(length // period + 2):
+        dt = start + i * period
+        extremes.append({
+            "dt": dt,
+            "date": time.strftime("%Y-%m-%dT%H:%M+0000", time.gmtime(dt)),
+            "height": 1.8 if i % 2 == 0 else -1.6,
+            "type": "High" if i % 2 == 0 else "Low"
+        })
+
+    return {"status": 200, "callCount": 1, "requestLat": lat, "requestLon": lon,
+            "datum": datum, "extremes": extremes}
+
+
+# ===== DEEZER =====
+
+TRACKS = [(f"Stub Track {i}", f"Stub Artist {i % 7}") for i in range(1, 51)]
+
+
+@app.get("/chart/0/tracks")
+async def stub_chart(request: Request, limit: int = 50):
+    await profiles["music"].apply()
+
+    base = str(request.base_url).rstrip("/")
+    data = []
+    for i, (title, artist) in enumerate(TRACKS[:limit], start=1):
+        data.append({
+            "id": i,
+            "title": title,
+            "preview": f"{base}/previews/{i}.mp3",
+            "artist": {"id": i % 7, "name": artist},
+            "album": {
+                "id": i,
+                "title": f"Stub Album {i}",
+                "cover_small": f"{base}/covers/{i}/56x56.jpg",
+                "cover_medium": f"{base}/covers/{i}/250x250.jpg",
+                "cover_big": f"{base}/covers/{i}/500x500.jpg"
+            }
+        })
+    return {"data": data, "total": len(data)}
+
+
+@app.get("/covers/{cover_id}/{size}.jpg")
+async def stub_cover(cover_id: int, size: str):
+    await profiles["music"].apply()
+
+    try:
+        width, height = (int(v) for v in size.split("x"))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Taille inconnue")
+
+    color = ((cover_id * 53) % 256, (cover_id * 97) % 256, (cover_id * 151) % 256)
+    buffer = io.BytesIO()
+    Image.new("RGB", (min(width, 1000), min(height, 1000)), color).save(buffer, "JPEG", quality=80)
+    return Response(content=buffer.getvalue(), media_type="image/jpeg")
+
+
+# ===== PILOTAGE DES STUBS =====
+
+@app.get("/_stub/config")
+async def get_stub_config():
+    return {upstream: profile.to_dict() for upstream, profile in profiles.items()}
+
+
+@app.post("/_stub/config")
+async def set_stub_config(config: dict):
+    """Modifier les profils à chaud : {"weather": {"latency_ms": 800}, "all": {...}}"""
+    for upstream, values in config.items():
+        targets = UPSTREAMS if upstream == "all" else (upstream,)
+        for target in targets:
+            if target not in profiles:
+                raise HTTPException(status_code=400, detail=f"Upstream inconnu: {target}")
+            profiles[target].update(values)
+    return await get_stub_config()
+
+
+@app.post("/_stub/reset")
+async def reset_stubs():
+    """Revenir aux profils des variables d'environnement et remettre les compteurs à zéro"""
+    global rng
+    rng = random.Random(int(os.getenv("STUB_SEED", "42")))
+    for upstream in UPSTREAMS:
+        profiles[upstream] = FaultProfile(upstream)
+    return await get_stub_config()
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=int(os.environ.get("STUB_PORT", 9000)))
@@ -0,0 +1,16 @@
+/**
+ * Configuration Tailwind du bundle local de la page TEASER (python build_assets.py)
+ * Seules les classes présentes dans ces fichiers sont générées.
+ */
+module.exports = {
+  content: [
+    "./templates/teaser.html",
+    "./templates/fragments/**/*.html",
+    "./static/js/teaser.js",
+    "./static/js/carousel.js",
+  ],
+  theme: {
+    extend: {},
+  },
+  plugins: [],
+};
@@ -0,0 +1,7 @@
+"""Configuration commune des tests du module TEASER"""
+
+import sys
+from pathlib import Path
+
+# Modules du projet importables depuis les tests (services, routers, main)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
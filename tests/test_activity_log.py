@@ -0,0 +1,44 @@
+"""Tests du journal d'activité (base SQLite)"""
+
+import sqlite3
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+
+@pytest.fixture
+def activity_module(tmp_path, monkeypatch):
+    # L'instance globale du module est créée dans un dossier temporaire
+    monkeypatch.chdir(tmp_path)
+    from services import activity_log
+    yield activity_log
+    activity_log.activity_log.close()
+
+
+def auto_vacuum(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_new_database_uses_incremental_auto_vacuum(activity_module, tmp_path):
+    log = activity_module.ActivityLog(tmp_path / "new.db")
+    log.add("system", "test")
+    log.close()
+    assert auto_vacuum(tmp_path / "new.db") == 2
+
+
+def test_existing_database_is_converted_to_incremental_auto_vacuum(activity_module, tmp_path):
+    db_path = tmp_path / "old.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(activity_module.SCHEMA)
+    conn.close()
+    assert auto_vacuum(db_path) == 0
+
+    log = activity_module.ActivityLog(db_path)
+    log.close()
+    assert auto_vacuum(db_path) == 2
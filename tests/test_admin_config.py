@@ -0,0 +1,68 @@
+"""Tests de la sauvegarde globale de la configuration admin"""
+
+import pytest
+
+for module in ("fastapi", "httpx", "sqlalchemy", "pydantic_settings", "aiofiles", "aiohttp", "PIL", "requests"):
+    pytest.importorskip(module)
+
+# Corps envoyé par saveAllConfig() (admin.js, gatherAllConfig) : les
+# formulaires météo et marées arrivent en chaînes, weather_refresh en minutes
+ADMIN_PAYLOAD = {
+    "weather": {"weather_api_key": "", "weather_location": "Biarritz,FR", "weather_refresh": "5"},
+    "tide": {"tide_api_key": "", "tide_lat": "43.4832", "tide_lon": "-1.5586"},
+    "system": {
+        "carousel_speed": 5,
+        "auto_play_videos": True,
+        "video_volume": 0.3,
+        "auto_cleanup": True,
+        "cleanup_days": 14,
+        "debug_mode": False,
+    },
+    "modules": {"selfie_path": "/static/selfies/", "selfie_count": 3, "dj_url": "http://localhost:8001", "music_refresh": 10},
+    "zones": {},
+}
+
+
+@pytest.fixture
+def admin(tmp_path, monkeypatch):
+    # Les instances globales (journal, catalogue...) sont créées dans un dossier temporaire
+    monkeypatch.chdir(tmp_path)
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from routers import admin as admin_module
+    from services.retention import retention_worker
+    from services.widget_scheduler import widget_scheduler
+
+    # État global remis en place à la fin du test
+    for source in widget_scheduler.sources.values():
+        monkeypatch.setattr(source, "interval", source.interval)
+    monkeypatch.setattr(retention_worker, "enabled", retention_worker.enabled)
+    monkeypatch.setattr(retention_worker, "days", retention_worker.days)
+
+    app = FastAPI()
+    app.include_router(admin_module.router)
+    return TestClient(app), widget_scheduler, retention_worker
+
+
+def test_flatten_admin_config_converts_weather_minutes():
+    from services.config_service import flatten_admin_config
+
+    flat = flatten_admin_config(ADMIN_PAYLOAD)
+    assert flat["weather_refresh"] == 300
+    assert flat["music_refresh"] == 10
+    assert flat["cleanup_days"] == 14
+    assert flat["tide_lat"] == "43.4832"
+    assert "weather_api_key" not in flat
+
+
+def test_save_all_applies_nested_admin_payload(admin):
+    client, widget_scheduler, retention_worker = admin
+
+    response = client.post("/api/admin/save-all", json=ADMIN_PAYLOAD)
+
+    assert response.status_code == 200
+    assert response.json()["success"] is True
+    assert widget_scheduler.sources["meteo"].interval == 300
+    assert widget_scheduler.sources["musique"].interval == 600
+    assert retention_worker.enabled is True
+    assert retention_worker.days == 14
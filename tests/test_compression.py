@@ -0,0 +1,89 @@
+"""Tests du middleware de compression"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from services.compression import CompressionMiddleware
+
+
+def run(app, headers=((b"accept-encoding", b"gzip"),)):
+    """Réponse ASGI de `app` à travers le middleware (messages envoyés)"""
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": list(headers),
+             "extensions": {"http.response.zerocopy": {}}}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(CompressionMiddleware(app)(scope, receive, send))
+    return sent
+
+
+def start(content_type):
+    return {"type": "http.response.start", "status": 200,
+            "headers": [(b"content-type", content_type.encode()), (b"content-length", b"10")]}
+
+
+def header(message, name):
+    return [value.decode() for key, value in message["headers"] if key.decode().lower() == name]
+
+
+def test_zerocopy_is_sent_after_response_start():
+    async def app(scope, receive, send):
+        await send(start("video/mp4"))
+        await send({"type": "http.response.zerocopy", "file": 3, "count": 10})
+
+    sent = run(app)
+    assert [message["type"] for message in sent] == ["http.response.start", "http.response.zerocopy"]
+    assert header(sent[0], "vary") == []
+
+
+def test_small_compressible_response_still_varies_on_encoding():
+    async def app(scope, receive, send):
+        await send(start("application/json"))
+        await send({"type": "http.response.body", "body": b'{"ok": 1}'})
+
+    sent = run(app)
+    assert header(sent[0], "content-encoding") == []
+    assert header(sent[0], "vary") == ["Accept-Encoding"]
+    assert sent[1]["body"] == b'{"ok": 1}'
+
+
+def test_compressed_response_varies_once():
+    async def app(scope, receive, send):
+        message = start("text/html")
+        message["headers"].append((b"vary", b"Accept-Encoding"))
+        await send(message)
+        await send({"type": "http.response.body", "body": b"<p>teaser</p>" * 200})
+
+    sent = run(app)
+    assert header(sent[0], "content-encoding") == ["gzip"]
+    assert header(sent[0], "vary") == ["Accept-Encoding"]
+
+
+def test_compressed_response_weakens_strong_etag():
+    async def app(scope, receive, send):
+        message = start("application/json")
+        message["headers"].append((b"etag", b'"abc"'))
+        await send(message)
+        await send({"type": "http.response.body", "body": b"[" + b"1," * 1000 + b"1]"})
+
+    sent = run(app)
+    assert header(sent[0], "content-encoding") == ["gzip"]
+    assert header(sent[0], "etag") == ['W/"abc"']
+
+
+def test_identity_response_keeps_strong_etag():
+    async def app(scope, receive, send):
+        message = start("application/json")
+        message["headers"].append((b"etag", b'"abc"'))
+        await send(message)
+        await send({"type": "http.response.body", "body": b"[1]"})
+
+    assert header(run(app)[0], "etag") == ['"abc"']
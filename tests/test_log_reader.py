@@ -0,0 +1,41 @@
+"""Tests du lecteur de logs (suivi en direct)"""
+
+import pytest
+
+from services.log_reader import LogReader, MAX_FOLLOWERS, sse_data
+
+
+def test_followers_are_released_once(tmp_path):
+    reader = LogReader(tmp_path)
+    follow = reader.follow(tmp_path / "teaser.log")
+    assert reader.followers == 1
+    follow.close()
+    follow.close()
+    assert reader.followers == 0
+
+
+def test_followers_limit(tmp_path):
+    reader = LogReader(tmp_path)
+    follows = [reader.follow(tmp_path / "teaser.log") for _ in range(MAX_FOLLOWERS)]
+    with pytest.raises(RuntimeError):
+        reader.follow(tmp_path / "teaser.log")
+    follows.pop().close()
+    reader.follow(tmp_path / "teaser.log")
+    assert reader.followers == MAX_FOLLOWERS
+
+
+def test_sse_data_splits_carriage_returns():
+    assert sse_data("ok") == "data: ok\n"
+    assert sse_data("a\rb\r\nc") == "data: a\ndata: b\ndata: c\n"
+
+
+def test_poll_strips_crlf(tmp_path):
+    path = tmp_path / "teaser.log"
+    path.write_bytes(b"")
+    follow = LogReader(tmp_path).follow(path)
+    follow.poll()
+    path.write_bytes(b"first\r\nsec\rond\n")
+    lines = [line for _, line in follow.poll()["lines"]]
+    follow.close()
+    assert lines == ["first", "sec\rond"]
+    assert "".join(sse_data(line) for line in lines) == "data: first\ndata: sec\ndata: ond\n"
@@ -0,0 +1,42 @@
+"""Tests du réglage à chaud des niveaux de log"""
+
+import logging
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from services import logging_config
+
+
+@pytest.fixture(autouse=True)
+def levels_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(logging_config, "LEVELS_PATH", tmp_path / "log_levels.json")
+    yield
+    logging.getLogger("tests.teaser").setLevel(logging.NOTSET)
+
+
+@pytest.mark.parametrize("level", [10, ["DEBUG"], "VERBOSE", "Level 5", ""])
+def test_invalid_level_is_rejected(level):
+    with pytest.raises(ValueError):
+        logging_config.set_level("tests.teaser", level)
+
+
+def test_invalid_logger_name_is_rejected():
+    with pytest.raises(ValueError):
+        logging_config.set_level(3, "DEBUG")
+
+
+def test_level_is_applied_and_saved():
+    logging_config.set_level("tests.teaser", "debug")
+    assert logging.getLogger("tests.teaser").level == logging.DEBUG
+    assert logging_config.get_levels()["tests.teaser"] == "DEBUG"
+    assert logging_config._load_levels() == {"tests.teaser": "DEBUG"}
+
+
+def test_invalid_saved_levels_are_skipped():
+    logging_config.LEVELS_PATH.write_text('{"tests.teaser": "warning", "tests.bad": "LOUD", "tests.int": 5}')
+    assert logging_config._load_levels() == {"tests.teaser": "WARNING"}
+
+    logging_config.LEVELS_PATH.write_text('["DEBUG"]')
+    assert logging_config._load_levels() == {}
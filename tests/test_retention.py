@@ -0,0 +1,73 @@
+"""Tests du nettoyage automatique des médias"""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+
+@pytest.fixture
+def retention(tmp_path, monkeypatch):
+    # Instances globales (journal, catalogue) créées dans un dossier temporaire
+    monkeypatch.chdir(tmp_path)
+    from services import retention
+    from services.media_catalog import MediaCatalog
+
+    root = tmp_path / "static"
+    (root / "media" / "left1").mkdir(parents=True)
+    catalog = MediaCatalog(root, tmp_path / "catalog.json")
+    return retention, catalog, retention.RetentionWorker(catalog, None)
+
+
+def write_media(catalog, name, age_days):
+    path = catalog.root / "media" / "left1" / name
+    path.write_bytes(name.encode())
+    mtime = time.time() - age_days * 86400
+    os.utime(path, (mtime, mtime))
+    catalog.entry(f"media/left1/{name}")
+    return path
+
+
+@pytest.mark.parametrize("value", ["", None, "abc", [30]])
+def test_invalid_cleanup_days_falls_back_to_default(retention, value):
+    module, _, worker = retention
+    worker.configure({"cleanup_days": 7})
+    worker.configure({"cleanup_days": value})
+    assert worker.days == module.DEFAULT_CLEANUP_DAYS
+
+
+def test_expired_files_are_deleted(retention):
+    _, catalog, worker = retention
+    old = write_media(catalog, "old.jpg", 40)
+    recent = write_media(catalog, "recent.jpg", 1)
+
+    result = asyncio.run(worker.run(30))
+
+    assert result["deleted"] == 1
+    assert not old.exists() and recent.exists()
+    assert catalog.cached("media/left1/old.jpg") is None
+
+
+def test_file_rewritten_in_place_is_kept_and_requeued(retention):
+    _, catalog, worker = retention
+    path = write_media(catalog, "clip.mp4", 40)
+    # Réécrit sans passer par le catalogue : le dossier ne change pas de date
+    path.write_bytes(b"new content")
+    mtime = time.time() - 10 * 86400
+    os.utime(path, (mtime, mtime))
+
+    async def scenario():
+        first = await worker.run(30)
+        await asyncio.sleep(0.2)  # empreinte recalculée en tâche de fond
+        return first
+
+    assert asyncio.run(scenario())["deleted"] == 0
+    assert path.exists()
+    assert catalog.cached("media/left1/clip.mp4")["mtime_ns"] == path.stat().st_mtime_ns
+    assert (path.stat().st_mtime_ns, "media/left1/clip.mp4") in worker._heap
+
+    assert asyncio.run(worker.run(5))["deleted"] == 1
+    assert not path.exists()
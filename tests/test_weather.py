@@ -0,0 +1,30 @@
+"""Tests du cache météo par tuile"""
+
+import math
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("dotenv")
+
+from services import weather
+
+
+@pytest.mark.parametrize("lat, lon", [(1e308, 0.0), (math.nan, 0.0), (0.0, math.inf), (91.0, 0.0), (0.0, -180.5)])
+def test_invalid_coordinates_are_rejected(lat, lon):
+    with pytest.raises(ValueError):
+        weather.check_coordinates(lat, lon)
+
+
+def test_valid_coordinates_are_accepted():
+    weather.check_coordinates(48.85, 2.35)
+    weather.check_coordinates(-90.0, 180.0)
+    weather.check_coordinates(None, None)
+
+
+def test_tile_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(weather, "GEO_TILE_MAX_ENTRIES", 3)
+    monkeypatch.setattr(weather, "_tile_cache", weather.OrderedDict())
+    for index in range(5):
+        weather._cache_tile(f"tile:{index}:0", {"index": index})
+    assert list(weather._tile_cache) == ["tile:2:0", "tile:3:0", "tile:4:0"]